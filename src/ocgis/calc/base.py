@@ -9,6 +9,7 @@ import six
 from ocgis import constants
 from ocgis import env
 from ocgis.base import get_variables, get_dimension_names, AbstractOcgisObject
+from ocgis.calc.kernels import GroupedValues, GroupedMoments
 from ocgis.constants import TagName, DimensionMapKey, HeaderName
 from ocgis.exc import SampleSizeNotImplemented, DefinitionValidationError, UnitsValidationError
 from ocgis.util.broadcaster import broadcast_array_by_dimension_names
@@ -55,6 +56,9 @@ class AbstractFunction(AbstractOcgisObject):
     :param meta_attrs: Contains overloads for variable and/or field attribute values.
     :type meta_attrs: :class:`ocgis.driver.parms.definition_helpers.MetadataAttributes`
     :param str tag: The tag to use for variable iteration on the source field (the source variables for calculation).
+    :param cache: A cache for calculation inputs shared with other calculations on the same field. If ``None``, inputs
+     are not cached.
+    :type cache: :class:`~ocgis.calc.cache.CalculationCache`
     """
 
     @abc.abstractproperty
@@ -85,12 +89,17 @@ class AbstractFunction(AbstractOcgisObject):
     #: units attribute value. The string flag is used to allow ``None`` units to be applied.
     units = '_input_'
 
+    #: If ``True``, :meth:`calculate_grouped` only uses the reductions provided by
+    #: :class:`~ocgis.calc.kernels.GroupedMoments`. Grouped moments are computed once for all fusable calculations sharing
+    #: a cache with statistics fusion enabled.
+    fusable = False
+
     # standard empty dictionary to use for calculation outputs when the operation is file only
     _empty_fill = {'fill': None, 'sample_size': None}
 
     def __init__(self, alias=None, dtype=None, field=None, file_only=False, vc=None, parms=None, tgd=None,
                  calc_sample_size=False, fill_value=None, meta_attrs=None, tag=TagName.DATA_VARIABLES,
-                 spatial_aggregation=False):
+                 spatial_aggregation=False, cache=None):
 
         self._curr_variable = None
         self._current_conformed_array = None
@@ -107,6 +116,7 @@ class AbstractFunction(AbstractOcgisObject):
         self.meta_attrs = deepcopy(meta_attrs)
         self.tag = tag
         self.spatial_aggregation = spatial_aggregation
+        self.cache = cache
 
     @property
     def dtype(self):
@@ -149,6 +159,21 @@ class AbstractFunction(AbstractOcgisObject):
 
         pass
 
+    def calculate_grouped(self, grouped, **kwargs):
+        """
+        Optional method to overload for vectorized temporal group reductions. If a function overloads this method
+        alongside :meth:`~ocgis.calc.base.AbstractFunction.calculate`, all temporal groups are reduced in a single call
+        as opposed to calling :meth:`~ocgis.calc.base.AbstractFunction.calculate` once per group.
+
+        :param grouped: The time-grouped values to reduce.
+        :type grouped: :class:`ocgis.calc.kernels.GroupedValues`
+        :param kwargs: Any keyword parameters for the function.
+        :returns: A three-dimensional array with dimensions (group, row, column).
+        :rtype: :class:`numpy.ma.MaskedArray`
+        """
+
+        raise NotImplementedError
+
     def execute(self):
         """
         Execute the computation over the input field.
@@ -404,6 +429,18 @@ class AbstractFunction(AbstractOcgisObject):
     def _execute_(self):
         pass
 
+    def _get_cached_(self, sources, name, create):
+        # Use the shared calculation cache if one is available.
+        if self.cache is None:
+            ret = create()
+        else:
+            ret = self.cache.get(sources, name, create)
+        return ret
+
+    def _get_source_value_(self, variable):
+        # Source variable values are not modified by calculations and may be shared.
+        return self._get_cached_([variable], 'masked_value', lambda: self.get_variable_value(variable))
+
     def _format_parms_(self, values):
         return values
 
@@ -468,13 +505,19 @@ class AbstractFunction(AbstractOcgisObject):
 
         if not file_only:
             # Get value arrays.
-            arr = self.get_variable_value(variable)
+            arr = self._get_source_value_(variable)
             arr_fill = self.get_variable_value(fill)
             if self.calc_sample_size:
                 arr_fill_sample_size = self.get_variable_value(fill_sample_size)
             else:
                 arr_fill_sample_size = None
 
+            # Reduce all temporal groups in a single pass if the function supports it and the groups do not overlap.
+            if self._get_should_calculate_grouped_(f):
+                group_index = self.tgd.group_index
+            else:
+                group_index = None
+
             # Extra dimensions are not standard field dimensions.
             for yld in self._iter_conformed_arrays_(crosswalk, variable.shape, arr, arr_fill, arr_fill_sample_size):
                 if not self.calc_sample_size:
@@ -486,6 +529,10 @@ class AbstractFunction(AbstractOcgisObject):
                 # Some variables need access to the entire 5d conformed array.
                 self._current_conformed_array = carr
 
+                if group_index is not None:
+                    self._set_temporal_agg_fill_grouped_(carr, carr_fill, carr_fill_sample_size, group_index, parms)
+                    continue
+
                 # Standard field dimension iterators.
                 standard_itrs = [list(range(carr.shape[ii])) for ii in [0, 2]]
                 standard_itrs.append(list(range(self.tgd.shape[0])))
@@ -522,6 +569,37 @@ class AbstractFunction(AbstractOcgisObject):
 
         return {'fill': fill, 'sample_size': fill_sample_size}
 
+    def _get_should_calculate_grouped_(self, f):
+        # Spatial aggregation and calculations other than the function's own "calculate" use the per-group loop.
+        if self.spatial_aggregation or f != self.calculate:
+            return False
+        # The grouped calculation must be defined by the same class defining "calculate". This ensures subclasses
+        # overloading only "calculate" do not use an inherited grouped calculation.
+        mro = type(self).__mro__
+        calculate_owner = [klass for klass in mro if 'calculate' in klass.__dict__][0]
+        grouped_owner = [klass for klass in mro if 'calculate_grouped' in klass.__dict__][0]
+        return calculate_owner is grouped_owner
+
+    def _set_temporal_agg_fill_grouped_(self, carr, carr_fill, carr_fill_sample_size, group_index, parms):
+        ngroups = self.tgd.shape[0]
+        for ir, il in itertools.product(list(range(carr.shape[0])), list(range(carr.shape[2]))):
+            # Time steps are ordered by group once for all calculations sharing the conformed array.
+            grouped = self._get_cached_([carr, group_index], ('grouped', ir, il, ngroups),
+                                        lambda: GroupedValues(carr[ir, :, il, :, :], group_index, ngroups))
+            if self.fusable and self.cache is not None and self.cache.fuse_statistics:
+                reduced = self._get_cached_([carr, group_index], ('moments', ir, il, ngroups),
+                                            lambda: GroupedMoments(grouped))
+            else:
+                reduced = grouped
+            res = self.calculate_grouped(reduced, **parms)
+            carr_fill.data[ir, :, il, :, :] = res.data
+            carr_fill.mask[ir, :, il, :, :] = np.ma.getmaskarray(res)
+
+            if self.calc_sample_size:
+                ss = grouped.sample_size()
+                carr_fill_sample_size.data[ir, :, il, :, :] = ss.data
+                carr_fill_sample_size.mask[ir, :, il, :, :] = ss.mask
+
     def _iter_conformed_arrays_(self, crosswalk, variable_shape, arr, arr_fill, arr_fill_sample_size):
         # Allow sample size array to be set to None.
         if arr_fill_sample_size is None:
@@ -544,9 +622,13 @@ class AbstractFunction(AbstractOcgisObject):
                 extras_removed_fill_sample_size = arr_fill_sample_size.__getitem__(slc)
 
             # Swap axes for the calculation values, the fill array for the calculation result, and (potentially) the
-            # sample size.
-            carr, carr_fill = [broadcast_array_by_dimension_names(t, src_names_extra_removed, STANDARD_DIMENSIONS)
-                               for t in [extras_removed, extras_removed_fill]]
+            # sample size. The conformed calculation values are shared by calculations using the same source array.
+            carr = self._get_cached_([arr], ('conformed', tuple(indices), tuple(src_names_extra_removed)),
+                                     lambda: broadcast_array_by_dimension_names(extras_removed,
+                                                                                src_names_extra_removed,
+                                                                                STANDARD_DIMENSIONS))
+            carr_fill = broadcast_array_by_dimension_names(extras_removed_fill, src_names_extra_removed,
+                                                           STANDARD_DIMENSIONS)
             if calc_sample_size:
                 carr_fill_sample_size = broadcast_array_by_dimension_names(extras_removed_fill_sample_size,
                                                                            src_names_extra_removed,
@@ -717,7 +799,7 @@ class AbstractUnivariateFunction(AbstractFunction):
             fill = self.get_fill_variable(variable, calculation_name, fill_dimensions, self.file_only)
 
             if not self.file_only:
-                arr = self.get_variable_value(variable)
+                arr = self._get_source_value_(variable)
                 arr_fill = self.get_variable_value(fill)
 
                 for yld in self._iter_conformed_arrays_(crosswalk, variable.shape, arr, arr_fill, None):
@@ -836,7 +918,7 @@ class AbstractMultivariateFunction(AbstractFunction):
         keys = list(calculation_targets.keys())
         crosswalks = [self._get_dimension_crosswalk_(calculation_targets[k]) for k in keys]
         variable_shapes = [calculation_targets[k].shape for k in keys]
-        arrs = [self.get_variable_value(calculation_targets[k]) for k in keys]
+        arrs = [self._get_source_value_(calculation_targets[k]) for k in keys]
         archetype = calculation_targets[keys[0]]
         fill = self.get_fill_variable(archetype, self.alias, archetype.dimensions, self.file_only,
                                       add_repeat_record_archetype_name=False)
@@ -0,0 +1,95 @@
+import threading
+
+from ocgis.base import AbstractOcgisObject
+
+
+class CalculationCache(AbstractOcgisObject):
+    """
+    Thread-safe cache for calculation inputs shared by the calculations executed on a field. For example, the masked
+    value and conformed five-dimensional array for a source variable are created once and reused by every calculation
+    targeting that variable.
+
+    Entries are keyed by the identity of their source objects. The cache holds references to the source objects so
+    identities are not reused while an entry exists. Entries are created without holding the cache lock so threads only
+    wait on requests for the same entry.
+
+    :param int consumers: The number of consumers sharing the cache. Entries are released when each consumer has called
+     :meth:`~ocgis.calc.cache.CalculationCache.release`.
+    :param bool fuse_statistics: If ``True``, fusable set functions sharing the cache reduce grouped moments computed in
+     a single pass. See :attr:`ocgis.calc.base.AbstractFunction.fusable`.
+    """
+
+    def __init__(self, consumers=1, fuse_statistics=False):
+        self.consumers = consumers
+        self.fuse_statistics = fuse_statistics
+
+        self._entries = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """Remove all cache entries."""
+
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, sources, name, create):
+        """
+        Get a cache entry, creating it if it does not exist.
+
+        :param sequence sources: The objects identifying the entry (i.e. the source variable).
+        :param name: A hashable identifier for the entry in the context of its sources.
+        :param create: A callable with no arguments returning the entry value.
+        :return: The entry value.
+        """
+
+        key = (tuple(id(s) for s in sources), name)
+        with self._lock:
+            try:
+                entry = self._entries[key]
+            except KeyError:
+                entry = _CalculationCacheEntry(sources)
+                self._entries[key] = entry
+                is_creator = True
+            else:
+                is_creator = False
+
+        # Entries are created outside the cache lock. Only requests for the same entry wait on its creation.
+        if is_creator:
+            try:
+                entry.value = create()
+            except:
+                with self._lock:
+                    if self._entries.get(key) is entry:
+                        self._entries.pop(key)
+                entry.failed = True
+                raise
+            finally:
+                entry.created.set()
+        else:
+            entry.created.wait()
+            if entry.failed:
+                # Creation failed in another thread. Try again in this thread.
+                return self.get(sources, name, create)
+        return entry.value
+
+    def release(self):
+        """
+        Decrement the consumer count. Entries are removed when there are no remaining consumers.
+        """
+
+        with self._lock:
+            self.consumers -= 1
+            if self.consumers <= 0:
+                self.clear()
+
+
+class _CalculationCacheEntry(object):
+    def __init__(self, sources):
+        # References to the sources keep their identities from being reused while the entry exists.
+        self.sources = tuple(sources)
+        self.value = None
+        self.failed = False
+        self.created = threading.Event()
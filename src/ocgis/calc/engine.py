@@ -1,9 +1,14 @@
 import logging
+from copy import deepcopy
+from multiprocessing.pool import Pool, ThreadPool
 
 import numpy as np
+from ocgis import env
 from ocgis.base import get_variable_names
 from ocgis.calc.base import AbstractMultivariateFunction
+from ocgis.calc.cache import CalculationCache
 from ocgis.calc.eval_function import EvalFunction, MultivariateEvalFunction
+from ocgis.constants import CalcExecutorName
 from ocgis.util.logging_ocgis import ocgis_lh
 
 
@@ -16,13 +21,23 @@ class CalculationEngine(object):
     :param bool calc_sample_size: If ``True``, calculation sample sizes for the calculations.
     :param progress:  A progress object to update.
     :type progress: :class:`~ocgis.util.logging_ocgis.ProgressOcgOperations`
+    :param str executor: The executor used to run calculation tasks. See :class:`~ocgis.constants.CalcExecutorName`.
+     If ``None``, default to :attr:`ocgis.env.CALC_EXECUTOR`.
+    :param int workers: The number of workers for parallel executors. If ``None``, default to
+     :attr:`ocgis.env.CALC_EXECUTOR_WORKERS`.
+    :param bool fuse_statistics: If ``True``, fusable set functions on a field share a single pass over the data. If
+     ``None``, default to :attr:`ocgis.env.CALC_FUSE_STATISTICS`.
     """
 
-    def __init__(self, grouping, funcs, calc_sample_size=False, spatial_aggregation=False, progress=None):
+    def __init__(self, grouping, funcs, calc_sample_size=False, spatial_aggregation=False, progress=None,
+                 executor=None, workers=None, fuse_statistics=None):
         self.grouping = grouping
         self.funcs = funcs
         self.calc_sample_size = calc_sample_size
         self.spatial_aggregation = spatial_aggregation
+        self.executor = executor
+        self.workers = workers
+        self.fuse_statistics = fuse_statistics
 
         self._tgds = {}
         self._progress = progress
@@ -51,7 +66,6 @@ class CalculationEngine(object):
         :param bool file_only:
         :param dict tgds: {'field_alias': :class:`ocgis.interface.base.dimension.temporal.TemporalGroupDimension`,...}
         """
-        from ocgis import VariableCollection
 
         # Select which dictionary will hold the temporal group dimensions.
         if tgds is None:
@@ -71,7 +85,16 @@ class CalculationEngine(object):
                     if field.name not in tgds_to_use:
                         tgds_to_use[field.name] = field.time.get_grouping(self.grouping)
 
-        # Iterate over functions.
+        executor = self.executor or env.CALC_EXECUTOR
+        if executor not in (CalcExecutorName.SERIAL, CalcExecutorName.THREAD, CalcExecutorName.PROCESS):
+            msg = 'Calculation executor not recognized: {0}'.format(executor)
+            ocgis_lh(logger='calc.engine', exc=ValueError(msg))
+        is_serial = executor == CalcExecutorName.SERIAL
+        fuse_statistics = env.CALC_FUSE_STATISTICS if self.fuse_statistics is None else self.fuse_statistics
+
+        # Collect the calculation tasks for each field.
+        fields = []
+        tasks = []
         for ugid, container in list(coll.children.items()):
             for field_name, field in list(container.children.items()):
                 new_temporal = tgds_to_use.get(field_name)
@@ -89,74 +112,174 @@ class CalculationEngine(object):
                               'optimizations are incorrect?'
                         ocgis_lh(logger='calc.engine', exc=ValueError(msg))
 
-                out_vc = VariableCollection()
+                # Calculations are independent if the temporal grouping is known before execution. Otherwise, a
+                # calculation may create the temporal grouping used by subsequent calculations.
+                if is_serial or new_temporal is None:
+                    field_funcs = [self.funcs]
+                else:
+                    field_funcs = [[f] for f in self.funcs]
+                    # Load values before they are shared by the workers.
+                    if not file_only:
+                        for variable in field.data_variables:
+                            variable.get_value()
 
-                for f in self.funcs:
-                    try:
-                        ocgis_lh('Calculating: {0}'.format(f['func']), logger='calc.engine')
-                        # Initialize the function.
-                        function = f['ref'](alias=f['name'], dtype=None, field=field, file_only=file_only, vc=out_vc,
-                                            parms=f['kwds'], tgd=new_temporal, calc_sample_size=self.calc_sample_size,
-                                            meta_attrs=f.get('meta_attrs'),
-                                            spatial_aggregation=self.spatial_aggregation)
-                        # Allow a calculation to create a temporal aggregation after initialization.
-                        if new_temporal is None and function.tgd is not None:
-                            new_temporal = function.tgd.extract()
-                    except KeyError:
-                        # Likely an eval function which does not have the name key.
-                        function = EvalFunction(field=field, file_only=file_only, vc=out_vc, expr=self.funcs[0]['func'],
-                                                meta_attrs=self.funcs[0].get('meta_attrs'))
-
-                    ocgis_lh('calculation initialized', logger='calc.engine', level=logging.DEBUG)
-
-                    # Return the variable collection from the calculations.
-                    out_vc = function.execute()
-
-                    for dv in out_vc.values():
-                        # Any outgoing variables from a calculation must have an associated data type.
-                        try:
-                            assert dv.dtype is not None
-                        except AssertionError:
-                            assert isinstance(dv.dtype, np.dtype)
-                        # If this is a file only operation, there should be no computed values.
-                        if file_only:
-                            assert dv._value is None
-
-                    ocgis_lh('calculation finished', logger='calc.engine', level=logging.DEBUG)
+                # Calculation inputs are shared by the tasks for a field. Process workers do not share memory and
+                # create their own cache.
+                if executor == CalcExecutorName.PROCESS:
+                    cache = None
+                else:
+                    cache = CalculationCache(consumers=len(field_funcs), fuse_statistics=fuse_statistics)
+
+                field_idx = len(fields)
+                fields.append((ugid, field_name, field, new_temporal))
+                for funcs in field_funcs:
+                    tasks.append((field_idx, (field, funcs, new_temporal, file_only, self.calc_sample_size,
+                                              self.spatial_aggregation, cache)))
+
+        # Execute the calculation tasks.
+        if is_serial:
+            results = [execute_calculations(*task, progress=self._progress) for _, task in tasks]
+        else:
+            ocgis_lh('Executing {0} calculation tasks with executor: {1}'.format(len(tasks), executor),
+                     logger='calc.engine')
+            workers = self.workers or env.CALC_EXECUTOR_WORKERS
+            pool_class = ThreadPool if executor == CalcExecutorName.THREAD else Pool
+            pool = pool_class(workers)
+            try:
+                results = pool.map(_execute_calculations_task_, [task for _, task in tasks])
+            finally:
+                pool.close()
+                pool.join()
+
+        # Assemble the output fields in task order.
+        field_results = [[] for _ in fields]
+        for (field_idx, _), result in zip(tasks, results):
+            field_results[field_idx].append(result)
+        for field_idx, (ugid, field_name, field, new_temporal) in enumerate(fields):
+            out_variables = []
+            for out_vc, function_tag, task_new_temporal in field_results[field_idx]:
+                out_variables += list(out_vc.values())
+            # The temporal grouping may be created by a calculation when the calculations are executed serially.
+            if new_temporal is None:
+                new_temporal = task_new_temporal
 
+            if not is_serial:
+                for f in self.funcs:
+                    # Field metadata is updated by the calculations. Apply in calculation order to match serial
+                    # execution.
+                    meta_attrs = f.get('meta_attrs')
+                    if meta_attrs is not None:
+                        field.attrs.update(deepcopy(meta_attrs).value['field'])
                     # Try to mark progress. Okay if it is not there.
                     try:
                         self._progress.mark()
                     except AttributeError:
                         pass
 
-                out_field = function.field.copy()
-                function_tag = function.tag
+            out_field = field.copy()
 
-                # Format the returned field. Doing things like removing original data variables and modifying the
-                # time dimension if necessary. Field functions handle all field modifications on their own, so bypass
-                # in that case.
-                if new_temporal is not None:
-                    new_temporal = new_temporal.extract()
-                format_return_field(function_tag, out_field, new_temporal=new_temporal)
+            # Format the returned field. Doing things like removing original data variables and modifying the
+            # time dimension if necessary. Field functions handle all field modifications on their own, so bypass
+            # in that case.
+            if new_temporal is not None:
+                new_temporal = new_temporal.extract()
+            format_return_field(function_tag, out_field, new_temporal=new_temporal)
 
-                # Add the calculation variables.
-                for variable in list(out_vc.values()):
-                    variable = variable.extract()
-                    out_field.add_variable(variable)
+            # Add the calculation variables.
+            for variable in out_variables:
+                variable = variable.extract()
+                out_field.add_variable(variable)
 
-                # Tag the calculation data as data variables.
-                out_field.append_to_tags(function_tag, list(out_vc.keys()))
+            # Tag the calculation data as data variables.
+            out_field.append_to_tags(function_tag, [variable.name for variable in out_variables])
 
-                # Update the field if there is a CRS. This will ensure accurate tagging of data variables.
-                if out_field.crs is not None:
-                    # print 'here'
-                    out_field.crs.format_spatial_object(out_field)
+            # Update the field if there is a CRS. This will ensure accurate tagging of data variables.
+            if out_field.crs is not None:
+                out_field.crs.format_spatial_object(out_field)
 
-                coll.children[ugid].children[field_name] = out_field
+            coll.children[ugid].children[field_name] = out_field
         return coll
 
 
+def execute_calculations(field, funcs, new_temporal, file_only, calc_sample_size, spatial_aggregation, cache=None,
+                         progress=None):
+    """
+    Execute a sequence of calculations on a field. Calculations are executed in order with output variables collected
+    in a single variable collection.
+
+    :param field: The field to calculate on.
+    :type field: :class:`~ocgis.Field`
+    :param list funcs: Sequence of calculation dictionaries.
+    :param new_temporal: The temporal grouping for the calculations. If ``None``, a calculation may create one.
+    :type new_temporal: :class:`~ocgis.variable.temporal.TemporalGroupVariable`
+    :param bool file_only: If ``True``, do not compute output values.
+    :param bool calc_sample_size: If ``True``, calculate sample sizes.
+    :param bool spatial_aggregation: If ``True``, the field is spatially aggregated.
+    :param cache: The calculation input cache shared with other calculations on the field. If ``None``, a cache is
+     created for the calculation sequence. The cache is released when the calculations complete.
+    :type cache: :class:`~ocgis.calc.cache.CalculationCache`
+    :param progress: A progress object to update after each calculation.
+    :type progress: :class:`~ocgis.util.logging_ocgis.ProgressOcgOperations`
+    :returns: A tuple containing the output variable collection, the calculation tag, and the temporal grouping.
+    :rtype: tuple(:class:`~ocgis.VariableCollection`, str, :class:`~ocgis.variable.temporal.TemporalGroupVariable`)
+    """
+    from ocgis import VariableCollection
+
+    out_vc = VariableCollection()
+    if cache is None:
+        cache = CalculationCache()
+
+    try:
+        for f in funcs:
+            try:
+                ocgis_lh('Calculating: {0}'.format(f['func']), logger='calc.engine')
+                # Initialize the function.
+                function = f['ref'](alias=f['name'], dtype=None, field=field, file_only=file_only, vc=out_vc,
+                                    parms=f['kwds'], tgd=new_temporal, calc_sample_size=calc_sample_size,
+                                    meta_attrs=f.get('meta_attrs'),
+                                    spatial_aggregation=spatial_aggregation, cache=cache)
+                # Allow a calculation to create a temporal aggregation after initialization.
+                if new_temporal is None and function.tgd is not None:
+                    new_temporal = function.tgd.extract()
+            except KeyError:
+                # Likely an eval function which does not have the name key.
+                function = EvalFunction(field=field, file_only=file_only, vc=out_vc, expr=funcs[0]['func'],
+                                        meta_attrs=funcs[0].get('meta_attrs'))
+
+            ocgis_lh('calculation initialized', logger='calc.engine', level=logging.DEBUG)
+
+            # Return the variable collection from the calculations.
+            out_vc = function.execute()
+
+            for dv in out_vc.values():
+                # Any outgoing variables from a calculation must have an associated data type.
+                try:
+                    assert dv.dtype is not None
+                except AssertionError:
+                    assert isinstance(dv.dtype, np.dtype)
+                # If this is a file only operation, there should be no computed values.
+                if file_only:
+                    assert dv._value is None
+
+            ocgis_lh('calculation finished', logger='calc.engine', level=logging.DEBUG)
+
+            # Try to mark progress. Okay if it is not there.
+            try:
+                progress.mark()
+            except AttributeError:
+                pass
+    finally:
+        # Release shared inputs once the last calculation using them completes.
+        cache.release()
+
+    return out_vc, function.tag, new_temporal
+
+
+def _execute_calculations_task_(args):
+    # Pool workers accept a single argument.
+    return execute_calculations(*args)
+
+
 def format_return_field(function_tag, out_field, new_temporal=None):
     # Remove the variables used by the calculation.
     try:
@@ -0,0 +1,422 @@
+import numpy as np
+from ocgis import constants
+from ocgis.base import AbstractOcgisObject
+
+
+class GroupedMoments(AbstractOcgisObject):
+    """
+    Count, mean, standard deviation, and extrema for temporal groups computed in a single streaming pass over
+    group-ordered values. Time steps are read in chunks bounded by :attr:`ocgis.constants.CALC_MAX_CHUNK_ELEMENTS`.
+    Statistics for each chunk segment are merged into running accumulators using the pairwise form of Welford's
+    algorithm (Chan et al.). Reductions follow the interface of :class:`~ocgis.calc.kernels.GroupedValues` so the
+    moments may be reduced by the same set functions. Means and standard deviations are accumulated in double precision
+    and agree with :class:`~ocgis.calc.kernels.GroupedValues` to floating point tolerance.
+
+    :param grouped: The time-grouped values.
+    :type grouped: :class:`~ocgis.calc.kernels.GroupedValues`
+    """
+
+    def __init__(self, grouped):
+        self.ngroups = grouped.ngroups
+
+        data = grouped.data
+        shape = [self.ngroups] + list(data.shape[1:])
+        self._min_fill = np.ma.minimum_fill_value(data)
+        self._max_fill = np.ma.maximum_fill_value(data)
+
+        self._count = np.zeros(shape, dtype=int)
+        self._mean = np.zeros(shape, dtype=float)
+        self._m2 = np.zeros(shape, dtype=float)
+        self._min = np.empty(shape, dtype=data.dtype)
+        self._min.fill(self._min_fill)
+        self._max = np.empty(shape, dtype=data.dtype)
+        self._max.fill(self._max_fill)
+
+        chunk_size = max(constants.CALC_MAX_CHUNK_ELEMENTS // max(int(np.prod(data.shape[1:])), 1), 1)
+        for start in range(0, data.shape[0], chunk_size):
+            stop = start + chunk_size
+            self._update_(data[start:stop], grouped.mask[start:stop], grouped.sorted_index[start:stop])
+
+    def count(self):
+        return np.ma.array(self._count.copy(), mask=self._get_empty_mask_())
+
+    def max(self):
+        return np.ma.array(self._max.copy(), mask=self._get_empty_mask_())
+
+    def mean(self):
+        return np.ma.array(self._mean.copy(), mask=self._get_empty_mask_())
+
+    def min(self):
+        return np.ma.array(self._min.copy(), mask=self._get_empty_mask_())
+
+    def std(self, ddof=0):
+        ret = np.sqrt(self._m2 / np.maximum(self._count - ddof, 1))
+        return np.ma.array(ret, mask=self._get_empty_mask_())
+
+    def _get_empty_mask_(self):
+        return self._count == 0
+
+    def _update_(self, data, mask, sorted_index):
+        # Segment the chunk by group. Groups are contiguous as the time steps are ordered by group.
+        starts = np.zeros(1, dtype=int)
+        starts = np.append(starts, np.flatnonzero(np.diff(sorted_index)) + 1)
+        stops = np.append(starts[1:], sorted_index.shape[0])
+        groups = sorted_index[starts]
+
+        # Statistics for each segment in the chunk. Temporary arrays are modified in-place to limit passes over the
+        # chunk.
+        count_b = np.add.reduceat(np.invert(mask), starts, axis=0, dtype=int)
+        values = data.astype(float)
+        np.copyto(values, 0., where=mask)
+        mean_b = np.add.reduceat(values, starts, axis=0) / np.maximum(count_b, 1)
+        for idx, (start, stop) in enumerate(zip(starts, stops)):
+            values[start:stop] -= mean_b[idx]
+        np.copyto(values, 0., where=mask)
+        np.multiply(values, values, out=values)
+        m2_b = np.add.reduceat(values, starts, axis=0)
+        extremes = np.array(data)
+        np.copyto(extremes, self._min_fill, where=mask)
+        min_b = np.minimum.reduceat(extremes, starts, axis=0)
+        np.copyto(extremes, self._max_fill, where=mask)
+        max_b = np.maximum.reduceat(extremes, starts, axis=0)
+
+        # Merge the segment statistics into the group accumulators.
+        count_a = self._count[groups]
+        mean_a = self._mean[groups]
+        count = count_a + count_b
+        divisor = np.maximum(count, 1).astype(float)
+        delta = mean_b - mean_a
+        self._mean[groups] = mean_a + delta * (count_b / divisor)
+        self._m2[groups] += m2_b + delta * delta * (count_a * count_b / divisor)
+        self._count[groups] = count
+        self._min[groups] = np.minimum(self._min[groups], min_b)
+        self._max[groups] = np.maximum(self._max[groups], max_b)
+
+
+class GroupedValues(AbstractOcgisObject):
+    """
+    Vectorized reductions of a three-dimensional masked array along the time axis using an integer group index. Time
+    steps are ordered by group once at initialization. Reductions are then computed for all groups in a single pass
+    using segmented NumPy operations (i.e. :func:`numpy.add.reduceat`). Floating point sums are computed on a padded
+    ``(group, time, row, column)`` layout to maintain the summation order used by :func:`numpy.ma.sum`.
+
+    :param values: The three-dimensional input array with dimensions ``(time, row, column)``.
+    :type values: :class:`numpy.ma.MaskedArray`
+    :param group_index: Integer vector with length equal to the time dimension containing the group identifier for each
+     time step. Time steps with a negative identifier do not belong to any group.
+    :type group_index: :class:`numpy.ndarray`
+    :param int ngroups: The number of temporal groups.
+    """
+
+    def __init__(self, values, group_index, ngroups):
+        assert values.ndim == 3
+        group_index = np.asarray(group_index)
+        assert group_index.shape[0] == values.shape[0]
+
+        self.ngroups = ngroups
+
+        data = np.ma.getdata(values)
+        mask = np.ma.getmaskarray(values)
+
+        # Only gather the time steps when they are not already ordered by group. Ordered group indices are the common
+        # case for sorted time coordinates.
+        if group_index.shape[0] > 0 and group_index[0] >= 0 and np.all(np.diff(group_index) >= 0):
+            sorted_index = group_index
+        else:
+            order = np.argsort(group_index, kind='mergesort')
+            order = order[group_index[order] >= 0]
+            sorted_index = group_index[order]
+            data = data[order]
+            mask = mask[order]
+
+        self.data = data
+        self.mask = mask
+        self.sorted_index = sorted_index
+
+        # Number of time steps in each group. Groups may be empty (i.e. a season not present in a year).
+        self.group_sizes = np.bincount(sorted_index, minlength=ngroups)
+        self.offsets = np.zeros(ngroups, dtype=int)
+        self.offsets[1:] = np.cumsum(self.group_sizes)[:-1]
+        self._nonempty = self.group_sizes > 0
+
+    def count(self, where=None):
+        """
+        :param where: Optional boolean array with the same shape as :attr:`data`. If provided, only count unmasked
+         elements where this array is ``True``.
+        :type where: :class:`numpy.ndarray`
+        :returns: The unmasked element count for each group with dimensions ``(group, row, column)``. Groups with no
+         unmasked elements are masked.
+        :rtype: :class:`numpy.ma.MaskedArray`
+        """
+
+        valid = np.invert(self.mask)
+        if where is not None:
+            to_count = np.logical_and(np.ma.getdata(where), valid)
+        else:
+            to_count = valid
+        ret = self._reduceat_(np.add, to_count.astype(int), 0)
+        return np.ma.array(ret, mask=self._get_empty_mask_())
+
+    def max(self):
+        fill = np.ma.maximum_fill_value(self.data)
+        return self._reduce_extreme_(np.maximum, fill)
+
+    def mean(self):
+        ret = self._get_sum_() / np.maximum(self._get_valid_count_(), 1)
+        return np.ma.array(ret, mask=self._get_empty_mask_())
+
+    def median(self):
+        return self.percentile(50.)
+
+    def min(self):
+        fill = np.ma.minimum_fill_value(self.data)
+        return self._reduce_extreme_(np.minimum, fill)
+
+    def percentile(self, percentile):
+        """
+        Masked elements are ignored. Groups are padded to the largest group size and reduced with a single call to
+        :func:`~ocgis.calc.kernels.get_nanpercentile`.
+
+        :param float percentile: Percentile to compute on the interval [0, 100].
+        :rtype: :class:`numpy.ma.MaskedArray`
+        """
+
+        padded = self._get_padded_(np.where(self.mask, np.nan, self.data), np.nan, dtype=float)
+        ret = get_nanpercentile(padded, percentile, axis=1)
+        return np.ma.array(ret, mask=self._get_empty_mask_())
+
+    def sample_size(self):
+        """
+        :returns: Unmasked element count for each group. Consistent with
+         :meth:`~ocgis.calc.base.AbstractFunction.get_sample_size`, the mask is taken from the first time step in each
+         group.
+        :rtype: :class:`numpy.ma.MaskedArray`
+        """
+
+        ret = self._reduceat_(np.add, np.invert(self.mask).astype(int), 0)
+        mask = np.ones(ret.shape, dtype=bool)
+        mask[self._nonempty] = self.mask[self.offsets[self._nonempty]]
+        return np.ma.array(ret, mask=mask)
+
+    def std(self, ddof=0):
+        count = self._get_valid_count_()
+        mean = self._get_sum_() / np.maximum(count, 1)
+        # Use deviations from the group mean as opposed to the sum of squares for numerical stability.
+        deviations = self.data - mean[self.sorted_index]
+        deviations[self.mask] = 0
+        deviations = self._get_padded_(deviations * deviations, 0)
+        ret = np.add.reduce(deviations, axis=1) / np.maximum(count - ddof, 1)
+        ret = np.sqrt(ret)
+        return np.ma.array(ret, mask=self._get_empty_mask_())
+
+    def sum(self):
+        return np.ma.array(self._get_sum_(), mask=self._get_empty_mask_())
+
+    def _get_empty_mask_(self):
+        return self._get_valid_count_() == 0
+
+    def _get_padded_(self, arr, fill, dtype=None):
+        # Scatter group-ordered values into a (group, time, row, column) array padded to the largest group size.
+        if dtype is None:
+            dtype = arr.dtype
+        max_size = self.group_sizes.max() if self.ngroups > 0 else 0
+        ret = np.empty([self.ngroups, max_size] + list(arr.shape[1:]), dtype=dtype)
+        ret.fill(fill)
+        rank = np.arange(self.sorted_index.shape[0]) - self.offsets[self.sorted_index]
+        ret[self.sorted_index, rank] = arr
+        return ret
+
+    def _get_sum_(self):
+        to_sum = np.where(self.mask, 0, self.data)
+        if to_sum.dtype.kind == 'f':
+            # Padding with zeros maintains the sequential summation order of a sum along the time axis.
+            ret = np.add.reduce(self._get_padded_(to_sum, 0), axis=1)
+        else:
+            ret = self._reduceat_(np.add, to_sum, 0)
+        return ret
+
+    def _get_valid_count_(self):
+        try:
+            ret = self._valid_count
+        except AttributeError:
+            ret = self._reduceat_(np.add, np.invert(self.mask).astype(int), 0)
+            self._valid_count = ret
+        return ret
+
+    def _reduce_extreme_(self, ufunc, fill):
+        ret = self._reduceat_(ufunc, np.where(self.mask, fill, self.data), fill)
+        return np.ma.array(ret, mask=self._get_empty_mask_())
+
+    def _reduceat_(self, ufunc, arr, empty_fill):
+        # Reduce at the group offsets. Empty groups are filled with "empty_fill" as "reduceat" returns the element at the
+        # offset for an empty segment.
+        ret = np.empty([self.ngroups] + list(arr.shape[1:]), dtype=arr.dtype)
+        ret.fill(empty_fill)
+        if self._nonempty.any():
+            ret[self._nonempty] = ufunc.reduceat(arr, self.offsets[self._nonempty], axis=0)
+        return ret
+
+
+class RunLengths(AbstractOcgisObject):
+    """
+    Run-length encoding of a boolean array along its leading (time) axis. Runs of ``True`` values are found for all
+    cells simultaneously by differencing the zero-padded condition: a run starts where the difference is one and stops
+    where it is negative one. Runs are ordered by cell and then by time. Summaries are computed for all cells with
+    segmented NumPy operations. Cells without any runs have a summary value of zero.
+
+    >>> condition = [[True], [True], [False], [True]]
+    >>> RunLengths(condition).lengths
+    array([2, 1])
+
+    :param condition: Boolean array with time as the leading dimension (i.e. ``(time, row, column)``). Masked elements
+     are considered ``False`` and interrupt a run.
+    :type condition: :class:`numpy.ndarray` | :class:`numpy.ma.MaskedArray`
+    """
+
+    def __init__(self, condition):
+        condition = np.ma.filled(condition, False).astype(bool)
+        assert condition.ndim >= 1
+
+        self.shape = condition.shape[1:]
+        self.ncells = int(np.prod(self.shape, dtype=int))
+        ntime = condition.shape[0]
+
+        # Cells are placed along the first dimension so "nonzero" returns the runs ordered by cell.
+        padded = np.zeros((self.ncells, ntime + 2), dtype=np.int8)
+        padded[:, 1:-1] = condition.reshape(ntime, self.ncells).T
+        edges = np.diff(padded, axis=1)
+        cell_index, start = np.nonzero(edges == 1)
+        stop = np.nonzero(edges == -1)[1]
+
+        #: Cell (flat index into :attr:`shape`) containing each run.
+        self.cell_index = cell_index
+        #: Time index of the first element in each run.
+        self.start = start
+        #: Length of each run.
+        self.lengths = stop - start
+        self._count = np.bincount(cell_index, minlength=self.ncells)
+        self._offsets = np.cumsum(self._count) - self._count
+
+    def count(self):
+        """
+        :returns: The number of runs in each cell.
+        :rtype: :class:`numpy.ndarray`
+        """
+
+        return self._count.reshape(self.shape)
+
+    def histogram(self):
+        """
+        :returns: A tuple of equal-length vectors ``(cell_index, length, count)`` containing the number of runs with a
+         given length in each cell. Entries are ordered by cell and then by run length. Cells without runs are not
+         included.
+        :rtype: tuple
+        """
+
+        key = self.cell_index * (self.lengths.max() + 1 if self.lengths.size > 0 else 1) + self.lengths
+        _, first, count = np.unique(key, return_index=True, return_counts=True)
+        return self.cell_index[first], self.lengths[first], count
+
+    def max(self):
+        return self._reduceat_(np.maximum)
+
+    def mean(self):
+        ret = self._get_sum_() / np.maximum(self._count, 1)
+        return ret.reshape(self.shape)
+
+    def median(self):
+        # Runs are sorted within each cell. The median is the average of the two central elements.
+        order = np.lexsort((self.lengths, self.cell_index))
+        sorted_lengths = self.lengths[order]
+        ret = np.zeros(self.ncells, dtype=float)
+        select = self._count > 0
+        offsets = self._offsets[select]
+        count = self._count[select]
+        ret[select] = (sorted_lengths[offsets + (count - 1) // 2] + sorted_lengths[offsets + count // 2]) / 2.
+        return ret.reshape(self.shape)
+
+    def min(self):
+        return self._reduceat_(np.minimum)
+
+    def std(self):
+        mean = self._get_sum_() / np.maximum(self._count, 1)
+        deviations = self.lengths - mean[self.cell_index]
+        ret = np.bincount(self.cell_index, weights=deviations * deviations, minlength=self.ncells)
+        ret = np.sqrt(ret / np.maximum(self._count, 1))
+        return ret.reshape(self.shape)
+
+    def sum(self):
+        """
+        :returns: The total number of elements contained in runs for each cell.
+        :rtype: :class:`numpy.ndarray`
+        """
+
+        return self._get_sum_().reshape(self.shape)
+
+    def _get_sum_(self):
+        return np.bincount(self.cell_index, weights=self.lengths, minlength=self.ncells).astype(self.lengths.dtype)
+
+    def _reduceat_(self, ufunc):
+        ret = np.zeros(self.ncells, dtype=self.lengths.dtype)
+        select = self._count > 0
+        if select.any():
+            ret[select] = ufunc.reduceat(self.lengths, self._offsets[select])
+        return ret.reshape(self.shape)
+
+
+def get_group_index(dgroups, size):
+    """
+    Convert a sequence of boolean temporal group selection arrays to an integer group index.
+
+    :param dgroups: Sequence of boolean arrays or slices selecting the time steps for each group.
+    :param int size: The length of the time dimension.
+    :returns: An integer vector of length ``size`` with the group identifier for each time step. Time steps not in a
+     group are set to ``-1``. ``None`` is returned if the groups overlap.
+    :rtype: :class:`numpy.ndarray` | None
+    """
+
+    ret = np.empty(size, dtype=int)
+    ret.fill(-1)
+    for idx, dgroup in enumerate(dgroups):
+        if isinstance(dgroup, slice):
+            dgroup = np.arange(size)[dgroup]
+        if np.any(ret[dgroup] >= 0):
+            return None
+        ret[dgroup] = idx
+    return ret
+
+
+def get_nanpercentile(arr, percentile, axis=0):
+    """
+    Vectorized equivalent of :func:`numpy.nanpercentile` using linear interpolation. The NumPy implementation applies a
+    one-dimensional reduction to each slice when ``NaN`` values are present. Here, ``arr`` is sorted once along ``axis``
+    (``NaN`` values sort last) and the interpolation is computed for all slices simultaneously.
+
+    :param arr: The floating point input array.
+    :type arr: :class:`numpy.ndarray`
+    :param float percentile: Percentile to compute on the interval [0, 100].
+    :param int axis: The axis along which to compute the percentile.
+    :returns: An array with ``axis`` removed. Slices containing only ``NaN`` values are ``NaN``.
+    :rtype: :class:`numpy.ndarray`
+    """
+
+    arr = np.sort(np.moveaxis(arr, axis, 0), axis=0)
+    if arr.shape[0] == 0:
+        return np.full(arr.shape[1:], np.nan)
+    count = arr.shape[0] - np.isnan(arr).sum(axis=0)
+
+    virtual_index = (count - 1) * (percentile / 100.)
+    below = np.floor(virtual_index)
+    gamma = virtual_index - below
+    below = np.maximum(below.astype(int), 0)
+    above = np.minimum(below + 1, np.maximum(count - 1, 0))
+
+    ret_index = tuple(np.indices(count.shape))
+    lower = arr[(below,) + ret_index]
+    upper = arr[(above,) + ret_index]
+
+    # Interpolate from the closest value to limit round-off consistent with NumPy.
+    diff = upper - lower
+    ret = np.where(gamma >= 0.5, upper - diff * (1 - gamma), lower + diff * gamma)
+    ret[count == 0] = np.nan
+    return ret
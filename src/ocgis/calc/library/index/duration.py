@@ -3,8 +3,8 @@ from collections import OrderedDict
 import numpy as np
 from ocgis import env
 from ocgis.calc import base
+from ocgis.calc.kernels import RunLengths
 from ocgis.exc import DefinitionValidationError
-from ocgis.util.helpers import iter_array
 
 
 class Duration(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFunction):
@@ -27,26 +27,16 @@ class Duration(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFun
         """
 
         assert (len(values.shape) == 3)
-        # storage array for counts
-        shp_out = values.shape[-2:]
-        store = np.zeros(shp_out, dtype=self.dtype).flatten()
-        # get the summary operation from the numpy library
-        summary_operation = getattr(np, summary)
-
-        # find longest sequence for each geometry across time dimension
-        for ii, fill in enumerate(self._iter_consecutive_(values, threshold, operation)):
-            # case of only a singular occurrence
-            if len(fill) > 1:
-                fill = summary_operation(fill)
-            else:
-                try:
-                    fill = fill[0]
-                # value is likely masked
-                except IndexError:
-                    fill = 0
-            store[ii] = fill
-
-        store.resize(shp_out)
+        runs = self._get_run_lengths_(values, threshold, operation)
+        # summary operations are methods of the run-length encoding (i.e. "mean" or "max"). cells with no occurrence have
+        # a duration of zero.
+        store = getattr(runs, summary)().astype(self.dtype)
+        if summary == 'std':
+            # a cell with a single run or only single-step runs has a single duration which is returned as the summary
+            # value as opposed to a zero deviation.
+            runs_max = runs.max()
+            select = np.logical_or(runs.count() <= 1, runs_max == 1)
+            store[select] = runs_max[select]
 
         # update the output mask. this only applies to geometries so pick the
         # first masked time field
@@ -54,9 +44,8 @@ class Duration(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFun
 
         return store
 
-    def _iter_consecutive_(self, values, threshold, operation):
-        # time index reference
-        ref = np.arange(0, values.shape[0])
+    @staticmethod
+    def _get_run_lengths_(values, threshold, operation):
         # perform requested logical operation
         if operation == 'gt':
             arr = values > threshold
@@ -67,26 +56,8 @@ class Duration(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFun
         elif operation == 'lte':
             arr = values <= threshold
 
-        # find longest sequence for each geometry across time dimension
-        for rowidx, colidx in iter_array(values[0, :, :], use_mask=False):
-            vec = arr[:, rowidx, colidx].reshape(-1)
-            # check first if there is a longer series than 1
-            if np.any(np.diff(ref[vec]) == 1):
-                # find locations where the values switch
-                diff_idx = np.diff(vec)
-                if diff_idx.shape != ref.shape:
-                    diff_idx = np.append(diff_idx, [False])
-                split_idx = ref[diff_idx] + 1
-                splits = np.array_split(vec, split_idx)
-                fill = [a.sum() for a in splits if np.all(a)]
-            # case of only a singular occurrence
-            elif np.any(vec):
-                fill = [1]
-            # case for no occurrence
-            else:
-                fill = [0]
-
-            yield (fill)
+        # find the sequences for each geometry across the time dimension. masked values interrupt a sequence.
+        return RunLengths(arr)
 
     @classmethod
     def validate(cls, ops):
@@ -113,10 +84,16 @@ class FrequencyDuration(base.AbstractKeyedOutputFunction, Duration):
         """
 
         shp_out = values.shape[-2:]
+        runs = self._get_run_lengths_(values, threshold, operation)
+        cell_index, duration, count = runs.histogram()
+        # Split the histogram into the entries for each cell. Histogram entries are ordered by cell.
+        splits = np.cumsum(np.bincount(cell_index, minlength=runs.ncells))[:-1]
+        duration = np.split(duration, splits)
+        count = np.split(count, splits)
+
         store = np.zeros(shp_out, dtype=object).flatten()
-        for ii, duration in enumerate(self._iter_consecutive_(values, threshold, operation)):
-            summary = self._get_summary_(duration)
-            store[ii] = summary
+        for ii in range(store.shape[0]):
+            store[ii] = self._get_summary_(duration[ii], count[ii])
         store.resize(shp_out)
 
         # Update the output mask. this only applies to geometries so pick the first masked time field
@@ -132,22 +109,23 @@ class FrequencyDuration(base.AbstractKeyedOutputFunction, Duration):
     def validate(cls, ops):
         Duration.validate(ops)
 
-    def _get_summary_(self, duration):
+    def _get_summary_(self, duration, count):
         """
-        :param duration: List of duration elements for frequency target.
-        :type duration: list
-        
-        >>> duration = [3, 5, 2, 2]
-        
-        :returns: NumPy structure with dimension equal to the count of unique elements
-         in the `duration` sequence.
+        :param duration: Unique spell durations for the frequency target.
+        :type duration: :class:`numpy.ndarray`
+        :param count: Number of spells with each duration.
+        :type count: :class:`numpy.ndarray`
+
+        >>> duration = [2, 3, 5]
+        >>> count = [2, 1, 1]
+
+        :returns: NumPy structure with dimension equal to the count of unique durations. If there are no durations, a
+         single element with a duration of zero and count of one is returned.
         """
 
-        set_duration = set(duration)
-        ret = np.empty(len(set_duration), dtype=self.structure_dtype)
-        for ii, sd in enumerate(set_duration):
-            idx = np.array(duration) == sd
-            count = idx.sum()
-            ret[ii]['duration'] = sd
-            ret[ii]['count'] = count
+        if len(duration) == 0:
+            duration, count = [0], [1]
+        ret = np.empty(len(duration), dtype=self.structure_dtype)
+        ret['duration'] = duration
+        ret['count'] = count
         return ret
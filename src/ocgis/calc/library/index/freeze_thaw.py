@@ -1,10 +1,13 @@
 import datetime as dt
 
 import numpy as np
-from ocgis import env
+from ocgis import env, constants
 from ocgis.calc import base
 from ocgis.util.units import get_are_units_equal_by_string_or_cfunits
 
+#: Maximum number of positions searched at once for a threshold exceedance.
+_FREEZETHAW_MAX_WINDOW = 64
+
 
 class FreezeThaw(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFunction):
     key = 'freezethaw'
@@ -45,7 +48,7 @@ class FreezeThaw(base.AbstractUnivariateSetFunction, base.AbstractParameterizedF
                                                       try_cfunits=env.USE_CFUNITS):
             tas = values - 273.15
 
-        out = np.apply_along_axis(freezethaw1d, 0, tas, threshold=threshold)
+        out = freezethaw3d(tas, threshold=threshold)
         return np.ma.masked_invalid(out)
 
 
@@ -108,3 +111,117 @@ def freezethaw1d(x, threshold):
 
     # Return the number of transitions from frozen to thawed or vice-versa
     return float(len(cycles) - 2)  # There are two "artificial" transitions
+
+
+def freezethaw3d(x, threshold):
+    """
+    Return the number of freeze-thaw transitions for each element of a
+    gridded daily temperature series. This is equivalent to applying
+    :func:`freezethaw1d` along the time axis, but all series are processed
+    at once.
+
+    Parameters
+    ----------
+    x : ndarray
+      The daily temperature series (C) with time as the leading dimension
+      (i.e. ``(time, row, column)``). Masked values are compressed.
+    threshold : float
+      The threshold in degree-days above or below the freezing point at
+      which we consider the soil thawed or frozen.
+
+    Returns
+    -------
+    out : ndarray
+      The number of times the medium thawed or froze with dimensions
+      ``x.shape[1:]``. Series with all values masked are ``NaN``.
+    """
+
+    shape = x.shape[1:]
+    ntime = x.shape[0]
+    data = np.ma.getdata(x).reshape(ntime, -1).T
+    mask = np.ma.getmaskarray(x).reshape(ntime, -1).T
+
+    out = np.empty(data.shape[0], dtype=float)
+    # Limit the size of the cumulative degree-day arrays.
+    chunk_size = max(constants.CALC_MAX_CHUNK_ELEMENTS // (ntime + 1), 1)
+    for start in range(0, data.shape[0], chunk_size):
+        stop = start + chunk_size
+        out[start:stop] = _get_freezethaw_count_(data[start:stop], mask[start:stop], threshold)
+    return out.reshape(shape)
+
+
+def _get_freezethaw_count_(data, mask, threshold):
+    # Vectorized implementation of "freezethaw1d" for series along the rows of the two-dimensional "data" array.
+    ncells, ntime = data.shape
+    cells = np.arange(ncells)
+
+    # Compress masked values by moving the unmasked values to the front of each series while maintaining their order.
+    if mask.any():
+        order = np.argsort(mask, axis=1, kind='mergesort')
+        data = data[cells[:, None], order]
+    size = ntime - mask.sum(axis=1)
+
+    # Prepend a zero to each series. Positions after the last unmasked value are zero so the cumulative degree days
+    # remain constant.
+    x = np.zeros((ncells, ntime + 1), dtype=np.result_type(data.dtype, int))
+    x[:, 1:] = data
+    valid = np.arange(ntime + 1) <= size[:, None]
+    x[np.invert(valid)] = 0
+    cx = np.cumsum(x, axis=1)
+
+    # Find the places where the temperature crosses the freezing point. The first position is always a crossing.
+    over = x >= 0
+    cross = np.zeros(x.shape, dtype=bool)
+    cross[:, :-1] = np.logical_and(over[:, :-1] != over[:, 1:], valid[:, 1:])
+    cross[:, 0] = True
+    cross_cell, cross_index = np.nonzero(cross)
+
+    # For each crossing, find the first place where the threshold is exceeded (from above or below) by the cumulative
+    # sum starting from the crossing. Crossings are searched in windows of increasing width until the threshold is
+    # exceeded or the end of the series is reached. Most crossings are resolved within a few positions.
+    exceed_index = np.zeros(cross_index.shape[0], dtype=int) - 1
+    exceed_sign = np.zeros(cross_index.shape[0], dtype=cx.dtype)
+    # Work with flat indices into the cumulative degree days.
+    cx = cx.reshape(-1)
+    row_start = cross_cell * (ntime + 1)
+    base = cx[row_start + cross_index]
+    stop = row_start + size[cross_cell]
+    active = np.arange(cross_index.shape[0])
+    position = row_start + cross_index
+    width = 1
+    while active.shape[0] > 0:
+        window = np.minimum(position[:, None] + np.arange(width), stop[active][:, None])
+        d = cx[window] - base[active][:, None]
+        hit = np.abs(d) >= threshold
+        found = hit.any(axis=1)
+        first = hit[found].argmax(axis=1)
+        exceed_index[active[found]] = window[found, first] - row_start[active[found]]
+        exceed_sign[active[found]] = np.sign(d[found, first])
+        keep = np.logical_and(np.invert(found), position + width <= stop[active])
+        active = active[keep]
+        position = position[keep] + width
+        width = min(width * 2, _FREEZETHAW_MAX_WINDOW)
+
+    # Scan the crossings in order. An event is stored if the crossing occurs after the last event and its threshold
+    # exceedance differs from the last event.
+    ncross = np.bincount(cross_cell, minlength=ncells)
+    offsets = np.cumsum(ncross) - ncross
+    last_index = np.zeros(ncells, dtype=int)
+    last_sign = np.zeros(ncells, dtype=exceed_sign.dtype)
+    nevents = np.zeros(ncells, dtype=int)
+    for ii in range(ncross.max()):
+        select = cells[ncross > ii]
+        idx = offsets[select] + ii
+        is_event = cross_index[idx] >= last_index[select]
+        is_event = np.logical_and(is_event, exceed_index[idx] >= 0)
+        is_event = np.logical_and(is_event, exceed_sign[idx] != last_sign[select])
+        select = select[is_event]
+        idx = idx[is_event]
+        last_index[select] = exceed_index[idx]
+        last_sign[select] = exceed_sign[idx]
+        nevents[select] += 1
+
+    # The first event sets the initial state and is not a transition.
+    ret = (nevents - 1).astype(float)
+    ret[size == 0] = np.nan
+    return ret
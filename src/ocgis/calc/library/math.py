@@ -40,6 +40,9 @@ class Sum(base.AbstractUnivariateSetFunction):
     def calculate(self, values):
         return np.ma.sum(values, axis=0)
 
+    def calculate_grouped(self, grouped):
+        return grouped.sum()
+
     def aggregate_spatial(self, values, weights):
         # All element values contribute in their entirety. Weights are not applied.
         return np.ma.sum(values)
@@ -1,11 +1,14 @@
 import calendar
 import itertools
-from collections import OrderedDict, defaultdict
+from collections import defaultdict
 from datetime import datetime
 
 import numpy as np
+from ocgis import constants
+from ocgis.base import AbstractOcgisObject
 from ocgis.calc import base
 from ocgis.calc.base import AbstractUnivariateFunction, AbstractParameterizedFunction
+from ocgis.calc.kernels import get_nanpercentile
 from ocgis.exc import DefinitionValidationError
 
 
@@ -53,21 +56,23 @@ class MovingWindow(AbstractUnivariateFunction, AbstractParameterizedFunction):
         for ie, il in itertools.product(*itrs):
             values_slice = values[ie, :, il, :, :]
             build = True
-            for origin, values_kernel in self._iter_kernel_values_(values_slice, k, mode=mode):
+            for origin, values_windows in self._iter_window_values_(values_slice, k, mode=mode):
                 if build:
                     # if only the valid region is returned, this index will determine where the start index for the
                     # field/fill slice is
-                    idx_start = origin
+                    idx_start = origin.start
                     build = False
-                fill[ie, origin, il, :, :] = operation(values_kernel, axis=0)
+                idx_stop = origin.stop
+                # windows are stacked along the second dimension
+                fill[ie, origin, il, :, :] = operation(values_windows, axis=1)
 
         if mode == 'valid':
             # slice the field and fill arrays
-            # self.field = self.field[:, idx_start:origin + 1, :, :, :]
+            # self.field = self.field[:, idx_start:idx_stop, :, :, :]
             # Mask the invalid regions.
             fill.mask[:] = True
-            fill.mask[:, idx_start:origin + 1, :, :, :] = False
-            # self._finalize_slice = [slice(None), slice(idx_start, origin + 1), slice(None), slice(None), slice(None)]
+            fill.mask[:, idx_start:idx_stop, :, :, :] = False
+            # self._finalize_slice = [slice(None), slice(idx_start, idx_stop), slice(None), slice(None), slice(None)]
         elif mode == 'same':
             pass
         else:
@@ -82,8 +87,8 @@ class MovingWindow(AbstractUnivariateFunction, AbstractParameterizedFunction):
             msg = 'Moving window calculations may not have a temporal grouping.'
             raise DefinitionValidationError(CalcGrouping, msg)
 
-    @staticmethod
-    def _iter_kernel_values_(values, k, mode='valid'):
+    @classmethod
+    def _iter_kernel_values_(cls, values, k, mode='valid'):
         """
         :param values: The three-dimensional array from which to extract window values.
         :type values: :class:`numpy.core.multiarray.ndarray` axes = (time, row, column)
@@ -94,45 +99,61 @@ class MovingWindow(AbstractUnivariateFunction, AbstractParameterizedFunction):
         :raises: AssertionError, NotImplementedError
         """
 
+        for origin, values_windows in cls._iter_window_values_(values, k, mode=mode):
+            for idx, origin_idx in enumerate(range(origin.start, origin.stop)):
+                yield origin_idx, values_windows[idx]
+
+    @staticmethod
+    def _iter_window_values_(values, k, mode='valid'):
+        """
+        Yield window values for consecutive time steps. Windows with a full overlap are returned as read-only strided
+        views of ``values`` in chunks bounded by :attr:`ocgis.constants.CALC_MAX_CHUNK_ELEMENTS`. Windows without a full
+        overlap (``same`` mode only) are returned individually.
+
+        :param values: The three-dimensional array from which to extract window values.
+        :type values: :class:`numpy.core.multiarray.ndarray` axes = (time, row, column)
+        :param int k: The width of window. Must be odd and greater than 3.
+        :param str mode: If ``valid``, return only values with a full window overlap. If ``same``, return all values
+         regardless of window overlap.
+        :returns: tuple(slice, :class:`numpy.core.multiarray.ndarray`) The slice contains the time indices for the
+         centered windows. The window values have axes = (time, window, row, column).
+        :raises: AssertionError, NotImplementedError
+        """
+
         assert k % 2 != 0
         assert k >= 3
         assert values.ndim == 3
+        if mode not in ('same', 'valid'):
+            raise NotImplementedError(mode)
 
-        # used to track the current value for the centered window.
-        origin = 0
         # size of one side of the window used to determine the slice for the kernel
         shift = int((k - 1) / 2)
         # reference for the length of the value array
         shape_values = values.shape[0]
-
-        # will return only values with a full window overlap
-        if mode == 'valid':
-            while True:
-                start = origin - shift
-                # skip slices without a full window
-                if start < 0:
-                    origin += 1
-                    continue
-                stop = origin + shift + 1
-                # if the end index is greater than the length of the value array end iteration
-                if stop > shape_values:
-                    return
-                yield origin, values[start:stop, :, :]
-                origin += 1
-        elif mode == 'same':
-            while True:
-                start = origin - shift
+        # time indices with a full window overlap
+        full_start = shift
+        full_stop = max(shape_values - shift, full_start)
+
+        def _get_partial_(origins):
+            # return values regardless of window overlap. always start at the beginning of the array
+            for origin in origins:
+                start = max(origin - shift, 0)
                 stop = origin + shift + 1
-                # return values regardless of window overlap. always start at the beginning of the array
-                if start < 0:
-                    start = 0
-                yield origin, values[start:stop, :, :]
-                origin += 1
-                # stop when we've used the last array value
-                if origin == shape_values:
-                    return
-        else:
-            raise NotImplementedError(mode)
+                yield slice(origin, origin + 1), values[start:stop, :, :][np.newaxis]
+
+        if mode == 'same':
+            for yld in _get_partial_(range(min(full_start, shape_values))):
+                yield yld
+
+        chunk_size = max(constants.CALC_MAX_CHUNK_ELEMENTS // (k * max(int(np.prod(values.shape[1:])), 1)), 1)
+        for origin_start in range(full_start, full_stop, chunk_size):
+            origin_stop = min(origin_start + chunk_size, full_stop)
+            yield slice(origin_start, origin_stop), _get_window_view_(values, origin_start - shift,
+                                                                      origin_stop - origin_start, k)
+
+        if mode == 'same':
+            for yld in _get_partial_(range(max(full_stop, full_start), shape_values)):
+                yield yld
 
 
 class DailyPercentile(base.AbstractUnivariateFunction, base.AbstractParameterizedFunction):
@@ -157,17 +178,16 @@ class DailyPercentile(base.AbstractUnivariateFunction, base.AbstractParameterize
         assert (values.shape[2] == 1)
         arr = values[0, :, 0, :, :]
         assert (arr.ndim == 3)
-        dt_arr = self.field.temporal.value_datetime
-        dp = self.get_daily_percentile(arr, dt_arr, percentile, window_width, only_leap_years=only_leap_years)
+        date_parts = self.field.temporal.get_date_parts()
+        dp = self.get_daily_percentile(arr, date_parts, percentile, window_width, only_leap_years=only_leap_years)
         shape_fill = list(values.shape)
         shape_fill[1] = len(dp)
         fill = np.zeros(shape_fill, dtype=self.dtype)
         fill = np.ma.array(fill, mask=False)
-        month_day_map = {(dt.month, dt.day): ii for ii, dt in enumerate(self.tgd.value_datetime)}
-        for key, value in dp.items():
-            fill[0, month_day_map[key], 0, :, :] = value
-        for idx in range(fill.shape[1]):
-            fill.mask[0, idx, 0, :, :] = values.mask[0, 0, 0, :, :]
+        # Map the calendar days of the temporal group to positions in the percentile basis.
+        basis_index = [dp.get_index((dt['month'], dt['day'])) for dt in self.tgd.date_parts]
+        fill.data[0, :, 0, :, :] = dp.value[basis_index]
+        fill.mask[0, :, 0, :, :] = values.mask[0, 0, 0, :, :]
         return fill
 
     @staticmethod
@@ -184,12 +204,17 @@ class DailyPercentile(base.AbstractUnivariateFunction, base.AbstractParameterize
 
     def get_daily_percentile(self, arr, dt_arr, percentile, window_width, only_leap_years=False):
         """
-        Creates a dictionary with keys=calendar day (month,day) and values=numpy.ndarray (2D)
+        Creates a percentile basis with keys=calendar day (month,day) and values=numpy.ndarray (2D)
         Example - to get the 2D percentile array corresponding to the 15th May: percentile_dict[5,15]
 
+        The window members for all calendar days are found with a single vectorized pass over the time steps. Samples
+        are then gathered for chunks of calendar days and reduced with
+        :func:`~ocgis.calc.kernels.get_nanpercentile`. Masked values are excluded from the percentile computation.
+
         :param arr: array of values
         :type arr: :class:`numpy.ndarray` (3D) of float
-        :param dt_arr: Corresponding time steps vector (base period: usually 1961-1990).
+        :param dt_arr: Corresponding time steps vector (base period: usually 1961-1990). This may also be an integer
+         date part array as returned by :meth:`~ocgis.TemporalVariable.get_date_parts`.
         :type dt_arr: :class:`numpy.ndarray` (1D) of :class:`datetime.datetime` objects
         :param percentile: Percentile to compute which must be between 0 and 100 inclusive.
         :type percentile: int
@@ -197,7 +222,7 @@ class DailyPercentile(base.AbstractUnivariateFunction, base.AbstractParameterize
         :type window_width: int
         :param only_leap_years: Option for February 29th. If ``True``, use only leap years when computing the basis.
         :type only_leap_years: bool
-        :rtype: dict
+        :rtype: :class:`~ocgis.calc.library.statistics.DailyPercentileBasis`
         """
 
         # we reduce the number of dimensions
@@ -207,41 +232,38 @@ class DailyPercentile(base.AbstractUnivariateFunction, base.AbstractParameterize
             pass
         else:
             raise NotImplementedError(arr.ndim)
-        dt_arr = dt_arr.squeeze()
-
-        # step1: creation of the dictionary with all calendar days:
-        dic_caldays = self.get_dict_caldays(dt_arr)
-
-        percentile_dict = OrderedDict()
 
-        dt_hour = dt_arr[
-            0].hour  # (we get hour of a date only one time, because usually the hour is the same for all dates in input dt_arr)
-
-        for month in list(dic_caldays.keys()):
-            for day in dic_caldays[month]:
-                # step2: we do a mask for the datetime vector for current calendar day (day/month)
-                dt_arr_mask = self.get_mask_dt_arr(dt_arr, month, day, dt_hour, window_width, only_leap_years)
-
-                # step3: we are looking for the indices of non-masked dates (i.e. where dt_arr_mask==False)
-                indices_non_masked = np.where(dt_arr_mask == False)[0]
+        dt_arr = np.asarray(dt_arr)
+        if dt_arr.dtype == object:
+            date_parts = np.array([[dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second] for dt in dt_arr.flat])
+        else:
+            date_parts = dt_arr
 
-                # step4: we subset our arr
-                arr_subset = arr[indices_non_masked, :, :]
+        calendar_days, step_index, calendar_day_index = self.get_window_index(date_parts, window_width,
+                                                                              only_leap_years=only_leap_years)
 
-                # step5: we compute the percentile for current arr_subset
-                ############## WARNING: type(arr_subset) = numpy.ndarray. Numpy.percentile does not work with masked arrays,
-                ############## so if arr_subset has aberrant values like 999999 or 1e+20, the result will be wrong.
-                ############## Check with numpy.nanpercentile (Numpy version 1.9) !!!
-                arr_percentille_current_calday = np.percentile(arr_subset, percentile, axis=0)
+        # Masked values are converted to NaN and excluded from the percentile computation.
+        value = np.ma.filled(np.ma.asarray(arr).astype(float), np.nan)
 
-                # step6: we add to the dictionnary...
-                percentile_dict[month, day] = arr_percentille_current_calday
+        counts = np.bincount(calendar_day_index, minlength=calendar_days.shape[0])
+        offsets = np.zeros(counts.shape[0] + 1, dtype=int)
+        offsets[1:] = np.cumsum(counts)
+        rank = np.arange(step_index.shape[0]) - offsets[calendar_day_index]
 
-                # print 'Creating percentile dictionary: month ', month, '---> OK'
+        # Limit the size of the padded sample array by processing chunks of calendar days.
+        element_count = max(int(counts.max()) if counts.shape[0] > 0 else 0, 1) * int(np.prod(value.shape[1:]))
+        chunk_size = max(constants.CALC_MAX_CHUNK_ELEMENTS // max(element_count, 1), 1)
 
-        # print 'Percentile dictionary is created.'
+        basis = np.empty([calendar_days.shape[0]] + list(value.shape[1:]), dtype=float)
+        for start in range(0, calendar_days.shape[0], chunk_size):
+            stop = min(start + chunk_size, calendar_days.shape[0])
+            select = slice(offsets[start], offsets[stop])
+            samples = np.empty([stop - start, counts[start:stop].max()] + list(value.shape[1:]), dtype=float)
+            samples.fill(np.nan)
+            samples[calendar_day_index[select] - start, rank[select]] = value[step_index[select]]
+            basis[start:stop] = get_nanpercentile(samples, percentile, axis=1)
 
-        return percentile_dict
+        return DailyPercentileBasis(calendar_days, basis)
 
     @staticmethod
     def get_dict_caldays(dt_arr):
@@ -337,6 +359,71 @@ class DailyPercentile(base.AbstractUnivariateFunction, base.AbstractParameterize
         mask = np.array([self.get_masked(dt, month, day, dt_hour, window_width, only_leap_years) for dt in dt_arr])
         return mask
 
+    @staticmethod
+    def get_window_index(date_parts, window_width, only_leap_years=False):
+        """
+        Find the time steps in the window centered on each calendar day (month-day). Window membership is equivalent to
+        :meth:`~ocgis.calc.library.statistics.DailyPercentile.get_masked` but computed for all time steps and calendar
+        days at once using day counts in the proleptic Gregorian calendar.
+
+        :param date_parts: Integer date part array with shape ``(n, 6)`` as returned by
+         :meth:`~ocgis.TemporalVariable.get_date_parts`.
+        :type date_parts: :class:`numpy.ndarray`
+        :param window_width: Window width - must be odd.
+        :type window_width: int
+        :param only_leap_years: Option for February 29th. If ``True``, use only leap years when constructing the basis.
+        :type only_leap_years: bool
+        :returns: A tuple with three elements. The first is an integer array with shape ``(m, 2)`` containing the sorted
+         unique calendar days ``(month, day)``. The second and third are integer vectors with equal length containing
+         the time step index and calendar day index for each window member. Members are sorted by calendar day.
+        :rtype: tuple
+        """
+
+        date_parts = np.asarray(date_parts)
+        years, months, days = date_parts[:, 0], date_parts[:, 1], date_parts[:, 2]
+        half_width = window_width // 2
+        day_seconds = 86400
+
+        # Days since 1970-01-01 for each time step.
+        day_count = _get_day_count_(years, months, days)
+        seconds = day_count * day_seconds + date_parts[:, 3] * 3600 + date_parts[:, 4] * 60 + date_parts[:, 5]
+        # Window centers use the hour of the first time step.
+        center_seconds = date_parts[0, 3] * 3600
+
+        calendar_days = np.unique(date_parts[:, 1:3], axis=0)
+        calendar_day_lookup = np.empty((13, 32), dtype=int)
+        calendar_day_lookup.fill(-1)
+        calendar_day_lookup[calendar_days[:, 0], calendar_days[:, 1]] = np.arange(calendar_days.shape[0])
+
+        # Candidate window centers are the days surrounding each time step. A time step is a member if it is less than
+        # "half_width + 1" days from the center.
+        center_day_count = day_count.reshape(-1, 1) + np.arange(-half_width - 1, half_width + 2)
+        is_member = np.abs(seconds.reshape(-1, 1) - (center_day_count * day_seconds + center_seconds)) < \
+                    (half_width + 1) * day_seconds
+        center_datetime = center_day_count.astype('datetime64[D]')
+        center_month_start = center_datetime.astype('datetime64[M]')
+        center_month = center_month_start.astype(int) % 12 + 1
+        center_day = (center_datetime - center_month_start.astype('datetime64[D]')).astype(int) + 1
+        center_index = calendar_day_lookup[center_month, center_day]
+        is_member = np.logical_and(is_member, center_index >= 0)
+        step_index = np.nonzero(is_member)[0]
+        calendar_day_index = center_index[is_member]
+
+        # February 29th centers only exist in leap years. In other years, the window is anchored on February 28th.
+        idx_feb29 = calendar_day_lookup[2, 29]
+        if idx_feb29 >= 0 and not only_leap_years:
+            is_leap = np.logical_and(years % 4 == 0, np.logical_or(years % 100 != 0, years % 400 == 0))
+            feb28_seconds = _get_day_count_(years, 2, 28) * day_seconds + center_seconds
+            diff = (seconds - feb28_seconds) // day_seconds
+            is_feb29_member = np.logical_and(np.invert(is_leap),
+                                             np.logical_and(diff >= 1 - half_width, diff <= half_width))
+            feb29_step_index = np.nonzero(is_feb29_member)[0]
+            step_index = np.hstack((step_index, feb29_step_index))
+            calendar_day_index = np.hstack((calendar_day_index, np.ones_like(feb29_step_index) * idx_feb29))
+
+        order = np.argsort(calendar_day_index, kind='mergesort')
+        return calendar_days, step_index[order], calendar_day_index[order]
+
     @staticmethod
     def get_year_list(dt_arr):
         """
@@ -352,6 +439,61 @@ class DailyPercentile(base.AbstractUnivariateFunction, base.AbstractParameterize
         return year_list
 
 
+class DailyPercentileBasis(AbstractOcgisObject):
+    """
+    Array-backed daily percentile basis returned by
+    :meth:`~ocgis.calc.library.statistics.DailyPercentile.get_daily_percentile`. Supports read-only dictionary access
+    using calendar day keys:
+
+    >>> basis[5, 15]
+
+    :param calendar_days: Integer array with shape ``(m, 2)`` containing the calendar days ``(month, day)``.
+    :type calendar_days: :class:`numpy.ndarray`
+    :param value: The percentile basis with the calendar day as the leading dimension.
+    :type value: :class:`numpy.ndarray`
+    """
+
+    def __init__(self, calendar_days, value):
+        assert len(calendar_days) == value.shape[0]
+
+        self.calendar_days = [(int(month), int(day)) for month, day in calendar_days]
+        self.value = value
+        self._index = {key: idx for idx, key in enumerate(self.calendar_days)}
+
+    def __contains__(self, key):
+        return tuple(key) in self._index
+
+    def __getitem__(self, key):
+        return self.value[self.get_index(key)]
+
+    def __iter__(self):
+        for key in self.calendar_days:
+            yield key
+
+    def __len__(self):
+        return len(self.calendar_days)
+
+    def get_index(self, key):
+        """
+        :param tuple key: The calendar day ``(month, day)``.
+        :returns: The index of the calendar day along the leading dimension of :attr:`value`.
+        :rtype: int
+        :raises: KeyError
+        """
+        return self._index[(int(key[0]), int(key[1]))]
+
+    def items(self):
+        for key in self.calendar_days:
+            yield key, self[key]
+
+    def keys(self):
+        return list(self.calendar_days)
+
+    def values(self):
+        for key in self.calendar_days:
+            yield self[key]
+
+
 class FrequencyPercentile(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFunction):
     key = 'freq_perc'
     parms_definition = {'percentile': float}
@@ -374,6 +516,7 @@ class FrequencyPercentile(base.AbstractUnivariateSetFunction, base.AbstractParam
 class Max(base.AbstractUnivariateSetFunction):
     description = 'Max value for the series.'
     key = 'max'
+    fusable = True
 
     standard_name = 'max'
     long_name = 'max'
@@ -381,10 +524,14 @@ class Max(base.AbstractUnivariateSetFunction):
     def calculate(self, values):
         return np.ma.max(values, axis=0)
 
+    def calculate_grouped(self, grouped):
+        return grouped.max()
+
 
 class Min(base.AbstractUnivariateSetFunction):
     description = 'Min value for the series.'
     key = 'min'
+    fusable = True
 
     standard_name = 'min'
     long_name = 'Min'
@@ -392,16 +539,23 @@ class Min(base.AbstractUnivariateSetFunction):
     def calculate(self, values):
         return np.ma.min(values, axis=0)
 
+    def calculate_grouped(self, grouped):
+        return grouped.min()
+
 
 class Mean(base.AbstractUnivariateSetFunction):
     description = 'Compute mean value of the set.'
     key = 'mean'
     standard_name = 'mean'
     long_name = 'Mean'
+    fusable = True
 
     def calculate(self, values):
         return np.ma.mean(values, axis=0)
 
+    def calculate_grouped(self, grouped):
+        return grouped.mean()
+
 
 class Median(base.AbstractUnivariateSetFunction):
     description = 'Compute median value of the set.'
@@ -413,13 +567,45 @@ class Median(base.AbstractUnivariateSetFunction):
     def calculate(self, values):
         return np.ma.median(values, axis=0)
 
+    def calculate_grouped(self, grouped):
+        return grouped.median()
+
 
 class StandardDeviation(base.AbstractUnivariateSetFunction):
     description = 'Compute standard deviation of the set.'
     key = 'std'
+    fusable = True
 
     standard_name = 'standard_deviation'
     long_name = 'Standard Deviation'
 
     def calculate(self, values):
         return np.ma.std(values, axis=0)
+
+    def calculate_grouped(self, grouped):
+        return grouped.std()
+
+
+def _get_day_count_(year, month, day):
+    # Number of days since 1970-01-01 in the proleptic Gregorian calendar (consistent with "datetime" arithmetic).
+    month_count = (np.asarray(year) - 1970) * 12 + np.asarray(month) - 1
+    return month_count.astype('datetime64[M]').astype('datetime64[D]').astype(int) + np.asarray(day) - 1
+
+
+def _get_window_view_(arr, start, count, k):
+    # Read-only view of "count" windows of width "k" along the first dimension of "arr" beginning at index "start". The
+    # window dimension is inserted after the first dimension.
+    def _as_strided_(target):
+        target = target[start:]
+        shape = (count, k) + target.shape[1:]
+        strides = (target.strides[0],) + target.strides
+        return np.lib.stride_tricks.as_strided(target, shape=shape, strides=strides, writeable=False)
+
+    if isinstance(arr, np.ma.MaskedArray):
+        mask = arr.mask
+        if mask is not np.ma.nomask:
+            mask = _as_strided_(mask)
+        ret = np.ma.array(_as_strided_(arr.data), mask=mask)
+    else:
+        ret = _as_strided_(arr)
+    return ret
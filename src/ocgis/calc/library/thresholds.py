@@ -23,6 +23,11 @@ class Between(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFunc
         idx = (values >= float(lower)) * (values <= float(upper))
         return np.ma.sum(idx, axis=0)
 
+    def calculate_grouped(self, grouped, lower=None, upper=None):
+        assert (lower <= upper)
+        idx = (grouped.data >= float(lower)) * (grouped.data <= float(upper))
+        return grouped.count(where=idx)
+
 
 class Threshold(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFunction):
     description = 'Count of values where the logical operation returns TRUE.'
@@ -41,6 +46,19 @@ class Threshold(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFu
         :type operation: str
         """
 
+        idx = self._get_threshold_index_(values, threshold, operation)
+        ret = np.ma.sum(idx, axis=0)
+        return ret
+
+    def calculate_grouped(self, grouped, threshold=None, operation=None):
+        idx = self._get_threshold_index_(grouped.data, threshold, operation)
+        return grouped.count(where=idx)
+
+    def _aggregate_spatial_(self, values, weights):
+        return np.ma.sum(values)
+
+    @staticmethod
+    def _get_threshold_index_(values, threshold, operation):
         # perform requested logical operation
         if operation == 'gt':
             idx = values > threshold
@@ -52,9 +70,4 @@ class Threshold(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFu
             idx = values <= threshold
         else:
             raise NotImplementedError
-
-        ret = np.ma.sum(idx, axis=0)
-        return ret
-
-    def _aggregate_spatial_(self, values, weights):
-        return np.ma.sum(values)
+        return idx
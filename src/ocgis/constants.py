@@ -103,6 +103,28 @@ class OutputFormatName(object):
     OCGIS = 'ocgis'
 
 
+class CalcExecutorName(object):
+    """Executors for calculation tasks. See :attr:`ocgis.env.CALC_EXECUTOR`."""
+
+    #: Execute calculations sequentially in the current process.
+    SERIAL = 'serial'
+    #: Execute calculations with a thread pool. Appropriate for calculations dominated by NumPy kernels that release
+    #: the global interpreter lock.
+    THREAD = 'thread'
+    #: Execute calculations with a process pool. Appropriate for pure Python calculations. Fields and calculation
+    #: outputs must be picklable.
+    PROCESS = 'process'
+
+
+class SpatialIndexBackend(object):
+    """Spatial index implementations. See :attr:`ocgis.env.USE_SPATIAL_INDEX`."""
+
+    #: An :mod:`rtree` index stream loaded from geometry bounds.
+    RTREE = 'rtree'
+    #: A :class:`shapely.STRtree` with vectorized predicates. Requires Shapely 2.0 or later.
+    STRTREE = 'strtree'
+
+
 #: These output formats are considered vector output formats affected by operations manipulation vector GIS data. For
 #: example, vector GIS outputs are always wrapped to -180 to 180 if there is a spherical coordinate system.
 VECTOR_OUTPUT_FORMATS = [OutputFormatName.GEOJSON, OutputFormatName.SHAPEFILE, OutputFormatName.CSV_SHAPEFILE]
@@ -116,6 +138,9 @@ CALC_MONTH_CENTROID = 16
 CALC_YEAR_CENTROID_MONTH = 7
 #: The default day value for year centroids.
 CALC_YEAR_CENTROID_DAY = 1
+#: The maximum number of elements in intermediate arrays created by vectorized calculations. Larger computations are
+#: processed in chunks.
+CALC_MAX_CHUNK_ELEMENTS = 2 ** 24
 
 #: The number of values to use when calculating data resolution.
 RESOLUTION_LIMIT = 100
@@ -69,7 +69,20 @@ class Environment(AbstractOcgisObject):
         self.ENABLE_FILE_LOGGING = EnvParm('ENABLE_FILE_LOGGING', False, formatter=self._format_bool_)
         self.DEBUG = EnvParm('DEBUG', False, formatter=self._format_bool_)
         self.DIR_BIN = EnvParm('DIR_BIN', None)
-        self.USE_SPATIAL_INDEX = EnvParmImport('USE_SPATIAL_INDEX', None, 'rtree')
+        self.USE_SPATIAL_INDEX = EnvParmImport('USE_SPATIAL_INDEX', None, 'rtree',
+                                               formatter=self._format_spatial_index_)
+        # The maximum size in bytes of the process-level GeomCabinet record cache. If None, records are not cached.
+        self.GEOMCABINET_CACHE_MAX_SIZE = EnvParm('GEOMCABINET_CACHE_MAX_SIZE', None, formatter=int)
+        # If not None, persist "rtree" spatial indexes for geometry variables read from files in this directory. Used
+        # when USE_SPATIAL_INDEX is True or "rtree".
+        self.DIR_SPATIAL_INDEX_CACHE = EnvParm('DIR_SPATIAL_INDEX_CACHE', None)
+        # The maximum size in bytes and age in seconds of spatial index cache entries. If None, there is no limit.
+        self.SPATIAL_INDEX_CACHE_MAX_SIZE = EnvParm('SPATIAL_INDEX_CACHE_MAX_SIZE', None, formatter=int)
+        self.SPATIAL_INDEX_CACHE_MAX_AGE = EnvParm('SPATIAL_INDEX_CACHE_MAX_AGE', None, formatter=float)
+        # The maximum size in bytes of the process-level overlap weights cache. If None, weights are not cached.
+        self.OVERLAP_WEIGHTS_CACHE_MAX_SIZE = EnvParm('OVERLAP_WEIGHTS_CACHE_MAX_SIZE', None, formatter=int)
+        # The maximum number of entries in the process-level cache of parsed coordinate systems and transformers.
+        self.CRS_CACHE_MAX_SIZE = EnvParm('CRS_CACHE_MAX_SIZE', 256, formatter=int)
         self.USE_CFUNITS = EnvParmImport('USE_CFUNITS', None, ('cf_units', 'cfunits'))
         self.USE_ESMF = EnvParmImport('USE_ESMF', None, 'ESMF')
         self.USE_ICCLIM = EnvParmImport('USE_ICCLIM', None, 'icclim')
@@ -95,6 +108,12 @@ class Environment(AbstractOcgisObject):
         self.COORDSYS_ACTUAL = EnvParm('COORDSYS_ACTUAL', None)
         # The maximum string length to use when creating NetCDF string variables.
         self.STRING_MAX_LENGTH = EnvParm('STRING_MAX_LENGTH', 255)
+        # The executor used to run calculation tasks. See ocgis.constants.CalcExecutorName.
+        self.CALC_EXECUTOR = EnvParm('CALC_EXECUTOR', constants.CalcExecutorName.SERIAL, formatter=str)
+        # The number of workers for parallel calculation executors. If None, use the number of CPUs.
+        self.CALC_EXECUTOR_WORKERS = EnvParm('CALC_EXECUTOR_WORKERS', None, formatter=int)
+        # If True, compute statistics for fusable set functions on a field in a single pass.
+        self.CALC_FUSE_STATISTICS = EnvParm('CALC_FUSE_STATISTICS', False, formatter=self._format_bool_)
 
         if self.PREFER_NETCDFTIME is None:
             self.PREFER_NETCDFTIME = get_netcdftime_preference()
@@ -192,6 +211,20 @@ class Environment(AbstractOcgisObject):
 
         return format_bool(value)
 
+    @staticmethod
+    def _format_spatial_index_(value):
+        """
+        Format a string to a spatial index backend name or boolean.
+
+        :param str value: The value to convert.
+        """
+
+        if value.lower() in (constants.SpatialIndexBackend.RTREE, constants.SpatialIndexBackend.STRTREE):
+            ret = value.lower()
+        else:
+            ret = Environment._format_bool_(value)
+        return ret
+
     def _get_property_dtype_(self, name_private, name_dtype):
         attr_value = getattr(self, name_private)
         if attr_value is None:
@@ -240,9 +273,9 @@ class EnvParm(object):
 
 
 class EnvParmImport(EnvParm):
-    def __init__(self, name, default, module_names):
+    def __init__(self, name, default, module_names, formatter=None):
         self.module_names = module_names
-        super(EnvParmImport, self).__init__(name, default)
+        super(EnvParmImport, self).__init__(name, default, formatter=formatter)
 
     @property
     def value(self):
@@ -253,6 +286,8 @@ class EnvParmImport(EnvParm):
                     ret = self._get_module_available_()
                 else:
                     ret = self.default
+            elif self.formatter is not None:
+                ret = self.formatter(ret)
             else:
                 ret = Environment._format_bool_(ret)
         else:
@@ -115,6 +115,9 @@ class OcgOperations(AbstractOcgisObject):
      coordinate systems.
     :param bool optimized_bbox_subset: If ``True``, only perform the bounding box subset ignoring other subsetting
      procedures such as spatial operations on geometry objects using a spatial index.
+    :param bool sparse_aggregate: If ``True``, spatially average the data for all selection geometries at once using a
+     sparse matrix of cell and selection geometry overlap areas. Data is read once for all selection geometries.
+     Requires ``aggregate=True`` and ``spatial_operation='clip'``. The aggregated geometry is the selection geometry.
     """
 
     def __init__(self, dataset=None, spatial_operation='intersects', geom=None, geom_select_sql_where=None,
@@ -126,7 +129,8 @@ class OcgOperations(AbstractOcgisObject):
                  add_auxiliary_files=True, optimizations=None, callback=None, time_range=None, time_region=None,
                  time_subset_func=None, level_range=None, conform_units_to=None, select_nearest=False,
                  regrid_destination=None, regrid_options=None, melted=False, output_format_options=None,
-                 spatial_wrapping=None, spatial_reorder=False, optimized_bbox_subset=False):
+                 spatial_wrapping=None, spatial_reorder=False, optimized_bbox_subset=False,
+                 sparse_aggregate=False):
 
         # Tells "__setattr__" to not perform global validation until all values are initially set.
         self._is_init = True
@@ -175,6 +179,7 @@ class OcgOperations(AbstractOcgisObject):
         self.melted = Melted(init_value=env.MELTED or melted)
         self.spatial_wrapping = SpatialWrapping(spatial_wrapping)
         self.spatial_reorder = SpatialReorder(spatial_reorder)
+        self.sparse_aggregate = SparseAggregate(sparse_aggregate)
 
         # These values are left in to perhaps be added back in at a later date.
         self.output_grouping = None
@@ -414,3 +419,16 @@ class OcgOperations(AbstractOcgisObject):
             else:
                 for c in self.calc:
                     c['ref'].validate(self)
+
+        # Sparse aggregation computes area-weighted averages of the clipped cells for each selection geometry.
+        if self.sparse_aggregate:
+            if not self.aggregate or self.spatial_operation != 'clip':
+                _raise_('Sparse aggregation requires "aggregate=True" and a "clip" spatial operation.',
+                        obj=SparseAggregate)
+            if self.calc is not None and self.calc_raw:
+                _raise_('Sparse aggregation is not compatible with raw calculations.', obj=SparseAggregate)
+            if self.regrid_destination is not None or self.select_nearest:
+                _raise_('Sparse aggregation is not compatible with regridding or nearest selection.',
+                        obj=SparseAggregate)
+            if vm.size > 1:
+                _raise_('Sparse aggregation is not supported in parallel.', obj=SparseAggregate)
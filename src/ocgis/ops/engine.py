@@ -1,6 +1,10 @@
 import logging
+from collections import OrderedDict
 from copy import deepcopy
 
+import numpy as np
+from shapely.geometry import box
+
 from ocgis import env, constants
 from ocgis import vm
 from ocgis.base import raise_if_empty, AbstractOcgisObject
@@ -10,11 +14,13 @@ from ocgis.collection.spatial import SpatialCollection
 from ocgis.constants import WrappedState, HeaderName, WrapAction, SubcommName, KeywordArgument
 from ocgis.exc import ExtentError, EmptySubsetError, BoundsAlreadyAvailableError, SubcommNotFoundError, \
     NoDataVariablesFound, WrappedStateEvalTargetMissing
-from ocgis.spatial.spatial_subset import SpatialSubsetOperation
+from ocgis.spatial.spatial_subset import SpatialSubsetOperation, PreparedGeometryCache
+from ocgis.spatial.weights import get_overlap_weights
 from ocgis.util.helpers import get_default_or_apply
 from ocgis.util.logging_ocgis import ocgis_lh, ProgressOcgOperations
 from ocgis.variable.base import create_typed_variable_from_data_model
 from ocgis.variable.crs import CFRotatedPole, Spherical, WGS84
+from ocgis.variable.dimension import Dimension
 
 
 class OperationsEngine(AbstractOcgisObject):
@@ -36,6 +42,9 @@ class OperationsEngine(AbstractOcgisObject):
         self._progress = progress or ProgressOcgOperations()
         self._original_subcomm = deepcopy(vm.current_comm_name)
         self._backtransform = {}
+        # Selection geometries prepared for subsetting are shared by request datasets. Created when there are multiple
+        # datasets to process.
+        self._geometry_cache = None
 
         # Create the calculation engine is calculations are present.
         if self.ops.calc is None or self._request_base_size_only:
@@ -83,6 +92,10 @@ class OperationsEngine(AbstractOcgisObject):
         else:
             itr_rd = [[rd] for rd in self.ops.dataset]
 
+        # Selection geometries are transformed and prepared once if they are used to subset multiple datasets.
+        if len(itr_rd) > 1:
+            self._geometry_cache = PreparedGeometryCache()
+
         # Configure the progress object.
         self._progress.n_subsettables = len(itr_rd)
         self._progress.n_geometries = get_default_or_apply(self.ops.geom, len, default=1)
@@ -275,7 +288,14 @@ class OperationsEngine(AbstractOcgisObject):
         else:
             itr = [None] if self.ops.geom is None else self.ops.geom
 
-        for coll in self._process_geometries_(itr, field, alias):
+        # Spatial averages for all selection geometries may be computed at once using sparse overlap weights.
+        if self.ops.sparse_aggregate and self.ops.slice is None and self.ops.geom is not None and not vm.is_null and \
+                not self._request_base_size_only:
+            process_geometries = self._process_geometries_sparse_
+        else:
+            process_geometries = self._process_geometries_
+
+        for coll in process_geometries(itr, field, alias):
             # Conform units following the spatial subset.
             if not vm.is_null and self.ops.conform_units_to is not None:
                 for to_conform in coll.iter_fields():
@@ -304,10 +324,6 @@ class OperationsEngine(AbstractOcgisObject):
             if vm.is_null:
                 sfield = field
             else:
-                # Always work with a copy of the subset geometry. This gets twisted in interesting ways depending on the
-                # subset target with wrapping, coordinate system conversion, etc.
-                subset_field = deepcopy(subset_field)
-
                 if self.ops.regrid_destination is not None:
                     # If there is regridding, make another copy as this geometry may be manipulated during subsetting of
                     # sources.
@@ -334,11 +350,9 @@ class OperationsEngine(AbstractOcgisObject):
                 ocgis_lh(msg=msg, logger=self._subset_log)
 
                 if subset_field is not None:
-                    # If the coordinate systems differ, update the spatial subset's CRS to match the field.
-                    if subset_field.crs is not None and subset_field.crs != field.crs:
-                        subset_field.update_crs(field.crs)
-                    # If the geometry is a point, it needs to be buffered if there is a search radius multiplier.
-                    subset_field = self._get_buffered_subset_geometry_if_point_(field, subset_field)
+                    # Always work with a copy of the subset geometry. This gets twisted in interesting ways depending
+                    # on the subset target with wrapping, coordinate system conversion, etc.
+                    subset_field = self._get_prepared_subset_field_(field, subset_field)
 
                 # If there is a selection geometry present, use it for the spatial subset. if not, all the field's data
                 # is being returned.
@@ -384,6 +398,112 @@ class OperationsEngine(AbstractOcgisObject):
 
             yield coll
 
+    def _process_geometries_sparse_(self, itr, field, alias):
+        """
+        Spatially average the target field for all selection geometries using a single sparse matrix of overlap
+        weights. The field's data variables are read once with the spatial subset limited to the bounding box of all
+        selection geometries.
+
+        :param itr: An iterator yielding :class:`~ocgis.Field` objects for subsetting.
+        :type itr: [:class:`~ocgis.Field`, ...]
+        :param :class:`ocgis.Field` field: The target field for operations.
+        :param str alias: The request data alias currently being processed.
+        :rtype: :class:`~ocgis.SpatialCollection`
+        """
+
+        assert isinstance(field, Field)
+
+        ocgis_lh('processing geometries with sparse overlap weights', self._subset_log, level=logging.DEBUG)
+        itr = list(itr)
+
+        key = constants.BackTransform.ROTATED_POLE
+        self._backtransform[key] = self._get_update_rotated_pole_state_(field, itr[0])
+        self._assert_abstraction_available_(field)
+        field = self._get_slice_or_snippet_(field)
+
+        # Prepare the selection geometries to match the field's coordinate system and wrapped state.
+        subset_fields = [self._get_prepared_subset_field_(field, subset_field) for subset_field in itr]
+        subset_ugids = [subset_field.geom.ugid.get_value()[0] for subset_field in subset_fields]
+        sso = SpatialSubsetOperation(field, geometry_cache=self._geometry_cache)
+        geometries = [sso._prepare_geometry_(subset_field.geom).get_value().flatten()[0]
+                      for subset_field in subset_fields]
+
+        sso._prepare_target_()
+        try:
+            sfield = self._get_sparse_aggregate_target_(alias, field, geometries)
+            if sfield.is_empty:
+                weights = None
+            else:
+                sfield.set_abstraction_geom()
+                weights = get_overlap_weights(sfield.geom, geometries, ugids=subset_ugids)
+        finally:
+            sso._finalize_target()
+
+        if weights is None:
+            averages = None
+            counts = np.zeros(len(geometries), dtype=int)
+        else:
+            ocgis_lh('applying overlap weights', self._subset_log, alias=alias, level=logging.DEBUG)
+            averages = OrderedDict()
+            for dv in sfield.data_variables:
+                averages[dv.name] = _get_sparse_averages_(dv, sfield.geom.dimension_names, weights)
+            counts = np.bincount(weights.columns, minlength=len(geometries))
+
+        for idx, subset_field in enumerate(subset_fields):
+            subset_ugid = subset_ugids[idx]
+            ocgis_lh(msg='Aggregating with selection geometry having UGID={0}'.format(subset_ugid),
+                     logger=self._subset_log)
+
+            if counts[idx] == 0:
+                msg = 'Selection geometry does not overlap the spatial domain of the target dataset.'
+                if self.ops.allow_empty:
+                    ocgis_lh(alias=alias, ugid=subset_ugid, msg=msg + ' Empty returns allowed.', level=logging.WARN)
+                    ret = Field(name=field.name, is_empty=True)
+                else:
+                    ocgis_lh(exc=ExtentError(message=msg), alias=alias, logger=self._subset_log)
+
+            # If the subset geometry is unwrapped and the vector wrap option is true, wrap the subset geometry.
+            if self.ops.vector_wrap and subset_field.wrapped_state == WrappedState.UNWRAPPED:
+                subset_field.wrap()
+
+            if counts[idx] > 0:
+                ret = _get_sparse_aggregated_field_(sfield, geometries[idx], averages, idx)
+                ret = _update_aggregation_wrapping_crs_(self, alias, ret, subset_field, subset_ugid, aggregated=True)
+
+            coll = self._get_initialized_collection_()
+            coll.add_field(ret, subset_field)
+            yield coll
+
+    def _get_sparse_aggregate_target_(self, alias, field, geometries):
+        """
+        Limit the target field to the buffered bounding box of the selection geometries.
+
+        :param str alias: The request data alias currently being processed.
+        :param field: The target field.
+        :type field: :class:`ocgis.Field`
+        :param geometries: The prepared selection geometries.
+        :type geometries: sequence of :class:`shapely.geometry.base.BaseGeometry`
+        :rtype: :class:`ocgis.Field`
+        :raises: ExtentError
+        """
+
+        if field.grid is None:
+            return field
+
+        bounds = np.array([geom.bounds for geom in geometries])
+        bbox = box(bounds[:, 0].min(), bounds[:, 1].min(), bounds[:, 2].max(), bounds[:, 3].max())
+        bbox = bbox.buffer(field.grid.resolution * 1.25).envelope
+        try:
+            ret = field.grid.get_intersects(bbox, optimized_bbox_subset=True).parent
+        except EmptySubsetError as e:
+            if self.ops.allow_empty:
+                ret = Field(name=field.name, is_empty=True)
+            else:
+                msg = ' This typically means the selection geometries fall outside the spatial domain of the target ' \
+                      'dataset.'
+                ocgis_lh(exc=ExtentError(message=str(e) + msg), alias=alias, logger=self._subset_log)
+        return ret
+
     def _get_nonspatial_subset_(self, field):
         """
         
@@ -488,7 +608,7 @@ class OperationsEngine(AbstractOcgisObject):
 
         ocgis_lh('executing spatial subset operation', self._subset_log, level=logging.DEBUG, alias=alias,
                  ugid=subset_ugid)
-        sso = SpatialSubsetOperation(field)
+        sso = SpatialSubsetOperation(field, geometry_cache=self._geometry_cache)
         try:
             # Execute the spatial subset and return the subsetted field.
             sfield = sso.get_spatial_subset(self.ops.spatial_operation, subset_field.geom,
@@ -512,6 +632,39 @@ class OperationsEngine(AbstractOcgisObject):
 
         return sfield
 
+    def _get_prepared_subset_field_(self, field, subset_field):
+        """
+        Return a copy of the selection field with its coordinate system matching ``field``. Point selection geometries
+        are buffered if there is a search radius multiplier. If the geometry cache is available, the prepared selection
+        field is reused by other datasets with the same coordinate system and buffer.
+
+        :param field:
+        :type field: :class:`ocgis.Field`
+        :param subset_field:
+        :type subset_field: :class:`ocgis.Field`
+        :rtype: :class:`ocgis.Field`
+        """
+
+        def _create_():
+            prepared = deepcopy(subset_field)
+            # If the coordinate systems differ, update the spatial subset's CRS to match the field.
+            if prepared.crs is not None and prepared.crs != field.crs:
+                prepared.update_crs(field.crs)
+            # If the geometry is a point, it needs to be buffered if there is a search radius multiplier.
+            return self._get_buffered_subset_geometry_if_point_(field, prepared)
+
+        if self._geometry_cache is None:
+            ret = _create_()
+        else:
+            if subset_field.geom.geom_type in ['Point', 'MultiPoint'] and self.ops.search_radius_mult is not None:
+                buffer_value = self.ops.search_radius_mult * field.grid.resolution
+            else:
+                buffer_value = None
+            prepared = self._geometry_cache.get(subset_field.geom, ('field', field.crs, buffer_value), _create_)
+            # The selection field is modified by later operations.
+            ret = deepcopy(prepared)
+        return ret
+
     def _get_buffered_subset_geometry_if_point_(self, field, subset_field):
         """
         If the subset geometry is a point of multipoint, it will need to be buffered and the spatial dimension updated
@@ -570,7 +723,7 @@ class OperationsEngine(AbstractOcgisObject):
                 ocgis_lh(msg=msg, logger=self._subset_log, level=logging.WARN)
 
 
-def _update_aggregation_wrapping_crs_(obj, alias, sfield, subset_sdim, subset_ugid):
+def _update_aggregation_wrapping_crs_(obj, alias, sfield, subset_sdim, subset_ugid, aggregated=False):
     raise_if_empty(sfield)
 
     ocgis_lh('entering _update_aggregation_wrapping_crs_', obj._subset_log, alias=alias,
@@ -581,26 +734,29 @@ def _update_aggregation_wrapping_crs_(obj, alias, sfield, subset_sdim, subset_ug
         ocgis_lh('aggregate requested in _update_aggregation_wrapping_crs_', obj._subset_log, alias=alias,
                  ugid=subset_ugid, level=logging.DEBUG)
 
-        # There may be no geometries if we are working with a gridded dataset. Load the geometries if this is the case.
-        sfield.set_abstraction_geom()
+        # Fields spatially averaged using sparse overlap weights are already aggregated.
+        if not aggregated:
+            # There may be no geometries if we are working with a gridded dataset. Load the geometries if this is the
+            # case.
+            sfield.set_abstraction_geom()
 
-        ocgis_lh('after sfield.set_abstraction_geom in _update_aggregation_wrapping_crs_', obj._subset_log, alias=alias,
-                 ugid=subset_ugid, level=logging.DEBUG)
+            ocgis_lh('after sfield.set_abstraction_geom in _update_aggregation_wrapping_crs_', obj._subset_log,
+                     alias=alias, ugid=subset_ugid, level=logging.DEBUG)
 
-        # Union the geometries and spatially average the data variables.
-        # with vm.scoped(vm.get_live_ranks_from_object(sfield)):
-        sfield = sfield.geom.get_unioned(spatial_average=sfield.data_variables)
-        ocgis_lh('after sfield.geom.get_unioned in _update_aggregation_wrapping_crs_', obj._subset_log, alias=alias,
-                 ugid=subset_ugid, level=logging.DEBUG)
+            # Union the geometries and spatially average the data variables.
+            # with vm.scoped(vm.get_live_ranks_from_object(sfield)):
+            sfield = sfield.geom.get_unioned(spatial_average=sfield.data_variables)
+            ocgis_lh('after sfield.geom.get_unioned in _update_aggregation_wrapping_crs_', obj._subset_log,
+                     alias=alias, ugid=subset_ugid, level=logging.DEBUG)
 
-        # None is returned for the non-root process. Check we are in parallel and create an empty field.
-        if sfield is None:
-            if vm.size == 1:
-                raise ValueError('None should not be returned from get_unioned if running on a single processor.')
+            # None is returned for the non-root process. Check we are in parallel and create an empty field.
+            if sfield is None:
+                if vm.size == 1:
+                    raise ValueError('None should not be returned from get_unioned if running on a single processor.')
+                else:
+                    sfield = Field(is_empty=True)
             else:
-                sfield = Field(is_empty=True)
-        else:
-            sfield = sfield.parent
+                sfield = sfield.parent
 
         vm.create_subcomm_by_emptyable(SubcommName.SPATIAL_AVERAGE, sfield, is_current=True, clobber=True)
 
@@ -678,6 +834,78 @@ def _update_aggregation_wrapping_crs_(obj, alias, sfield, subset_sdim, subset_ug
     return sfield
 
 
+def _get_sparse_averages_(variable, spatial_dimension_names, weights):
+    """
+    Spatially average a variable using overlap weights. The variable's value is read in chunks along its first
+    non-spatial dimension.
+
+    :param variable: The variable to average.
+    :type variable: :class:`ocgis.Variable`
+    :param sequence spatial_dimension_names: Names of the variable's spatial dimensions ordered like the weights' cells.
+    :param weights: The overlap weights.
+    :type weights: :class:`~ocgis.spatial.weights.OverlapWeights`
+    :return: Averages with the non-spatial dimensions ordered like ``variable`` and the selection geometries last.
+    :rtype: :class:`numpy.ma.MaskedArray`
+    """
+
+    dimension_names = list(variable.dimension_names)
+    lead_names = [dn for dn in dimension_names if dn not in spatial_dimension_names]
+    axes = [dimension_names.index(dn) for dn in lead_names + list(spatial_dimension_names)]
+
+    if len(lead_names) == 0:
+        return weights.apply(variable.get_masked_value().transpose(axes))
+
+    chunk_dimension = lead_names[0]
+    chunk_length = variable.shape[dimension_names.index(chunk_dimension)]
+    chunk_size = max(constants.CALC_MAX_CHUNK_ELEMENTS // max(int(variable.size // chunk_length), 1), 1)
+    ret = []
+    for start in range(0, chunk_length, chunk_size):
+        chunk = variable[{chunk_dimension: slice(start, start + chunk_size)}]
+        ret.append(weights.apply(chunk.get_masked_value().transpose(axes)))
+    return np.ma.concatenate(ret, axis=0)
+
+
+def _get_sparse_aggregated_field_(sfield, geometry, averages, column):
+    """
+    Create an aggregated field for a selection geometry structured like the output of
+    :meth:`ocgis.GeometryVariable.get_unioned`.
+
+    :param sfield: The field used to compute the averages with its abstraction geometry set.
+    :type sfield: :class:`ocgis.Field`
+    :param geometry: The selection geometry to use as the aggregated geometry.
+    :type geometry: :class:`shapely.geometry.base.BaseGeometry`
+    :param dict averages: Maps data variable names to averages from :func:`_get_sparse_averages_`.
+    :param int column: Index of the selection geometry in the averages' last dimension.
+    :rtype: :class:`ocgis.Field`
+    """
+
+    spatial_dimension_names = sfield.geom.dimension_names
+    union_dimension = Dimension(constants.DimensionName.UNIONED_GEOMETRY, 1)
+
+    ret = sfield.geom.copy()
+    ret.set_mask(None)
+    ret._value = None
+    ret.set_dimensions([union_dimension])
+    ret.allocate_value()
+    ret.get_value()[0] = geometry
+
+    for name, value in averages.items():
+        target = ret.parent[name]
+        new_dimensions = [dim for dim in target.dimensions if dim.name not in spatial_dimension_names]
+        new_dimensions.append(union_dimension)
+        value = value[..., column:column + 1]
+
+        target.set_mask(None)
+        target._value = None
+        target.set_dimensions(new_dimensions)
+        target.allocate_value()
+        target.get_value()[:] = value.filled()
+        if np.ma.is_masked(value):
+            target.set_mask(np.ma.getmaskarray(value))
+
+    return ret.parent
+
+
 def _update_wrapping_(obj, field_object):
     """
     Update the wrapped state of the incoming field object. This only affects fields with wrappable coordinate systems.
@@ -1202,6 +1202,13 @@ class Snippet(base.BooleanParameter):
     meta_false = 'All time points returned.'
 
 
+class SparseAggregate(base.BooleanParameter):
+    name = 'sparse_aggregate'
+    default = False
+    meta_true = 'Spatial averages for all selection geometries computed using a sparse matrix of cell overlap areas.'
+    meta_false = 'Spatial averages computed by subsetting and unioning each selection geometry.'
+
+
 class SpatialOperation(base.StringOptionParameter):
     name = 'spatial_operation'
     default = 'intersects'
@@ -4,7 +4,6 @@ from abc import abstractmethod
 
 import numpy as np
 import six
-from pyproj import Proj, transform
 from shapely.geometry import box
 
 from ocgis import Variable, SourcedVariable, vm
@@ -581,18 +580,12 @@ class AbstractXYZSpatialContainer(AbstractSpatialContainer):
         elif isinstance(to_crs, crs.CFRotatedPole):
             to_crs.update_with_rotated_pole_transformation(self, inverse=True)
         else:
-            src_proj4 = from_crs.proj4
-            dst_proj4 = to_crs.proj4
-
-            src_proj4 = Proj(src_proj4)
-            dst_proj4 = Proj(dst_proj4)
-
             y = self.y
             x = self.x
 
             value_row = self.y.get_value().reshape(-1)
             value_col = self.x.get_value().reshape(-1)
-            tvalue_col, tvalue_row = transform(src_proj4, dst_proj4, value_col, value_row)
+            tvalue_col, tvalue_row = crs.get_transformed_coordinates(from_crs, to_crs, value_col, value_row)
 
             self.x.set_value(tvalue_col.reshape(self.shape))
             self.y.set_value(tvalue_row.reshape(self.shape))
@@ -600,7 +593,7 @@ class AbstractXYZSpatialContainer(AbstractSpatialContainer):
             if self.has_bounds:
                 corner_row = y.bounds.get_value().reshape(-1)
                 corner_col = x.bounds.get_value().reshape(-1)
-                tvalue_col, tvalue_row = transform(src_proj4, dst_proj4, corner_col, corner_row)
+                tvalue_col, tvalue_row = crs.get_transformed_coordinates(from_crs, to_crs, corner_col, corner_row)
                 y.bounds.set_value(tvalue_row.reshape(y.bounds.shape))
                 x.bounds.set_value(tvalue_col.reshape(x.bounds.shape))
 
@@ -1,12 +1,18 @@
+import logging
 import os
+import sys
 from collections import OrderedDict
+from copy import deepcopy
 
 import fiona
+import numpy as np
 import ogr
 from ocgis import env
 from ocgis.collection.field import Field
 from ocgis.util.helpers import get_formatted_slice
 from ocgis.util.logging_ocgis import ocgis_lh
+from ocgis.util.lru import LRUCache
+from ocgis.util.shapely_array import prepare_geometry
 from shapely import wkb
 
 
@@ -81,6 +87,52 @@ class GeomCabinet(object):
     def get_shp_path(self, key):
         return self._get_path_(key, ext='shp')
 
+    def invalidate_cache(self, key=None, path=None):
+        """
+        Remove records from the geometry cache. See :attr:`ocgis.env.GEOMCABINET_CACHE_MAX_SIZE`.
+
+        :param str key: The shapefile key to remove records for.
+        :param str path: The path to the shapefile to remove records for if no key is provided. If ``key`` and ``path``
+         are ``None``, all records are removed.
+        """
+
+        if key is None and path is None:
+            _geometry_cache.clear()
+        else:
+            if key is not None:
+                path = self.get_shp_path(key)
+            _geometry_cache.invalidate(path)
+
+    def create_spatial_index(self, key=None, path=None, overwrite=False):
+        """
+        Create a persistent spatial index for a shapefile. The index is written next to the shapefile with a ``.qix``
+        extension and used by GDAL when features are selected by bounding box. See ``bbox`` in
+        :class:`~ocgis.GeomCabinetIterator`.
+
+        :param str key: The shapefile key.
+        :param str path: The path to the shapefile if no key is provided.
+        :param bool overwrite: If ``True``, recreate an existing spatial index. Spatial indexes older than the shapefile
+         are always recreated.
+        :returns: The path to the spatial index file.
+        :rtype: str
+        :raises: ValueError
+        """
+
+        shp_path = self._get_path_by_key_or_direct_path_(key=key, path=path)
+        if self.get_gdal_driver(shp_path) != 'ESRI Shapefile':
+            raise ValueError('Spatial indexes may only be created for shapefiles: {}'.format(shp_path))
+
+        ret = get_spatial_index_path(shp_path)
+        if overwrite or not os.path.exists(ret) or os.path.getmtime(ret) < os.path.getmtime(shp_path):
+            ds = ogr.Open(shp_path, 1)
+            try:
+                lyr_name = ds.GetLayerByIndex(0).GetName()
+                ds.ExecuteSQL('CREATE SPATIAL INDEX ON "{0}"'.format(lyr_name))
+            finally:
+                ds.Destroy()
+                ds = None
+        return ret
+
     def get_cfg_path(self, key):
         return self._get_path_(key, ext='cfg')
 
@@ -97,7 +149,7 @@ class GeomCabinet(object):
 
     def iter_geoms(self, key=None, select_uid=None, path=None, load_geoms=True, as_field=False,
                    uid=None, select_sql_where=None, slc=None, union=False, data_model=None,
-                   driver_kwargs=None):
+                   driver_kwargs=None, bbox=None, spatial_index=False):
         """
         See documentation for :class:`~ocgis.GeomCabinetIterator`.
         """
@@ -105,91 +157,131 @@ class GeomCabinet(object):
         # Get the path to the output shapefile.
         shp_path = self._get_path_by_key_or_direct_path_(key=key, path=path)
 
-        # Get the source metadata.
-        meta = self.get_meta(path=shp_path, driver_kwargs=driver_kwargs)
+        if bbox is not None and spatial_index:
+            try:
+                self.create_spatial_index(path=shp_path)
+            except (RuntimeError, ValueError) as e:
+                # The spatial index is an optimization. Reading the features does not require it.
+                msg = 'Spatial index not created for "{0}": {1}'.format(shp_path, e)
+                ocgis_lh(msg=msg, logger='geom_cabinet', level=logging.WARN)
 
         if union:
+            # Get the source metadata.
+            meta = self.get_meta(path=shp_path, driver_kwargs=driver_kwargs)
             gic = GeomCabinetIterator(key=key, select_uid=select_uid, path=path, load_geoms=load_geoms, as_field=False,
                                       uid=uid, select_sql_where=select_sql_where, slc=slc, union=False,
-                                      data_model=data_model, driver_kwargs=driver_kwargs)
+                                      data_model=data_model, driver_kwargs=driver_kwargs, bbox=bbox)
             yld = Field.from_records(gic, meta['schema'], crs=meta['crs'], uid=uid, union=True, data_model=data_model)
             yield yld
         else:
-            if slc is not None and (select_uid is not None or select_sql_where is not None):
+            if slc is not None and (select_uid is not None or select_sql_where is not None or bbox is not None):
                 exc = ValueError('Slice is not allowed with other select statements.')
                 ocgis_lh(exc=exc, logger='geom_cabinet')
 
-            # Format the slice for iteration. We will get the features by index if a slice is provided.
-            if slc is not None:
-                slc = get_index_slice_for_iteration(slc)
+            cache = get_geometry_cache()
+            if cache is None:
+                records = self._iter_records_(shp_path, select_uid=select_uid, load_geoms=load_geoms, uid=uid,
+                                              select_sql_where=select_sql_where, slc=slc, driver_kwargs=driver_kwargs,
+                                              bbox=bbox)
+            else:
+                cache_key = cache.get_key(shp_path, select_uid=select_uid, load_geoms=load_geoms, uid=uid,
+                                          select_sql_where=select_sql_where, slc=slc, driver_kwargs=driver_kwargs,
+                                          bbox=bbox)
+                cached = cache.get(cache_key)
+                if cached is None:
+                    cached = list(self._iter_records_(shp_path, select_uid=select_uid, load_geoms=load_geoms, uid=uid,
+                                                      select_sql_where=select_sql_where, slc=slc,
+                                                      driver_kwargs=driver_kwargs, bbox=bbox))
+                    cache.put(cache_key, cached)
+                records = iter_record_copies(cached)
+
+            # The unique identifier is added with the default name if it is not present in the source.
+            if uid is None:
+                uid = env.DEFAULT_GEOM_UID
+            for yld in records:
+                if as_field:
+                    yld = Field.from_records([yld], schema=yld['meta']['schema'], crs=yld['meta']['crs'], uid=uid,
+                                             data_model=data_model)
+                yield yld
+
+    def _iter_records_(self, shp_path, select_uid=None, load_geoms=True, uid=None, select_sql_where=None, slc=None,
+                       driver_kwargs=None, bbox=None):
+        """
+        Yield record dictionaries for the features selected from a geometry file. See
+        :meth:`~ocgis.GeomCabinet.iter_geoms`.
+        """
 
-            # Open the target geometry file.
-            ds = ogr.Open(shp_path)
-            try:
-                # Return the features iterator.
-                features = self._get_features_object_(ds, uid=uid, select_uid=select_uid,
-                                                      select_sql_where=select_sql_where, driver_kwargs=driver_kwargs)
+        # Get the source metadata.
+        meta = self.get_meta(path=shp_path, driver_kwargs=driver_kwargs)
+
+        # Format the slice for iteration. We will get the features by index if a slice is provided.
+        if slc is not None:
+            slc = get_index_slice_for_iteration(slc)
+
+        # Open the target geometry file.
+        ds = ogr.Open(shp_path)
+        try:
+            # Return the features iterator.
+            features = self._get_features_object_(ds, uid=uid, select_uid=select_uid,
+                                                  select_sql_where=select_sql_where, driver_kwargs=driver_kwargs,
+                                                  bbox=bbox)
+
+            # Using slicing, we will select the features individually from the object.
+            if slc is None:
+                itr = features
+            else:
+                # The geodatabase API requires iterations to get the given location.
+                if self.get_gdal_driver(shp_path) == 'OpenFileGDB' or isinstance(slc, slice):
+                    def _o_itr_(features_object, slice_start, slice_stop):
+                        for ctr2, fb in enumerate(features_object):
+                            # ... iterate until start is reached.
+                            if ctr2 < slice_start:
+                                continue
+                            # ... stop if we have reached the stop.
+                            elif ctr2 == slice_stop:
+                                return
+                            yield fb
+
+                    itr = _o_itr_(features, slc.start, slc.stop)
+                else:
+                    # Convert the slice index to an integer to avoid type conflict in GDAL layer.
+                    itr = (features.GetFeature(int(idx)) for idx in slc)
 
-                # Using slicing, we will select the features individually from the object.
-                if slc is None:
-                    itr = features
+            # Convert feature objects to record dictionaries.
+            for ctr, feature in enumerate(itr):
+                if load_geoms:
+                    yld = {'geom': wkb.loads(feature.geometry().ExportToWkb())}
                 else:
-                    # The geodatabase API requires iterations to get the given location.
-                    if self.get_gdal_driver(shp_path) == 'OpenFileGDB' or isinstance(slc, slice):
-                        def _o_itr_(features_object, slice_start, slice_stop):
-                            for ctr2, fb in enumerate(features_object):
-                                # ... iterate until start is reached.
-                                if ctr2 < slice_start:
-                                    continue
-                                # ... stop if we have reached the stop.
-                                elif ctr2 == slice_stop:
-                                    return
-                                yield fb
-
-                        itr = _o_itr_(features, slc.start, slc.stop)
-                    else:
-                        # Convert the slice index to an integer to avoid type conflict in GDAL layer.
-                        itr = (features.GetFeature(int(idx)) for idx in slc)
-
-                # Convert feature objects to record dictionaries.
-                for ctr, feature in enumerate(itr):
-                    if load_geoms:
-                        yld = {'geom': wkb.loads(feature.geometry().ExportToWkb())}
-                    else:
-                        yld = {}
-                    items = feature.items()
-                    properties = OrderedDict([(key, items[key]) for key in feature.keys()])
-                    yld.update({'properties': properties, 'meta': meta})
-
-                    if ctr == 0:
-                        uid, add_uid = get_uid_from_properties(properties, uid)
-                        # The properties schema needs to be updated to account for the adding of a unique identifier.
-                        if add_uid:
-                            meta['schema']['properties'][uid] = 'int'
-
-                    # Add the unique identifier if required
+                    yld = {}
+                items = feature.items()
+                properties = OrderedDict([(key, items[key]) for key in feature.keys()])
+                yld.update({'properties': properties, 'meta': meta})
+
+                if ctr == 0:
+                    uid, add_uid = get_uid_from_properties(properties, uid)
+                    # The properties schema needs to be updated to account for the adding of a unique identifier.
                     if add_uid:
-                        properties[uid] = feature.GetFID()
-                    # Ensure the unique identifier is an integer
-                    else:
-                        properties[uid] = int(properties[uid])
+                        meta['schema']['properties'][uid] = 'int'
 
-                    if as_field:
-                        yld = Field.from_records([yld], schema=meta['schema'], crs=yld['meta']['crs'], uid=uid,
-                                                 data_model=data_model)
+                # Add the unique identifier if required
+                if add_uid:
+                    properties[uid] = feature.GetFID()
+                # Ensure the unique identifier is an integer
+                else:
+                    properties[uid] = int(properties[uid])
 
-                    yield yld
-                try:
-                    assert ctr >= 0
-                except UnboundLocalError:
-                    # occurs if there were not feature returned by the iterator. raise a more clear exception.
-                    msg = 'No features returned from target data source. Were features appropriately selected?'
-                    raise ValueError(msg)
-            finally:
-                # Close or destroy the data source object if it actually exists.
-                if ds is not None:
-                    ds.Destroy()
-                    ds = None
+                yield yld
+            try:
+                assert ctr >= 0
+            except UnboundLocalError:
+                # occurs if there were not feature returned by the iterator. raise a more clear exception.
+                msg = 'No features returned from target data source. Were features appropriately selected?'
+                raise ValueError(msg)
+        finally:
+            # Close or destroy the data source object if it actually exists.
+            if ds is not None:
+                ds.Destroy()
+                ds = None
 
     def _get_path_by_key_or_direct_path_(self, key=None, path=None):
         """
@@ -212,7 +304,7 @@ class GeomCabinet(object):
         return shp_path
 
     @staticmethod
-    def _get_features_object_(ds, uid=None, select_uid=None, select_sql_where=None, driver_kwargs=None):
+    def _get_features_object_(ds, uid=None, select_uid=None, select_sql_where=None, driver_kwargs=None, bbox=None):
         """
         :param ds: Open OGR data source object
         :type ds: :class:`osgeo.ogr.DataSource`
@@ -231,6 +323,8 @@ class GeomCabinet(object):
         | OpenFileGDB | ``'feature_class'``  | String feature class name to choose. |
         +-------------+----------------------+--------------------------------------+
 
+        :param sequence bbox: If provided, select only features intersecting the bounding box
+         ``(minx, miny, maxx, maxy)``.
         :returns: A layer object with selection applied if ``select_uid`` is not ``None``.
         :rtype: :class:`osgeo.ogr.Layer`
         """
@@ -253,6 +347,10 @@ class GeomCabinet(object):
         else:
             lyr = ds.GetLayerByIndex(0)
 
+        if bbox is not None:
+            # The spatial filter uses the layer's spatial index if one exists.
+            lyr.SetSpatialFilterRect(*bbox)
+
         # Get the feature object applying any select statements after acessing.
         lyr.ResetReading()
         if select_uid is not None or select_sql_where is not None:
@@ -269,12 +367,87 @@ class GeomCabinet(object):
                 else:
                     sql_where = '{0} IN {1}'.format(uid, tuple(select_uid))
                 sql = 'SELECT * FROM "{0}" WHERE {1}'.format(lyr_name, sql_where)
-            features = ds.ExecuteSQL(sql)
+            if bbox is None:
+                features = ds.ExecuteSQL(sql)
+            else:
+                features = ds.ExecuteSQL(sql, spatialFilter=lyr.GetSpatialFilter())
         else:
             features = lyr
         return features
 
 
+class GeometryCache(LRUCache):
+    """
+    Thread-safe least recently used cache of records read by :meth:`~ocgis.GeomCabinet.iter_geoms`. Records are keyed
+    by the geometry file path, modification time, and size, and the selection arguments. Geometries are prepared for
+    repeated spatial operations if supported by Shapely.
+
+    :param int max_size: The maximum estimated size of the cached records in bytes.
+    """
+
+    @staticmethod
+    def get_key(shp_path, **kwargs):
+        """
+        :param str shp_path: Path to the geometry file.
+        :param dict kwargs: The record selection arguments to :meth:`~ocgis.GeomCabinet.iter_geoms`.
+        :rtype: tuple
+        """
+
+        shp_path = os.path.abspath(shp_path)
+        stats = []
+        for path in [shp_path, os.path.splitext(shp_path)[0] + '.dbf']:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            stats.append((stat.st_mtime, stat.st_size))
+        # NumPy summarizes the representation of large arrays. Array selection arguments are converted to tuples so all
+        # of their elements are part of the key.
+        kwargs = {k: _get_key_value_(v) for k, v in kwargs.items()}
+        return (shp_path, tuple(stats), repr(sorted(kwargs.items())))
+
+    def invalidate(self, shp_path):
+        """
+        :param str shp_path: Path to the geometry file to remove records for.
+        """
+
+        shp_path = os.path.abspath(shp_path)
+        with self._lock:
+            for key in [k for k in self.keys() if k[0] == shp_path]:
+                self.pop(key)
+
+    def put(self, key, records, size=None):
+        """
+        Add records to the cache removing the least recently used entries if the maximum size is exceeded.
+
+        :param tuple key: The cache key from :meth:`~ocgis.spatial.geom_cabinet.GeometryCache.get_key`.
+        :param list records: The record dictionaries to cache.
+        :param int size: The size of the records in bytes. If ``None``, the size is estimated from the geometries'
+         well-known binary and the record properties.
+        """
+
+        if size is None:
+            size = 0
+            for record in records:
+                geom = record.get('geom')
+                if geom is not None:
+                    if prepare_geometry is not None:
+                        prepare_geometry(geom)
+                    size += len(geom.wkb)
+                size += sum([sys.getsizeof(v) for v in record['properties'].values()])
+        super(GeometryCache, self).put(key, records, size=size)
+
+
+def _get_key_value_(value):
+    if isinstance(value, np.ndarray):
+        ret = tuple(value.ravel().tolist())
+    elif isinstance(value, (list, tuple)):
+        ret = tuple(_get_key_value_(v) for v in value)
+    else:
+        ret = value
+    return ret
+
+
 class GeomCabinetIterator(object):
     """
     Iterate over geometries from a shapefile specified by ``key`` or ``path``.
@@ -321,12 +494,21 @@ class GeomCabinetIterator(object):
     >>> data_model = 'NETCDF3'
 
     :param dict driver_kwargs: Format specific keyword arguments to use for driver creation.
+    :param bbox: If provided, only features intersecting the bounding box ``(minx, miny, maxx, maxy)`` are read and
+     converted. Features are streamed from the data source during iteration.
+    :type bbox: sequence
+
+    >>> bbox = [-95.0, 40.0, -85.0, 45.0]
+
+    :param bool spatial_index: If ``True`` and ``bbox`` is provided, create a persistent spatial index for the shapefile
+     if it does not exist. See :meth:`~ocgis.GeomCabinet.create_spatial_index`.
     :raises: ValueError, RuntimeError
     :rtype: dict
     """
 
     def __init__(self, key=None, select_uid=None, path=None, load_geoms=True, as_field=False, uid=None,
-                 select_sql_where=None, slc=None, union=False, data_model=None, driver_kwargs=None):
+                 select_sql_where=None, slc=None, union=False, data_model=None, driver_kwargs=None, bbox=None,
+                 spatial_index=False):
         self.key = key
         self.path = path
         self.select_uid = select_uid
@@ -338,6 +520,8 @@ class GeomCabinetIterator(object):
         self.union = union
         self.data_model = data_model
         self.driver_kwargs = driver_kwargs
+        self.bbox = bbox
+        self.spatial_index = spatial_index
         self.sc = GeomCabinet()
 
     def __iter__(self):
@@ -348,7 +532,8 @@ class GeomCabinetIterator(object):
         for row in self.sc.iter_geoms(key=self.key, select_uid=self.select_uid, path=self.path,
                                       load_geoms=self.load_geoms, as_field=self.as_field,
                                       uid=self.uid, select_sql_where=self.select_sql_where, slc=self.slc,
-                                      union=self.union, data_model=self.data_model, driver_kwargs=self.driver_kwargs):
+                                      union=self.union, data_model=self.data_model, driver_kwargs=self.driver_kwargs,
+                                      bbox=self.bbox, spatial_index=self.spatial_index):
             yield row
 
     def __len__(self):
@@ -361,7 +546,7 @@ class GeomCabinetIterator(object):
 
             if self.slc is not None:
                 return len(get_index_slice_for_iteration(self.slc))
-            elif self.select_uid is not None:
+            elif self.select_uid is not None and self.bbox is None:
                 ret = len(self.select_uid)
             else:
                 # Get the geometries using a select statement.
@@ -369,7 +554,7 @@ class GeomCabinetIterator(object):
                 try:
                     features = self.sc._get_features_object_(ds, uid=self.uid, select_uid=self.select_uid,
                                                              select_sql_where=self.select_sql_where,
-                                                             driver_kwargs=self.driver_kwargs)
+                                                             driver_kwargs=self.driver_kwargs, bbox=self.bbox)
                     ret = len(features)
                 finally:
                     ds.Destroy()
@@ -423,11 +608,59 @@ class ShpCabinetIterator(GeomCabinetIterator):
     pass
 
 
+def get_geometry_cache():
+    """
+    :returns: The process geometry cache or ``None`` if caching is disabled. See
+     :attr:`ocgis.env.GEOMCABINET_CACHE_MAX_SIZE`.
+    :rtype: :class:`~ocgis.spatial.geom_cabinet.GeometryCache` | None
+    """
+
+    max_size = env.GEOMCABINET_CACHE_MAX_SIZE
+    if not max_size:
+        ret = None
+    else:
+        if _geometry_cache.max_size != max_size:
+            _geometry_cache.set_max_size(max_size)
+        ret = _geometry_cache
+    return ret
+
+
+def iter_record_copies(records):
+    """
+    Yield copies of cached records. Geometries are shared and the properties and metadata are copied.
+
+    :param list records: The cached records.
+    :rtype: dict
+    """
+
+    if len(records) > 0:
+        meta = deepcopy(records[0]['meta'])
+    for record in records:
+        ret = {'properties': OrderedDict(record['properties']), 'meta': meta}
+        if 'geom' in record:
+            ret['geom'] = record['geom']
+        yield ret
+
+
 def get_gdal_driver(ds):
     driver = ds.GetDriver()
     return driver.GetName()
 
 
+def get_spatial_index_path(shp_path):
+    """
+    :param str shp_path: Path to a shapefile.
+    :returns: The path to the shapefile's spatial index.
+    :rtype: str
+    """
+
+    return os.path.splitext(shp_path)[0] + '.qix'
+
+
 def get_index_slice_for_iteration(slc):
     slc = get_formatted_slice(slc, 1)[0]
     return slc
+
+
+# Process-level record cache shared by geometry cabinets.
+_geometry_cache = GeometryCache()
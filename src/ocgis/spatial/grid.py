@@ -15,11 +15,12 @@ from ocgis.exc import GridDeficientError, EmptySubsetError, AllElementsMaskedErr
 from ocgis.spatial.base import AbstractXYZSpatialContainer
 from ocgis.spatial.geomc import AbstractGeometryCoordinates, PolygonGC, PointGC, LineGC
 from ocgis.util.helpers import get_formatted_slice, get_iter
+from ocgis.util.shapely_array import get_box_array, get_point_array, get_polygon_array
 from ocgis.variable.base import get_dslice, get_dimension_lengths
 from ocgis.variable.dimension import Dimension
-from ocgis.variable.geom import GeometryVariable, get_masking_slice, GeometryProcessor
+from ocgis.variable.geom import GeometryVariable, get_masking_slice, GeometryProcessor, get_clipped_geometries
 from ocgis.vmachine.mpi import MPI_SIZE
-from shapely.geometry import Polygon, Point, box
+from shapely.geometry import Polygon, Point, box, MultiPolygon
 from shapely.geometry.base import BaseGeometry, BaseMultipartGeometry
 
 CreateGeometryFromWkb, Geometry, wkbGeometryCollection, wkbPoint = ogr.CreateGeometryFromWkb, ogr.Geometry, \
@@ -43,61 +44,16 @@ class GridGeometryProcessor(GeometryProcessor):
     def get_geometry_iterable(self):
         grid = self.grid
         hint_mask = self.hint_mask
-        is_vectorized = grid.is_vectorized
-        if self.use_bounds:
-            abstraction = grid.abstraction
-        else:
-            abstraction = 'point'
-
-        if abstraction == 'point':
-            x_data = grid.x.get_value()
-            y_data = grid.y.get_value()
-            for idx_row, idx_col in itertools.product(*[list(range(ii)) for ii in grid.shape]):
-                if hint_mask is not None and hint_mask[idx_row, idx_col]:
-                    yld = None
-                else:
-                    if is_vectorized:
-                        y = y_data[idx_row]
-                        x = x_data[idx_col]
-                    else:
-                        y = y_data[idx_row, idx_col]
-                        x = x_data[idx_row, idx_col]
-                    yld = Point(x, y)
-                yield (idx_row, idx_col), yld
-        elif abstraction == 'polygon':
-            if grid.has_bounds:
-                # We want geometries for everything even if masked.
-                x_bounds = grid.x.bounds.get_value()
-                y_bounds = grid.y.bounds.get_value()
-                range_row = list(range(grid.shape[0]))
-                range_col = list(range(grid.shape[1]))
-                if is_vectorized:
-                    for row, col in itertools.product(range_row, range_col):
-                        if hint_mask is not None and hint_mask[row, col]:
-                            polygon = None
-                        else:
-                            min_x, max_x = np.min(x_bounds[col, :]), np.max(x_bounds[col, :])
-                            min_y, max_y = np.min(y_bounds[row, :]), np.max(y_bounds[row, :])
-                            polygon = box(min_x, min_y, max_x, max_y)
-                        yield (row, col), polygon
-                else:
-                    # TODO: We should be able to avoid the creation of this corners array.
-                    corners = np.vstack((y_bounds, x_bounds))
-                    corners = corners.reshape([2] + list(x_bounds.shape))
-                    for row, col in itertools.product(range_row, range_col):
-                        if hint_mask is not None and hint_mask[row, col]:
-                            polygon = None
-                        else:
-                            current_corner = corners[:, row, col]
-                            coords = np.hstack((current_corner[1, :].reshape(-1, 1),
-                                                current_corner[0, :].reshape(-1, 1)))
-                            polygon = Polygon(coords)
-                        yield (row, col), polygon
+
+        # Geometries are constructed in bulk before iteration. Elements in the hint mask are not constructed.
+        geoms = get_geometry_array(grid, np.zeros(grid.shape, dtype=object), hint_mask=hint_mask,
+                                   use_bounds=self.use_bounds)
+        for idx in itertools.product(*[list(range(ii)) for ii in grid.shape]):
+            if hint_mask is not None and hint_mask[idx]:
+                yld = None
             else:
-                msg = 'A grid must have bounds/corners to construct polygons. Consider using "set_extrapolated_bounds".'
-                raise GridDeficientError(msg)
-        else:
-            raise NotImplementedError(abstraction)
+                yld = geoms[idx]
+            yield idx, yld
 
 
 @six.add_metaclass(abc.ABCMeta)
@@ -554,7 +510,7 @@ class Grid(AbstractGrid, AbstractXYZSpatialContainer):
 
     def get_spatial_subset_operation(self, spatial_op, subset_geom, return_slice=False, use_bounds='auto',
                                      original_mask=None, keep_touches='auto', cascade=True, optimized_bbox_subset=False,
-                                     apply_slice=True, no_touching=False):
+                                     apply_slice=True, no_touching=False, block_index=None):
         """
         Perform intersects or intersection operations on the grid object.
 
@@ -578,6 +534,9 @@ class Grid(AbstractGrid, AbstractXYZSpatialContainer):
          mask.
         :param bool no_touching :: If ``True``, raise :class:`ocgis.exc.NoTouching` if the selection geometry touches a
          geometry on the subset target. Useful when avoiding duplicate geometries when using a spatial decomposition.
+        :param block_index: An optional block index for the grid's coordinates used to limit the coordinate comparisons
+         when creating the hint mask. Only used by grids with two-dimensional coordinates.
+        :type block_index: :class:`~ocgis.spatial.grid.GridBlockIndex`
         :return: If ``return_slice`` is ``False`` (the default), return a shallow copy of the sliced grid. If
          ``return_slice`` is ``True``, this will be a tuple with the subsetted object as the first element and the slice
          used as the second. If ``spatial_op`` is ``'intersection'``, the returned object is a geometry variable.
@@ -645,7 +604,8 @@ class Grid(AbstractGrid, AbstractXYZSpatialContainer):
                 if not optimized_bbox_subset:
                     geom = geom.buffer(buffer_value).envelope
                 single_hint_mask = get_hint_mask_from_geometry_bounds(self, geom.bounds, invert=False,
-                                                                      no_touching=no_touching)
+                                                                      no_touching=no_touching,
+                                                                      block_index=block_index)
 
                 if ctr == 0:
                     hint_mask = single_hint_mask
@@ -683,12 +643,23 @@ class Grid(AbstractGrid, AbstractXYZSpatialContainer):
                     new_intersects_target = subset_geom.intersection(box(*self.extent).buffer(1e-6))
                 else:
                     new_intersects_target = subset_geom
-                gp = GridGeometryProcessor(self, new_intersects_target, original_mask, keep_touches=keep_touches,
-                                           use_bounds=use_bounds)
-                for idx, intersects_logical, current_geometry in gp.iter_intersects():
-                    fill_mask[idx] = not intersects_logical
-                    if perform_intersection and intersects_logical:
-                        geometry_fill[idx] = current_geometry.intersection(subset_geom)
+                # Rectilinear grid cells are axis-aligned boxes. Polygon intersects may be computed from the bounds
+                # arrays without creating geometries for cells away from the polygon boundary.
+                if use_bounds and self.is_vectorized and not perform_intersection and \
+                        isinstance(new_intersects_target, (Polygon, MultiPolygon)):
+                    fill_mask = get_scanline_intersects_mask(self, new_intersects_target, hint_mask=original_mask,
+                                                             keep_touches=keep_touches)
+                else:
+                    gp = GridGeometryProcessor(self, new_intersects_target, original_mask, keep_touches=keep_touches,
+                                               use_bounds=use_bounds)
+                    for idx, intersects_logical, current_geometry in gp.iter_intersects():
+                        fill_mask[idx] = not intersects_logical
+                        if perform_intersection and intersects_logical:
+                            geometry_fill[idx] = current_geometry
+                    if perform_intersection:
+                        # Clip the intersecting geometries in bulk.
+                        select = np.invert(fill_mask)
+                        geometry_fill[select] = get_clipped_geometries(subset_geom, geometry_fill[select])
 
             if perform_intersection:
                 if geometry_fill is None:
@@ -1075,6 +1046,78 @@ class GridUnstruct(AbstractGrid):
         pass
 
 
+class GridBlockIndex(AbstractOcgisObject):
+    """
+    Block index summarizing a grid's two-dimensional coordinate arrays by the minimum and maximum coordinate values in
+    each tile. Tiles intersecting a bounding box are found without comparing every coordinate value. The index may be
+    reused for any number of subsets of the same grid. It must be recreated if the coordinate values change.
+
+    >>> block_index = GridBlockIndex(grid)
+    >>> sub = grid.get_intersects(subset_geom, block_index=block_index)
+
+    :param grid: The source grid. Its coordinate arrays must be two-dimensional (i.e. not vectorized).
+    :type grid: :class:`~ocgis.Grid`
+    :param tuple block_shape: The tile shape as ``(<row count>, <column count>)``.
+    """
+
+    def __init__(self, grid, block_shape=(64, 64)):
+        if grid.is_vectorized:
+            raise ValueError('Block indexes are only available for grids with two-dimensional coordinates.')
+        if len(block_shape) != 2 or min(block_shape) < 1:
+            raise ValueError("'block_shape' must contain two positive integers.")
+
+        self.block_shape = tuple(int(b) for b in block_shape)
+        self.shape = tuple(grid.shape)
+
+        x = grid.x.get_value()
+        y = grid.y.get_value()
+        self._x_min, self._x_max = self._get_block_extremes_(x)
+        self._y_min, self._y_max = self._get_block_extremes_(y)
+
+    def get_blocks(self, bbox):
+        """
+        Get a boolean array with one element per tile. ``True`` elements are tiles that may contain coordinates inside
+        the bounding box (boundary inclusive).
+
+        :param tuple bbox: The bounding box as ``(minx, miny, maxx, maxy)``.
+        :rtype: :class:`numpy.ndarray`
+        """
+
+        minx, miny, maxx, maxy = bbox
+        ret = np.logical_and(self._x_min <= maxx, self._x_max >= minx)
+        ret = np.logical_and(ret, self._y_min <= maxy)
+        ret = np.logical_and(ret, self._y_max >= miny)
+        return ret
+
+    def iter_windows(self, bbox):
+        """
+        Yield the grid slices for tiles that may contain coordinates inside the bounding box.
+
+        :param tuple bbox: The bounding box as ``(minx, miny, maxx, maxy)``.
+        :return: ``(<row slice>, <column slice>)``
+        :rtype: tuple
+        """
+
+        nrow, ncol = self.block_shape
+        for ii, jj in zip(*np.nonzero(self.get_blocks(bbox))):
+            row_start = ii * nrow
+            col_start = jj * ncol
+            yield (slice(row_start, min(row_start + nrow, self.shape[0])),
+                   slice(col_start, min(col_start + ncol, self.shape[1])))
+
+    def _get_block_extremes_(self, arr):
+        # Missing coordinates are ignored by the tile extremes. Tiles with no valid coordinates are never selected.
+        if isinstance(arr, np.ma.MaskedArray):
+            arr = arr.astype(float).filled(np.nan)
+        extremes = []
+        for ufunc in (np.fmin, np.fmax):
+            reduced = arr
+            for axis, size in enumerate(self.block_shape):
+                reduced = ufunc.reduceat(reduced, np.arange(0, arr.shape[axis], size), axis=axis)
+            extremes.append(reduced)
+        return extremes
+
+
 def arr_intersects_bounds(arr, lower, upper, keep_touches=True, section_slice=None, touches=None):
     assert lower <= upper
 
@@ -1127,31 +1170,65 @@ def update_crs_with_geometry_collection(src_sr, to_sr, value_row, value_col):
         value_row[ii] = geom.GetY()
 
 
-def get_polygon_geometry_array(grid, fill):
+def get_geometry_array(grid, fill, hint_mask=None, use_bounds=True):
+    """
+    Fill an object array with the grid's geometries. The geometry abstraction is taken from the grid.
+
+    :param grid: The source grid.
+    :type grid: :class:`~ocgis.Grid`
+    :param fill: The object array to fill with the same shape as the grid.
+    :type fill: :class:`numpy.ndarray`
+    :param hint_mask: Optional boolean array with the same shape as the grid. Geometries are not created for ``True``
+     elements. The corresponding ``fill`` elements are not modified.
+    :type hint_mask: :class:`numpy.ndarray`
+    :param bool use_bounds: If ``False``, create point geometries regardless of the grid abstraction.
+    :rtype: :class:`numpy.ndarray`
+    """
+
+    if use_bounds:
+        abstraction = grid.abstraction
+    else:
+        abstraction = 'point'
+
+    if abstraction == 'point':
+        ret = get_point_geometry_array(grid, fill, hint_mask=hint_mask)
+    elif abstraction == 'polygon':
+        ret = get_polygon_geometry_array(grid, fill, hint_mask=hint_mask)
+    else:
+        raise NotImplementedError(abstraction)
+    return ret
+
+
+def get_polygon_geometry_array(grid, fill, hint_mask=None):
+    """
+    Create polygon geometries from the grid bounds. If available, geometries are constructed with a single call to the
+    Shapely 2.0 array interface. See :func:`~ocgis.spatial.grid.get_geometry_array`.
+    """
+
     is_vectorized = grid.is_vectorized
 
     if grid.has_bounds:
         # We want geometries for everything even if masked.
         x_bounds = grid.x.bounds.get_value()
         y_bounds = grid.y.bounds.get_value()
-        range_row = list(range(grid.shape[0]))
-        range_col = list(range(grid.shape[1]))
+        rows, cols = _get_geometry_indices_(grid, hint_mask)
         if is_vectorized:
-            for row, col in itertools.product(range_row, range_col):
-                min_x, max_x = np.min(x_bounds[col, :]), np.max(x_bounds[col, :])
-                min_y, max_y = np.min(y_bounds[row, :]), np.max(y_bounds[row, :])
-                polygon = box(min_x, min_y, max_x, max_y)
-                fill[row, col] = polygon
+            min_x, max_x = np.min(x_bounds, axis=1), np.max(x_bounds, axis=1)
+            min_y, max_y = np.min(y_bounds, axis=1), np.max(y_bounds, axis=1)
+            if get_box_array is None:
+                for row, col in zip(rows, cols):
+                    fill[row, col] = box(min_x[col], min_y[row], max_x[col], max_y[row])
+            else:
+                fill[rows, cols] = get_box_array(min_x[cols], min_y[rows], max_x[cols], max_y[rows])
         else:
-            # TODO: We should be able to avoid the creation of this corners array.
-            corners = np.vstack((y_bounds, x_bounds))
-            corners = corners.reshape([2] + list(x_bounds.shape))
-            for row, col in itertools.product(range_row, range_col):
-                current_corner = corners[:, row, col]
-                coords = np.hstack((current_corner[1, :].reshape(-1, 1),
-                                    current_corner[0, :].reshape(-1, 1)))
-                polygon = Polygon(coords)
-                fill[row, col] = polygon
+            # Corner coordinates with dimensions (element, corner, coordinate).
+            coords = np.concatenate((x_bounds[rows, cols, :, np.newaxis], y_bounds[rows, cols, :, np.newaxis]),
+                                    axis=2)
+            if get_polygon_array is None:
+                for ii, (row, col) in enumerate(zip(rows, cols)):
+                    fill[row, col] = Polygon(coords[ii])
+            else:
+                fill[rows, cols] = get_polygon_array(coords)
     else:
         msg = 'A grid must have bounds/corners to construct polygons. Consider using "set_extrapolated_bounds".'
         raise GridDeficientError(msg)
@@ -1159,22 +1236,29 @@ def get_polygon_geometry_array(grid, fill):
     return fill
 
 
-def get_point_geometry_array(grid, fill):
-    """Create geometries for all the underlying coordinates regardless if the data is masked."""
+def get_point_geometry_array(grid, fill, hint_mask=None):
+    """
+    Create geometries for all the underlying coordinates regardless if the data is masked. If available, geometries are
+    constructed with a single call to the Shapely 2.0 array interface. See
+    :func:`~ocgis.spatial.grid.get_geometry_array`.
+    """
 
     x_data = grid.x.get_value()
     y_data = grid.y.get_value()
-    is_vectorized = grid.is_vectorized
+    rows, cols = _get_geometry_indices_(grid, hint_mask)
 
-    for idx_row, idx_col in itertools.product(*[list(range(ii)) for ii in grid.shape]):
-        if is_vectorized:
-            y = y_data[idx_row]
-            x = x_data[idx_col]
-        else:
-            y = y_data[idx_row, idx_col]
-            x = x_data[idx_row, idx_col]
-        pt = Point(x, y)
-        fill[idx_row, idx_col] = pt
+    if grid.is_vectorized:
+        x = x_data[cols]
+        y = y_data[rows]
+    else:
+        x = x_data[rows, cols]
+        y = y_data[rows, cols]
+
+    if get_point_array is None:
+        for ii, (row, col) in enumerate(zip(rows, cols)):
+            fill[row, col] = Point(x[ii], y[ii])
+    else:
+        fill[rows, cols] = get_point_array(x, y)
     return fill
 
 
@@ -1187,12 +1271,8 @@ def get_geometry_variable(grid, value=None, mask=None, use_bounds=True):
         if mask is None:
             mask = grid.get_mask()
         if value is None:
-            gp = GridGeometryProcessor(grid, None, mask, use_bounds=use_bounds)
-            itr = gp.get_geometry_iterable()
-            value = np.zeros(grid.shape, dtype=object)
-            for idx, geometry in itr:
-                if geometry is not None:
-                    value[idx] = geometry
+            value = get_geometry_array(grid, np.zeros(grid.shape, dtype=object), hint_mask=mask,
+                                       use_bounds=use_bounds)
     if grid.abstraction == 'point':
         name = grid._point_name
     else:
@@ -1231,12 +1311,33 @@ def get_coordinate_boolean_array(grid_target, keep_touches, max_target, min_targ
     return res_target
 
 
-def get_hint_mask_from_geometry_bounds(grid, bbox, invert=True, no_touching=False):
+def get_hint_mask_from_geometry_bounds(grid, bbox, invert=True, no_touching=False, block_index=None):
     grid_x = grid.x.get_value()
     grid_y = grid.y.get_value()
 
     minx, miny, maxx, maxy = bbox
 
+    if block_index is not None and not grid.is_vectorized:
+        if block_index.shape != tuple(grid.shape):
+            raise ValueError('The block index shape {} does not match the grid shape {}.'.format(block_index.shape,
+                                                                                                 grid.shape))
+        # Only coordinates in tiles overlapping the bounding box are compared.
+        select = np.zeros(grid.shape, dtype=bool)
+        for window in block_index.iter_windows(bbox):
+            window_x = grid_x[window]
+            window_y = grid_y[window]
+            if no_touching:
+                tx = np.logical_or(window_x == minx, window_x == maxx)
+                ty = np.logical_or(window_y == miny, window_y == maxy)
+                if np.any(np.logical_and(tx, ty)):
+                    vm.abort(exc=NoTouching)
+            select_x = np.logical_and(window_x >= minx, window_x <= maxx)
+            select_y = np.logical_and(window_y >= miny, window_y <= maxy)
+            select[window] = np.logical_and(select_x, select_y)
+        if invert:
+            select = np.invert(select)
+        return select
+
     if no_touching:
         tx = np.logical_or(grid_x==minx, grid_x==maxx)
         ty = np.logical_or(grid_y==miny, grid_y==maxy)
@@ -1272,6 +1373,107 @@ def get_hint_mask_from_geometry_bounds(grid, bbox, invert=True, no_touching=Fals
     return select
 
 
+def get_scanline_intersects_mask(grid, subset_geom, hint_mask=None, keep_touches=False):
+    """
+    Create an intersects mask for a rectilinear grid's cell polygons without constructing a geometry for each cell. The
+    polygon boundary is rasterized onto the grid bounds one row at a time. Cells touched by a boundary edge are tested
+    with Shapely. The remaining cells are entirely inside or outside the polygon and are classified with a scanline
+    (even-odd) test of the cell center.
+
+    :param grid: The rectilinear source grid with bounds.
+    :type grid: :class:`~ocgis.Grid`
+    :param subset_geom: The subset polygon.
+    :type subset_geom: :class:`shapely.geometry.Polygon` | :class:`shapely.geometry.MultiPolygon`
+    :param hint_mask: Optional boolean array with the same shape as the grid. ``True`` elements are always masked and
+     are not tested.
+    :type hint_mask: :class:`numpy.ndarray`
+    :param bool keep_touches: If ``True``, keep cells that only touch the subset polygon.
+    :returns: Boolean array with the same shape as the grid that is ``True`` where cells do not intersect the subset
+     polygon.
+    :rtype: :class:`numpy.ndarray`
+    """
+
+    assert grid.is_vectorized
+
+    x_bounds = grid.x.bounds.get_value()
+    y_bounds = grid.y.bounds.get_value()
+    col_lower, col_upper = np.min(x_bounds, axis=1), np.max(x_bounds, axis=1)
+    row_lower, row_upper = np.min(y_bounds, axis=1), np.max(y_bounds, axis=1)
+    col_center = (col_lower + col_upper) / 2.
+
+    # Column intervals sorted by lower bound. Upper bounds are also ordered for non-overlapping cells.
+    col_order = np.argsort(col_lower, kind='mergesort')
+    col_lower_sorted = col_lower[col_order]
+    col_upper_sorted = col_upper[col_order]
+    cols_ordered = np.all(np.diff(col_upper_sorted) >= 0)
+
+    # Polygon edges for all rings with start coordinates (x0, y0) and stop coordinates (x1, y1).
+    if isinstance(subset_geom, MultiPolygon):
+        polygons = list(subset_geom.geoms)
+    else:
+        polygons = [subset_geom]
+    rings = []
+    for polygon in polygons:
+        if not polygon.is_empty:
+            rings.append(polygon.exterior)
+            rings += list(polygon.interiors)
+    edges = [np.hstack((np.asarray(r.coords)[:-1, 0:2], np.asarray(r.coords)[1:, 0:2])) for r in rings]
+    edges = np.vstack(edges) if len(edges) > 0 else np.zeros((0, 4))
+    x0, y0, x1, y1 = edges.T
+    edge_lower, edge_upper = np.minimum(y0, y1), np.maximum(y0, y1)
+    dy = y1 - y0
+    is_horizontal = dy == 0
+    slope = (x1 - x0) / np.where(is_horizontal, 1., dy)
+
+    # Tolerance used to widen boundary intervals. Cells near the boundary are tested exactly.
+    eps = 1e-9 * max(np.max(np.abs(x_bounds)), np.max(np.abs(y_bounds)), 1.)
+
+    if hint_mask is None:
+        hint_mask = np.zeros(grid.shape, dtype=bool)
+    ret = np.ones(grid.shape, dtype=bool)
+    boundary = np.zeros(grid.shape, dtype=bool)
+
+    for row in np.flatnonzero(np.invert(hint_mask.all(axis=1))):
+        lower, upper = row_lower[row], row_upper[row]
+
+        # Rasterize edges passing through the row band. The x-extent of an edge clipped to the band identifies the cells
+        # it touches.
+        select = np.logical_and(edge_upper >= lower - eps, edge_lower <= upper + eps)
+        if cols_ordered:
+            clip_lower = np.clip(lower, edge_lower[select], edge_upper[select])
+            clip_upper = np.clip(upper, edge_lower[select], edge_upper[select])
+            xa = np.where(is_horizontal[select], x0[select], x0[select] + (clip_lower - y0[select]) * slope[select])
+            xb = np.where(is_horizontal[select], x1[select], x0[select] + (clip_upper - y0[select]) * slope[select])
+            start = np.searchsorted(col_upper_sorted, np.minimum(xa, xb) - eps, side='left')
+            stop = np.searchsorted(col_lower_sorted, np.maximum(xa, xb) + eps, side='right')
+            touched = start < stop
+            counts = np.zeros(grid.shape[1] + 1, dtype=int)
+            np.add.at(counts, start[touched], 1)
+            np.add.at(counts, stop[touched], -1)
+            boundary[row, col_order] = np.cumsum(counts)[:-1] > 0
+        elif select.any():
+            boundary[row, :] = True
+
+        # Classify the remaining cells using the crossings of a horizontal line through the row center.
+        center = (lower + upper) / 2.
+        crossing = (y0 <= center) != (y1 <= center)
+        crossing_x = np.sort(x0[crossing] + (center - y0[crossing]) * slope[crossing])
+        inside = np.searchsorted(crossing_x, col_center, side='right') % 2 == 1
+        ret[row, :] = np.invert(inside)
+
+    # Test the boundary cells with Shapely.
+    boundary = np.logical_and(boundary, np.invert(hint_mask))
+    if boundary.any():
+        geoms = get_polygon_geometry_array(grid, np.zeros(grid.shape, dtype=object), hint_mask=np.invert(boundary))
+        itr = ((idx, geoms[idx]) for idx in zip(*np.nonzero(boundary)))
+        gp = GeometryProcessor(itr, subset_geom, keep_touches=keep_touches)
+        for idx, intersects_logical, _ in gp.iter_intersects():
+            ret[idx] = not intersects_logical
+
+    ret[hint_mask] = True
+    return ret
+
+
 def grid_set_geometry_variable_on_parent(func, grid, name, alloc_only=False):
     dimensions = [d.name for d in grid.dimensions]
     ret = get_geometry_variable(func, grid, name=name, attrs={'axis': 'geom'}, alloc_only=alloc_only,
@@ -1279,6 +1481,15 @@ def grid_set_geometry_variable_on_parent(func, grid, name, alloc_only=False):
     return ret
 
 
+def _get_geometry_indices_(grid, hint_mask):
+    # Row and column indices (in row-major order) of the elements requiring a geometry.
+    if hint_mask is None:
+        select = np.ones(grid.shape, dtype=bool)
+    else:
+        select = np.invert(hint_mask)
+    return np.nonzero(select)
+
+
 def grid_set_mask_cascade(grid):
     members = grid.get_member_variables(include_bounds=True)
     grid.parent.set_mask(grid.mask_variable, exclude=members)
@@ -1,19 +1,52 @@
-from rtree import index
+import hashlib
+import os
+import time
+import uuid
+
+import numpy as np
+import six
+from ocgis.constants import SpatialIndexBackend
+from ocgis.util.shapely_array import STRtree, get_intersects_array, get_touches_array, prepare_geometry, \
+    get_total_bounds_array
 from shapely.prepared import prep
 
+try:
+    from rtree import index
+except ImportError:
+    # "rtree" is optional if the STRtree backend is used.
+    index = None
+
 
 class SpatialIndex(object):
     """
-    Create and access spatial indexes using the :mod:`rtree` module.
-    
-    :param str path: If provided, this is the path to pre-computed spatial index file in the ``rtree`` format.
+    Create and access spatial indexes using the :mod:`rtree` module or a Shapely STRtree.
+
+    :param str path: If provided, this is the path to pre-computed spatial index file in the ``rtree`` format. If
+     ``geometries`` are also provided, the index is created at this path.
+    :param geometries: If provided, bulk load the index from this sequence of geometries. Geometry identifiers are
+     their positions in the sequence. Required for the STRtree backend.
+    :type geometries: :class:`numpy.ndarray` | sequence of :class:`shapely.geometry.base.BaseGeometry`
+    :param str backend: The index implementation. See :class:`~ocgis.constants.SpatialIndexBackend`.
     """
 
-    def __init__(self, path=None):
-        if path is None:
-            self._index = index.Index()
+    def __init__(self, path=None, geometries=None, backend=SpatialIndexBackend.RTREE):
+        self.backend = backend
+
+        if backend == SpatialIndexBackend.RTREE:
+            # If geometries are provided with a path, the bulk loaded index is written to disk at the path.
+            args = [] if path is None else [path]
+            if geometries is not None and len(geometries) > 0:
+                # Stream loading builds the tree in bulk as opposed to inserting one geometry at a time.
+                args.append(((ii, geom.bounds, None) for ii, geom in enumerate(geometries)))
+            self._index = index.Index(*args)
+        elif backend == SpatialIndexBackend.STRTREE:
+            if STRtree is None:
+                raise ValueError('The STRtree spatial index backend requires Shapely 2.0 or later.')
+            if geometries is None:
+                raise ValueError('The STRtree spatial index backend must be bulk loaded with geometries.')
+            self._index = STRtree(np.asarray(geometries, dtype=object).reshape(-1))
         else:
-            self._index = index.Rtree(path)
+            raise ValueError('Spatial index backend not recognized: {}'.format(backend))
 
     def add(self, id_geom, shapely_geom):
         """
@@ -23,6 +56,9 @@ class SpatialIndex(object):
         :param :class:`shapely.geometry.Geometry` shapely_geom: The geometry to add to the spatial index. The bounds
          attribute of the geometry is added to the index.
         """
+        if self.backend != SpatialIndexBackend.RTREE:
+            raise ValueError('Geometries may only be added to an "rtree" spatial index.')
+
         try:
             self._index.insert(id_geom, shapely_geom.bounds)
         except AttributeError:
@@ -31,6 +67,70 @@ class SpatialIndex(object):
             for ig, sg in zip(id_geom, shapely_geom):
                 _insert(ig, sg.bounds)
 
+    def __len__(self):
+        if self.backend == SpatialIndexBackend.STRTREE:
+            ret = len(self._index)
+        else:
+            ret = self._index.get_size()
+        return ret
+
+    @property
+    def bounds(self):
+        """
+        :returns: The extent of the indexed geometries ``(minx, miny, maxx, maxy)``.
+        :rtype: :class:`numpy.ndarray`
+        """
+
+        if self.backend == SpatialIndexBackend.STRTREE:
+            ret = get_total_bounds(self._index.geometries)
+        else:
+            ret = np.array(self._index.bounds, dtype=float)
+        return ret
+
+    def close(self):
+        """
+        Close the index flushing any disk-based ``rtree`` index to its files.
+        """
+
+        if self.backend == SpatialIndexBackend.RTREE:
+            self._index.close()
+
+    def get_intersects(self, shapely_geom, arr, keep_touches=True):
+        """
+        Return the unique identifiers of the geometries intersecting the target geometry. Candidates are selected with
+        the index and predicates are evaluated in bulk if supported by Shapely.
+
+        :param shapely_geom: The geometry to use for subsetting.
+        :type shapely_geom: :class:`shapely.geometry.Geometry`
+        :param arr: Array of geometry objects to spatially evaluate indexed by the unique identifiers.
+        :type arr: :class:`~numpy.ndarray`
+        :param bool keep_touches: If ``True``, return the unique identifiers of geometries only touching the subset
+         geometry.
+        :returns: Sorted integer unique identifiers.
+        :rtype: :class:`~numpy.ndarray`
+        """
+
+        if self.backend == SpatialIndexBackend.STRTREE:
+            ret = self._index.query(shapely_geom, predicate='intersects')
+            if not keep_touches and ret.size > 0:
+                ret = np.setdiff1d(ret, self._index.query(shapely_geom, predicate='touches'))
+            ret = np.sort(ret)
+        else:
+            candidates = self.query(shapely_geom)
+            geoms = np.asarray(arr, dtype=object).reshape(-1)[candidates]
+            if get_intersects_array is None:
+                prepared = prep(shapely_geom)
+                select = np.array([prepared.intersects(g) for g in geoms], dtype=bool)
+                if not keep_touches:
+                    select[select] = [not shapely_geom.touches(g) for g in geoms[select]]
+            else:
+                prepare_geometry(shapely_geom)
+                select = get_intersects_array(shapely_geom, geoms)
+                if not keep_touches and select.any():
+                    select[select] = np.invert(get_touches_array(shapely_geom, geoms[select]))
+            ret = candidates[select]
+        return ret
+
     def iter_intersects(self, shapely_geom, arr, keep_touches=True):
         """
         Return an iterator for the unique identifiers of the geometries intersecting the target geometry.
@@ -83,5 +183,283 @@ class SpatialIndex(object):
             for idd in ids:
                 yield idd
 
+    def query(self, shapely_geom):
+        """
+        :param shapely_geom: The geometry to use for subsetting. Only its bounding box is tested.
+        :type shapely_geom: :class:`shapely.geometry.Geometry`
+        :returns: Sorted integer unique identifiers of the candidate geometries with bounding boxes intersecting the
+         bounding box of ``shapely_geom``.
+        :rtype: :class:`~numpy.ndarray`
+        """
+
+        if self.backend == SpatialIndexBackend.STRTREE:
+            ret = self._index.query(shapely_geom)
+        else:
+            ret = np.fromiter(self._get_intersection_rtree_(shapely_geom), dtype=int)
+        return np.sort(ret)
+
     def _get_intersection_rtree_(self, shapely_geom):
-        return self._index.intersection(shapely_geom.bounds)
+        if self.backend == SpatialIndexBackend.STRTREE:
+            ret = self.query(shapely_geom).tolist()
+        else:
+            ret = self._index.intersection(shapely_geom.bounds)
+        return ret
+
+
+class SpatialIndexCache(object):
+    """
+    Persist bulk loaded ``rtree`` spatial indexes for geometry variables read from files. Entries are keyed by the
+    source file paths, modification times, and sizes, the variable and dimension names, the source indices of the
+    variable, the mask of the indexed geometries, the coordinate system, and the wrapped state. An entry is rebuilt if
+    its extent does not match the extent of the geometries being indexed. Entries are shared between processes using
+    the same cache directory.
+
+    The ``rtree`` index files store the bounding box of each indexed geometry so cached entries are used without
+    recomputing geometry bounds.
+
+    :param str directory: The cache directory. It is created if it does not exist.
+    :param int max_size: If provided, the maximum total size of cache entries in bytes. The least recently used entries
+     are removed when the size is exceeded.
+    :param float max_age: If provided, the maximum time in seconds since an entry was last used. Older entries are
+     removed.
+    """
+
+    _extensions = ('dat', 'idx')
+
+    def __init__(self, directory, max_size=None, max_age=None):
+        self.directory = directory
+        self.max_size = max_size
+        self.max_age = max_age
+
+        try:
+            os.makedirs(directory)
+        except OSError:
+            if not os.path.isdir(directory):
+                raise
+
+    def evict(self):
+        """
+        Remove cache entries exceeding the maximum age and then the least recently used entries exceeding the maximum
+        size.
+        """
+
+        entries = {}
+        for filename in os.listdir(self.directory):
+            key, _, extension = filename.partition('.')
+            if extension not in self._extensions:
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, filename))
+            except OSError:
+                # Removed by another process.
+                continue
+            mtime, size = entries.get(key, (0, 0))
+            entries[key] = (max(mtime, stat.st_mtime), size + stat.st_size)
+
+        now = time.time()
+        total_size = 0
+        for key, (mtime, size) in sorted(entries.items(), key=lambda x: x[1][0], reverse=True):
+            if self.max_age is not None and now - mtime > self.max_age:
+                self.remove(key)
+            elif '-' not in key:
+                # Entries being written by another process are only removed when they exceed the maximum age.
+                total_size += size
+                if self.max_size is not None and total_size > self.max_size:
+                    self.remove(key)
+
+    def get_key(self, gvar, mask=None):
+        """
+        :param gvar: The geometry variable to index.
+        :type gvar: :class:`~ocgis.GeometryVariable`
+        :param mask: The mask of the geometry variable excluding geometries from the index.
+        :type mask: :class:`numpy.ndarray`
+        :return: The cache key for the geometry variable. ``None`` is returned if the variable is not associated with
+         source files.
+        :rtype: str | None
+        """
+
+        request_dataset = getattr(gvar, '_request_dataset', None)
+        if request_dataset is None or request_dataset.uri is None:
+            return None
+
+        parts = []
+        uris = request_dataset.uri
+        if isinstance(uris, six.string_types):
+            uris = [uris]
+        for uri in uris:
+            try:
+                stat = os.stat(uri)
+            except (OSError, TypeError):
+                # Not a local file (e.g. an OpenDAP URL).
+                return None
+            parts.append((os.path.abspath(uri), stat.st_mtime, stat.st_size))
+
+        parts.append((gvar.name, gvar.source_name))
+        for dimension in gvar.dimensions:
+            src_idx = dimension._src_idx
+            if isinstance(src_idx, np.ndarray):
+                src_idx = hashlib.sha1(np.ascontiguousarray(src_idx)).hexdigest()
+            parts.append((dimension.name, len(dimension), src_idx))
+        if mask is not None:
+            parts.append((mask.shape, hashlib.sha1(np.packbits(mask)).hexdigest()))
+        crs = gvar.crs
+        if crs is not None:
+            crs = crs.value
+            if isinstance(crs, dict):
+                crs = sorted(crs.items())
+        parts.append(crs)
+        parts.append(self._get_wrapped_state_(gvar, mask))
+
+        return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+    def get_path(self, key):
+        """
+        :param str key: The cache key.
+        :return: The base path of the ``rtree`` index files for the key.
+        :rtype: str
+        """
+
+        return os.path.join(self.directory, key)
+
+    def get_spatial_index(self, gvar, geometries, mask=None, key=None):
+        """
+        Get a spatial index from the cache, creating and persisting it if it does not exist. If the geometry variable is
+        not associated with source files, the spatial index is created in memory.
+
+        :param gvar: The geometry variable to index.
+        :type gvar: :class:`~ocgis.GeometryVariable`
+        :param geometries: The unmasked geometries to index.
+        :type geometries: :class:`numpy.ndarray`
+        :param mask: The mask of the geometry variable used to select ``geometries``.
+        :type mask: :class:`numpy.ndarray`
+        :param str key: The cache key if already computed with :meth:`~ocgis.spatial.index.SpatialIndexCache.get_key`.
+        :rtype: :class:`~ocgis.spatial.index.SpatialIndex`
+        """
+
+        if key is None:
+            key = self.get_key(gvar, mask=mask)
+        if key is None:
+            return SpatialIndex(geometries=geometries)
+
+        path = self.get_path(key)
+        ret = None
+        # The index file is written last when an entry is created.
+        if os.path.exists('{}.idx'.format(path)):
+            try:
+                ret = SpatialIndex(path=path)
+            except Exception:
+                # The entry may be partially written or evicted by another process.
+                ret = None
+            else:
+                # Geometries modified in memory in ways not captured by the key invalidate the entry.
+                if len(ret) != len(geometries) or \
+                        (len(geometries) > 0 and not np.array_equal(ret.bounds, get_total_bounds(geometries))):
+                    ret.close()
+                    ret = None
+                else:
+                    # Refresh the entry's last use time.
+                    for extension in self._extensions:
+                        try:
+                            os.utime('{}.{}'.format(path, extension), None)
+                        except OSError:
+                            pass
+
+        if ret is None:
+            # Write to a temporary path and move the files into place so other processes do not read a partial index.
+            tmp_path = '{}-{}'.format(path, uuid.uuid4().hex)
+            si = SpatialIndex(path=tmp_path, geometries=geometries)
+            si.close()
+            for extension in self._extensions:
+                os.rename('{}.{}'.format(tmp_path, extension), '{}.{}'.format(path, extension))
+            ret = SpatialIndex(path=path)
+            self.evict()
+
+        return ret
+
+    @staticmethod
+    def _get_wrapped_state_(gvar, mask):
+        # Wrapping and unwrapping modify geometries in memory. The wrapped state is determined from the x-coordinate
+        # extent of the local geometries as "wrapped_state" requires collective communication.
+        ret = gvar._wrapped_state
+        if ret == 'auto':
+            crs = gvar.crs
+            if crs is None or not crs.is_wrappable:
+                ret = None
+            else:
+                geometries = np.ma.array(gvar.get_value(), mask=mask).compressed()
+                if len(geometries) == 0:
+                    ret = None
+                else:
+                    ret = crs._get_wrapped_state_from_array_(get_total_bounds(geometries)[[0, 2]])
+        return ret
+
+    def remove(self, key):
+        """
+        :param str key: The cache key of the entry to remove.
+        """
+
+        path = self.get_path(key)
+        for extension in self._extensions:
+            try:
+                os.remove('{}.{}'.format(path, extension))
+            except OSError:
+                # Removed by another process.
+                pass
+
+
+def get_total_bounds(geometries):
+    """
+    :param geometries: Sequence of geometries.
+    :type geometries: :class:`numpy.ndarray` | sequence of :class:`shapely.geometry.base.BaseGeometry`
+    :returns: The extent of the geometries ``(minx, miny, maxx, maxy)``.
+    :rtype: :class:`numpy.ndarray`
+    """
+
+    if get_total_bounds_array is None:
+        bounds = np.array([geom.bounds for geom in geometries], dtype=float).reshape(-1, 4)
+        ret = np.hstack([bounds[:, 0:2].min(axis=0), bounds[:, 2:4].max(axis=0)])
+    else:
+        ret = get_total_bounds_array(np.asarray(geometries, dtype=object).reshape(-1))
+    return ret
+
+
+def get_spatial_index_backend(use_spatial_index):
+    """
+    Select the spatial index backend.
+
+    :param use_spatial_index: A backend name or ``True``. If ``True``, use the STRtree backend if Shapely supports it.
+     Otherwise, use the ``rtree`` backend. See :attr:`ocgis.env.USE_SPATIAL_INDEX`.
+    :type use_spatial_index: bool | str
+    :rtype: str
+    """
+
+    if isinstance(use_spatial_index, six.string_types):
+        if use_spatial_index not in (SpatialIndexBackend.RTREE, SpatialIndexBackend.STRTREE):
+            raise ValueError('Spatial index backend not recognized: {}'.format(use_spatial_index))
+        ret = use_spatial_index
+    elif STRtree is None:
+        ret = SpatialIndexBackend.RTREE
+    else:
+        ret = SpatialIndexBackend.STRTREE
+    return ret
+
+
+def get_spatial_index_cache(use_spatial_index):
+    """
+    :param use_spatial_index: A backend name or ``True``. See :attr:`ocgis.env.USE_SPATIAL_INDEX`. Only ``rtree``
+     spatial indexes are persisted so the cache is used if this is ``True`` or ``'rtree'``.
+    :type use_spatial_index: bool | str
+    :return: The spatial index cache configured by :attr:`ocgis.env.DIR_SPATIAL_INDEX_CACHE` or ``None`` if caching is
+     disabled or not supported by the spatial index configuration.
+    :rtype: :class:`~ocgis.spatial.index.SpatialIndexCache` | None
+    """
+
+    from ocgis import env
+
+    directory = env.DIR_SPATIAL_INDEX_CACHE
+    if directory is None or index is None or use_spatial_index not in (True, SpatialIndexBackend.RTREE):
+        ret = None
+    else:
+        ret = SpatialIndexCache(directory, max_size=env.SPATIAL_INDEX_CACHE_MAX_SIZE,
+                                max_age=env.SPATIAL_INDEX_CACHE_MAX_AGE)
+    return ret
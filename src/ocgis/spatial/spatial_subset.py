@@ -4,10 +4,51 @@ from ocgis import env, vm
 from ocgis.base import raise_if_empty, AbstractOcgisObject
 from ocgis.collection.field import Field
 from ocgis.constants import WrappedState
+from ocgis.util.shapely_array import prepare_geometry
 from ocgis.variable.crs import CFRotatedPole, CFSpherical, Spherical
 from ocgis.variable.geom import GeometryVariable
 
 
+class PreparedGeometryCache(AbstractOcgisObject):
+    """
+    Cache selection geometries prepared for spatial subsetting. Entries are keyed by the selection geometry's unique
+    identifier and the preparation state (i.e. the target coordinate system, wrapped state, and buffer). Entries are
+    only reused for selection geometries equal to the geometry used to create them in the same source coordinate
+    system.
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    def __len__(self):
+        return sum([len(v) for v in self._entries.values()])
+
+    def get(self, geom, key, create):
+        """
+        Get a prepared geometry, creating it if it does not exist.
+
+        :param geom: The source selection geometry. It must have a unique identifier to be cached.
+        :type geom: :class:`~ocgis.GeometryVariable`
+        :param tuple key: The preparation state.
+        :param create: A callable with no arguments returning the prepared object.
+        :return: The prepared object. It is shared by all requests for the entry and should not be modified.
+        """
+
+        ugid = geom.ugid
+        if ugid is None:
+            return create()
+
+        source = geom.get_value().flatten()[0]
+        entries = self._entries.setdefault(ugid.get_value().flatten()[0], [])
+        for entry_source, entry_crs, entry_key, entry_value in entries:
+            if entry_key == key and entry_crs == geom.crs and entry_source.equals_exact(source, 0):
+                return entry_value
+
+        ret = create()
+        entries.append((source, geom.crs, key, ret))
+        return ret
+
+
 class SpatialSubsetOperation(AbstractOcgisObject):
     """
     Perform spatial subsets using :class:`~ocgis.Field` objects.
@@ -22,11 +63,14 @@ class SpatialSubsetOperation(AbstractOcgisObject):
      ``False``, unwrap the coordinates. A "wrapped" spherical coordinate system has a longitudinal domain from -180 to
      180 degrees.
     :type wrap: bool
+    :param geometry_cache: If provided, reuse selection geometries prepared for other fields with the same coordinate
+     system and wrapped state.
+    :type geometry_cache: :class:`~ocgis.spatial.spatial_subset.PreparedGeometryCache`
     """
 
     _rotated_pole_destination_crs = env.DEFAULT_COORDSYS
 
-    def __init__(self, field, output_crs='input', wrap=None):
+    def __init__(self, field, output_crs='input', wrap=None, geometry_cache=None):
         if not isinstance(field, Field):
             raise ValueError('"field" must be an "Field" object.')
         raise_if_empty(field)
@@ -34,6 +78,7 @@ class SpatialSubsetOperation(AbstractOcgisObject):
         self.field = field
         self.output_crs = output_crs
         self.wrap = wrap
+        self.geometry_cache = geometry_cache
 
         self._original_rotated_pole_state = None
         self._transformed_unwrapped_select = None
@@ -225,6 +270,14 @@ class SpatialSubsetOperation(AbstractOcgisObject):
         """
         assert isinstance(geom, GeometryVariable)
 
+        if self.geometry_cache is None:
+            ret = self._create_prepared_geometry_(geom)
+        else:
+            key = ('subset', self.field.crs, self.field.wrapped_state)
+            ret = self.geometry_cache.get(geom, key, lambda: self._create_prepared_geometry_(geom))
+        return ret
+
+    def _create_prepared_geometry_(self, geom):
         # The subset geometry may be modified during this transaction. Use a deep copy to preserve the original
         # geometry's state to avoid error accumulations during transformations.
         prepared = geom.deepcopy()
@@ -253,6 +306,10 @@ class SpatialSubsetOperation(AbstractOcgisObject):
             if prepared_wrapped_state == WrappedState.UNWRAPPED:
                 prepared.wrap()
 
+        if prepare_geometry is not None:
+            # Prepare the geometry in place for repeated spatial predicates.
+            prepare_geometry(prepared.get_value().flatten()[0])
+
         return prepared
 
     def _finalize_target(self):
@@ -0,0 +1,295 @@
+import hashlib
+import os
+
+import numpy as np
+from ocgis.constants import SpatialIndexBackend
+from ocgis.spatial.index import SpatialIndex
+from ocgis.util.lru import LRUCache
+from ocgis.util.shapely_array import get_area_array, get_intersection_array, STRtree
+from ocgis.variable.geom import GeometryVariable
+
+
+class OverlapWeights(object):
+    """
+    Sparse matrix of overlap weights between the cells of a spatial object and a set of selection geometries. The
+    matrix has a row for each cell (flattened in C order) and a column for each selection geometry. It is stored in
+    coordinate format with one entry for each intersecting cell and selection geometry pair.
+
+    For cells with an area, an entry is the area of the cell's intersection with the selection geometry. Cells without
+    an area (points) have entries of ``1.0`` consistent with :attr:`ocgis.GeometryVariable.weights`.
+
+    >>> weights = OverlapWeights.from_geometries(field.grid.get_abstraction_geometry(), geometries, ugids=ugids)
+    >>> averages = weights.apply(field['tas'].get_masked_value())
+
+    :param rows: Flat cell indices for the matrix entries.
+    :type rows: :class:`numpy.ndarray`
+    :param columns: Selection geometry indices for the matrix entries.
+    :type columns: :class:`numpy.ndarray`
+    :param values: The matrix entries.
+    :type values: :class:`numpy.ndarray`
+    :param tuple spatial_shape: The shape of the cell array.
+    :param ugids: Unique identifiers for the selection geometries ordered like the matrix columns.
+    :type ugids: :class:`numpy.ndarray`
+    :param str key: An optional key identifying the cells and selection geometries. See
+     :func:`~ocgis.spatial.weights.get_overlap_weights_key`.
+    """
+
+    def __init__(self, rows, columns, values, spatial_shape, ugids, key=None):
+        # Entries are sorted by column so column sums are computed with contiguous reductions.
+        sindices = np.argsort(columns, kind='mergesort')
+        self.rows = np.asarray(rows, dtype=np.int64)[sindices]
+        self.columns = np.asarray(columns, dtype=np.int64)[sindices]
+        self.values = np.asarray(values, dtype=float)[sindices]
+        self.spatial_shape = tuple(int(s) for s in spatial_shape)
+        self.ugids = np.asarray(ugids)
+        self.key = key
+
+    @property
+    def nbytes(self):
+        return self.rows.nbytes + self.columns.nbytes + self.values.nbytes + self.ugids.nbytes
+
+    @property
+    def shape(self):
+        """
+        :return: ``(<cell count>, <selection geometry count>)``
+        :rtype: tuple
+        """
+
+        return int(np.prod(self.spatial_shape)), self.ugids.shape[0]
+
+    def apply(self, value):
+        """
+        Compute weighted averages of values for each selection geometry. Masked values are excluded and the weights of
+        the remaining values are normalized.
+
+        :param value: The values to average. The trailing dimensions must match the spatial shape.
+        :type value: :class:`numpy.ndarray` | :class:`numpy.ma.MaskedArray`
+        :return: A masked array with the leading (non-spatial) dimensions of ``value`` and a trailing dimension for the
+         selection geometries. Averages are masked for selection geometries without unmasked values.
+        :rtype: :class:`numpy.ma.MaskedArray`
+        """
+
+        ndim_spatial = len(self.spatial_shape)
+        if tuple(value.shape[-ndim_spatial:]) != self.spatial_shape:
+            raise ValueError('The trailing value dimensions {} do not match the spatial shape {}.'.format(
+                value.shape[-ndim_spatial:], self.spatial_shape))
+
+        lead_shape = value.shape[:-ndim_spatial]
+        ncells, ncolumns = self.shape
+        flat_value = value.reshape(-1, ncells)
+        entries = np.ma.getdata(flat_value)[:, self.rows]
+        weights = np.ma.getmaskarray(flat_value)[:, self.rows]
+        weights = np.invert(weights) * self.values
+        entries = np.where(weights == 0, 0, entries) * weights
+
+        numerator = np.zeros((flat_value.shape[0], ncolumns), dtype=float)
+        denominator = np.zeros_like(numerator)
+        if self.columns.size > 0:
+            columns, starts = np.unique(self.columns, return_index=True)
+            numerator[:, columns] = np.add.reduceat(entries, starts, axis=1)
+            denominator[:, columns] = np.add.reduceat(weights, starts, axis=1)
+
+        empty = denominator == 0
+        denominator[empty] = 1.0
+        ret = np.ma.array(numerator / denominator, mask=empty)
+        return ret.reshape(lead_shape + (ncolumns,))
+
+    @classmethod
+    def from_geometries(cls, cells, geometries, ugids=None, key=None):
+        """
+        Create overlap weights by intersecting cell geometries with selection geometries. The cells and selection
+        geometries must share a coordinate system.
+
+        :param cells: The cell geometries. Masked cells are excluded from the matrix.
+        :type cells: :class:`~ocgis.GeometryVariable`
+        :param geometries: The selection geometries.
+        :type geometries: sequence of :class:`shapely.geometry.base.BaseGeometry`
+        :param ugids: Unique identifiers for the selection geometries. If ``None``, use one-based indices.
+        :type ugids: sequence of int
+        :param str key: An optional key identifying the cells and selection geometries.
+        :rtype: :class:`~ocgis.spatial.weights.OverlapWeights`
+        """
+
+        geometries = list(geometries)
+        cell_value = cells.get_masked_value()
+        cell_indices = np.flatnonzero(np.invert(np.ma.getmaskarray(cell_value)).reshape(-1))
+        cell_geometries = np.ma.getdata(cell_value).reshape(-1)[cell_indices]
+        if ugids is None:
+            ugids = np.arange(1, len(geometries) + 1)
+
+        rows = []
+        columns = []
+        if cell_geometries.size > 0:
+            if STRtree is None:
+                backend = SpatialIndexBackend.RTREE
+            else:
+                backend = SpatialIndexBackend.STRTREE
+            si = SpatialIndex(geometries=cell_geometries, backend=backend)
+            for column, geom in enumerate(geometries):
+                intersects = si.get_intersects(geom, cell_geometries)
+                rows.append(intersects)
+                columns.append(np.repeat(column, intersects.size))
+        rows = np.hstack(rows + [np.zeros(0, dtype=int)]).astype(int)
+        columns = np.hstack(columns + [np.zeros(0, dtype=int)]).astype(int)
+
+        # Intersection areas for cells with an area. Point cells are counted.
+        pair_cells = cell_geometries[rows]
+        if get_area_array is None:
+            cell_areas = np.array([g.area for g in pair_cells], dtype=float)
+            values = np.array([g.intersection(geometries[c]).area if a > 0 else 1.0 for g, c, a in
+                               zip(pair_cells, columns, cell_areas)], dtype=float)
+        else:
+            cell_areas = get_area_array(pair_cells)
+            pair_geometries = np.empty(columns.size, dtype=object)
+            pair_geometries[:] = [geometries[c] for c in columns]
+            values = np.ones(columns.size, dtype=float)
+            has_area = cell_areas > 0
+            values[has_area] = get_area_array(get_intersection_array(pair_cells[has_area],
+                                                                     pair_geometries[has_area]))
+        # Cells only touching a selection geometry do not contribute.
+        select = values > 0
+
+        return cls(cell_indices[rows[select]], columns[select], values[select], cell_value.shape, ugids, key=key)
+
+    @classmethod
+    def read(cls, path):
+        """
+        :param str path: Path to overlap weights written by :meth:`~ocgis.spatial.weights.OverlapWeights.write`.
+        :rtype: :class:`~ocgis.spatial.weights.OverlapWeights`
+        """
+
+        with np.load(path) as data:
+            key = data['key'].item()
+            if key == '':
+                key = None
+            ret = cls(data['rows'], data['columns'], data['values'], data['spatial_shape'], data['ugids'], key=key)
+        return ret
+
+    def write(self, path):
+        """
+        Write the overlap weights to a NumPy ``.npz`` file.
+
+        :param str path: The output path.
+        """
+
+        key = '' if self.key is None else self.key
+        # Write to a file object so NumPy does not append an extension to the path.
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, rows=self.rows, columns=self.columns, values=self.values,
+                                spatial_shape=np.array(self.spatial_shape, dtype=np.int64), ugids=self.ugids,
+                                key=np.array(key))
+
+
+def get_overlap_weights(spatial, geometries, ugids=None, path=None):
+    """
+    Get overlap weights between a grid or geometry variable and selection geometries. Weights are reused from the
+    process-level cache (see :attr:`ocgis.env.OVERLAP_WEIGHTS_CACHE_MAX_SIZE`) or a sidecar file when their keys
+    match. Otherwise, the weights are computed and stored.
+
+    :param spatial: The spatial object providing the cell geometries.
+    :type spatial: :class:`~ocgis.Grid` | :class:`~ocgis.GeometryVariable`
+    :param geometries: The selection geometries in the coordinate system of ``spatial``.
+    :type geometries: sequence of :class:`shapely.geometry.base.BaseGeometry`
+    :param ugids: Unique identifiers for the selection geometries. If ``None``, use one-based indices.
+    :type ugids: sequence of int
+    :param str path: Optional path to a ``.npz`` sidecar file. The weights are read from the file if its key matches.
+     If not, the weights are computed and written to the path.
+    :rtype: :class:`~ocgis.spatial.weights.OverlapWeights`
+    """
+
+    from ocgis import env
+
+    if ugids is None:
+        ugids = np.arange(1, len(geometries) + 1)
+    key = get_overlap_weights_key(spatial, geometries, ugids)
+
+    cache = None
+    ret = None
+    if env.OVERLAP_WEIGHTS_CACHE_MAX_SIZE:
+        cache = _overlap_weights_cache
+        cache.set_max_size(env.OVERLAP_WEIGHTS_CACHE_MAX_SIZE)
+        ret = cache.get(key)
+        if ret is not None:
+            # The sidecar file is written for weights found in the process-level cache if it does not exist or its key
+            # does not match.
+            if path is not None and _get_sidecar_key_(path) != key:
+                ret.write(path)
+            return ret
+
+    if path is not None and os.path.exists(path):
+        ret = OverlapWeights.read(path)
+        if ret.key != key:
+            ret = None
+
+    if ret is None:
+        ret = OverlapWeights.from_geometries(_get_cells_(spatial), geometries, ugids=ugids, key=key)
+        if path is not None:
+            ret.write(path)
+
+    if cache is not None:
+        cache.put(key, ret, size=ret.nbytes)
+
+    return ret
+
+
+def get_overlap_weights_key(spatial, geometries, ugids):
+    """
+    :param spatial: The spatial object providing the cell geometries.
+    :type spatial: :class:`~ocgis.Grid` | :class:`~ocgis.GeometryVariable`
+    :param geometries: The selection geometries.
+    :type geometries: sequence of :class:`shapely.geometry.base.BaseGeometry`
+    :param ugids: Unique identifiers for the selection geometries.
+    :type ugids: sequence of int
+    :return: A key identifying the cell geometries, their mask and coordinate system, and the selection geometries.
+    :rtype: str
+    """
+
+    sha = hashlib.sha1()
+    if not isinstance(spatial, GeometryVariable) and hasattr(spatial, 'x'):
+        # Grid cells are defined by their coordinates. These are cheaper to hash than the cell geometries.
+        sha.update(repr((spatial.abstraction, tuple(spatial.shape))).encode('utf-8'))
+        for target in [spatial.x, spatial.y]:
+            sha.update(np.ascontiguousarray(target.get_value()))
+            if spatial.has_bounds:
+                sha.update(np.ascontiguousarray(target.bounds.get_value()))
+        mask = spatial.get_mask()
+    else:
+        cells = _get_cells_(spatial)
+        sha.update(repr(tuple(cells.shape)).encode('utf-8'))
+        for geom in cells.get_masked_value().compressed():
+            sha.update(geom.wkb)
+        mask = cells.get_mask()
+    if mask is not None:
+        sha.update(np.packbits(mask))
+
+    crs = spatial.crs
+    if crs is not None:
+        crs = crs.value
+        if isinstance(crs, dict):
+            crs = sorted(crs.items())
+    sha.update(repr(crs).encode('utf-8'))
+
+    for geom in geometries:
+        sha.update(geom.wkb)
+    sha.update(np.ascontiguousarray(ugids))
+
+    return sha.hexdigest()
+
+
+def _get_sidecar_key_(path):
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return data['key'].item()
+
+
+def _get_cells_(spatial):
+    if isinstance(spatial, GeometryVariable):
+        ret = spatial
+    else:
+        ret = spatial.get_abstraction_geometry()
+    return ret
+
+
+# Process-level overlap weights cache used by get_overlap_weights. Entry sizes are in bytes.
+_overlap_weights_cache = LRUCache()
@@ -6,6 +6,8 @@ from ocgis import OcgOperations, FunctionRegistry
 from ocgis import RequestDataset
 from ocgis import env
 from ocgis.base import get_variable_names
+from ocgis.calc.cache import CalculationCache
+from ocgis.calc.library.statistics import Mean, Max, StandardDeviation
 from ocgis.calc.base import AbstractUnivariateFunction, AbstractUnivariateSetFunction, AbstractFunction, \
     AbstractMultivariateFunction, AbstractParameterizedFunction, AbstractFieldFunction
 from ocgis.collection.field import Field
@@ -400,7 +402,84 @@ class TestAbstractUnivariateFunction(AbstractTestField):
             fnu.execute()
 
 
+class MockMeanLoop(Mean):
+    def calculate(self, values):
+        return super(MockMeanLoop, self).calculate(values)
+
+
 class TestAbstractUnivariateSetFunction(AbstractTestField):
+    def test_execute_grouped(self):
+        """Test vectorized group reductions match the per-group calculation loop."""
+
+        field = self.get_field(with_value=True, month_count=2)
+        mask = field['tmax'].get_mask(create=True)
+        mask[:, 0:5, :, 1, 1] = True
+        field['tmax'].set_mask(mask)
+
+        for grouping in [['month'], ['year'], 'all', [[1], 'year']]:
+            tgd = field.temporal.get_grouping(grouping)
+            grouped = Mean(field=field, tgd=tgd, calc_sample_size=True)
+            self.assertTrue(grouped._get_should_calculate_grouped_(grouped.calculate))
+            loop = MockMeanLoop(field=field, tgd=tgd, calc_sample_size=True)
+            self.assertFalse(loop._get_should_calculate_grouped_(loop.calculate))
+
+            actual = grouped.execute()
+            desired = loop.execute()
+            for name in ['mean', 'n_mean']:
+                self.assertNumpyAll(actual[name].get_mask(), desired[name].get_mask())
+                self.assertNumpyAllClose(actual[name].get_masked_value().compressed(),
+                                         desired[name].get_masked_value().compressed())
+
+    def test_execute_cache(self):
+        """Test calculations on the same field share cached inputs."""
+
+        field = self.get_field(with_value=True, month_count=2)
+        tgd = field.temporal.get_grouping(['month'])
+        desired = [klass(field=field, tgd=tgd).execute() for klass in [Mean, Max]]
+
+        cache = CalculationCache(consumers=2)
+        functions = [klass(field=field, tgd=tgd, cache=cache) for klass in [Mean, Max]]
+        actual = [f.execute() for f in functions]
+        for a, d, name in zip(actual, desired, ['mean', 'max']):
+            self.assertNumpyAll(a[name].get_masked_value(), d[name].get_masked_value())
+
+        # The source value, conformed array, and grouped values are created once.
+        names = [key[1] for key in cache._entries]
+        self.assertEqual(names.count('masked_value'), 1)
+        self.assertEqual(len([n for n in names if n[0] == 'conformed']), 1)
+        shape = field['tmax'].shape
+        self.assertEqual(len([n for n in names if n[0] == 'grouped']), shape[0] * shape[2])
+        self.assertIs(functions[1]._get_source_value_(field['tmax']), functions[0]._get_source_value_(field['tmax']))
+
+        for _ in range(2):
+            cache.release()
+        self.assertEqual(len(cache), 0)
+
+    def test_execute_fuse_statistics(self):
+        """Test fusable set functions sharing a cache reduce the same grouped moments."""
+
+        field = self.get_field(with_value=True, month_count=2)
+        mask = field['tmax'].get_mask(create=True)
+        mask[:, 0:5, :, 1, 1] = True
+        field['tmax'].set_mask(mask)
+        tgd = field.temporal.get_grouping(['month'])
+        klasses = [Mean, StandardDeviation, Max]
+        desired = [klass(field=field, tgd=tgd, calc_sample_size=True).execute() for klass in klasses]
+
+        cache = CalculationCache(consumers=len(klasses), fuse_statistics=True)
+        actual = [klass(field=field, tgd=tgd, calc_sample_size=True, cache=cache).execute() for klass in klasses]
+        names = [key[1] for key in cache._entries]
+        shape = field['tmax'].shape
+        self.assertEqual(len([n for n in names if n[0] == 'moments']), shape[0] * shape[2])
+
+        for a, d, klass in zip(actual, desired, klasses):
+            for name in [klass.key, 'n_{}'.format(klass.key)]:
+                self.assertEqual(a[name].attrs, d[name].attrs)
+                self.assertEqual(a[name].dtype, d[name].dtype)
+                self.assertNumpyAll(a[name].get_mask(), d[name].get_mask())
+                self.assertNumpyAllClose(a[name].get_masked_value().compressed(),
+                                         d[name].get_masked_value().compressed())
+
     def test_validate_units(self):
         field = self.get_field(with_value=True)
         tgd = field.temporal.get_grouping(['month'])
@@ -0,0 +1,70 @@
+import threading
+
+import numpy as np
+from ocgis.calc.cache import CalculationCache
+from ocgis.test.base import TestBase
+
+
+class TestCalculationCache(TestBase):
+    def test_init(self):
+        cache = CalculationCache()
+        self.assertEqual(cache.consumers, 1)
+        self.assertFalse(cache.fuse_statistics)
+        self.assertEqual(len(cache), 0)
+
+    def test_get(self):
+        cache = CalculationCache()
+        source = np.arange(5)
+        created = []
+
+        def create():
+            created.append(True)
+            return source * 2
+
+        actual = cache.get([source], 'foo', create)
+        self.assertNumpyAll(actual, source * 2)
+        self.assertIs(cache.get([source], 'foo', create), actual)
+        self.assertEqual(len(created), 1)
+
+        # Test entries are keyed by source identity and name.
+        self.assertIsNot(cache.get([source.copy()], 'foo', create), actual)
+        self.assertIsNot(cache.get([source], 'bar', create), actual)
+        self.assertEqual(len(created), 3)
+        self.assertEqual(len(cache), 3)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_get_threads(self):
+        cache = CalculationCache()
+        bar_created = threading.Event()
+
+        def create_foo():
+            # Test a different entry is created while this entry is being created.
+            return bar_created.wait(5)
+
+        def create_bar():
+            bar_created.set()
+            return True
+
+        thread = threading.Thread(target=lambda: cache.get([cache], 'foo', create_foo))
+        thread.start()
+        cache.get([cache], 'bar', create_bar)
+        thread.join()
+        self.assertTrue(cache.get([cache], 'foo', create_bar))
+
+        # Test a failed creation is not cached.
+        def create_error():
+            raise ValueError
+
+        with self.assertRaises(ValueError):
+            cache.get([cache], 'error', create_error)
+        self.assertEqual(cache.get([cache], 'error', lambda: 1), 1)
+
+    def test_release(self):
+        cache = CalculationCache(consumers=2)
+        cache.get([object()], 'foo', lambda: 1)
+        cache.release()
+        self.assertEqual(len(cache), 1)
+        cache.release()
+        self.assertEqual(len(cache), 0)
@@ -2,11 +2,12 @@ from copy import deepcopy
 
 import numpy as np
 import ocgis
-from ocgis.base import orphaned
+from ocgis.base import orphaned, get_variable_names
 from ocgis.calc.engine import CalculationEngine
 from ocgis.calc.eval_function import EvalFunction
-from ocgis.calc.library.statistics import Mean
+from ocgis.calc.library.statistics import Mean, Max, StandardDeviation
 from ocgis.collection.spatial import SpatialCollection
+from ocgis.constants import CalcExecutorName
 from ocgis.test.base import TestBase
 from ocgis.test.base import attr
 from ocgis.util.logging_ocgis import ProgressOcgOperations
@@ -81,6 +82,36 @@ class TestCalculationEngine(TestBase):
         desired = (12, 10, 10)
         self.assertEqual(actual, desired)
 
+    @attr('data')
+    def test_execute_executor(self):
+        funcs = [{'ref': Mean, 'name': 'mean', 'kwds': {}, 'func': 'mean'},
+                 {'ref': Max, 'name': 'max', 'kwds': {}, 'func': 'max'},
+                 {'ref': StandardDeviation, 'name': 'std', 'kwds': {}, 'func': 'std'}]
+        rd = self.test_data.get_rd('cancm4_tas')
+        coll = ocgis.OcgOperations(dataset=rd, slice=[None, [0, 700], None, [0, 10], [0, 10]]).execute()
+
+        desired = self.get_engine(funcs=deepcopy(funcs)).execute(deepcopy(coll))
+        desired_field = desired.get_element()
+        for executor in [CalcExecutorName.THREAD, CalcExecutorName.PROCESS]:
+            engine = self.get_engine(funcs=deepcopy(funcs), kwds={'executor': executor, 'workers': 2})
+            actual = engine.execute(deepcopy(coll))
+            actual_field = actual.get_element()
+            # Calculation outputs are assembled in calculation order.
+            self.assertEqual(get_variable_names(actual_field.data_variables), ('mean', 'max', 'std'))
+            self.assertEqual(list(actual_field.keys()), list(desired_field.keys()))
+            for name in ['mean', 'max', 'std']:
+                self.assertNumpyAll(actual_field[name].get_masked_value(), desired_field[name].get_masked_value())
+
+        # Test the executor may be set using the environment.
+        ocgis.env.CALC_EXECUTOR = CalcExecutorName.THREAD
+        actual = self.get_engine(funcs=deepcopy(funcs)).execute(deepcopy(coll))
+        self.assertNumpyAll(actual.get_element()['std'].get_masked_value(), desired_field['std'].get_masked_value())
+
+    def test_execute_executor_bad(self):
+        engine = self.get_engine(kwds={'executor': 'foo'})
+        with self.assertRaises(ValueError):
+            engine.execute(SpatialCollection())
+
     @attr('data')
     def test_execute_tgd(self):
         rd = self.test_data.get_rd('cancm4_tas')
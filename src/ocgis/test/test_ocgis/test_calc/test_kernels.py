@@ -0,0 +1,179 @@
+import itertools
+
+import numpy as np
+from mock import mock
+
+from ocgis.calc.kernels import GroupedValues, GroupedMoments, RunLengths, get_group_index, get_nanpercentile
+from ocgis.test.base import TestBase
+
+
+class TestGroupedMoments(TestBase):
+    def test_reductions(self):
+        np.random.seed(1)
+        group_index = np.repeat(np.arange(5), [5, 10, 0, 15, 10])
+        np.random.shuffle(group_index)
+        for dtype in [float, np.float32, np.int32]:
+            values = (np.random.rand(40, 3, 4) * 100).astype(dtype)
+            mask = np.random.rand(*values.shape) < 0.3
+            mask[:, 0, 0] = True
+            values = np.ma.array(values, mask=mask)
+            grouped = GroupedValues(values, group_index, 5)
+
+            # Test the streaming pass is independent of the chunk size.
+            for chunk_elements in [1, 25, 2 ** 24]:
+                with mock.patch('ocgis.constants.CALC_MAX_CHUNK_ELEMENTS', chunk_elements):
+                    moments = GroupedMoments(grouped)
+                for name in ['mean', 'max', 'min', 'std']:
+                    actual = getattr(moments, name)()
+                    desired = getattr(grouped, name)()
+                    self.assertEqual(actual.shape, (5, 3, 4))
+                    self.assertNumpyAll(actual.mask, desired.mask)
+                    if name in ['max', 'min']:
+                        self.assertNumpyAll(actual, desired)
+                    else:
+                        np.testing.assert_allclose(actual.compressed(), desired.compressed(), rtol=1e-5)
+                self.assertNumpyAll(moments.count(), grouped.count())
+
+
+class TestGroupedValues(TestBase):
+    def get_values_and_groups(self, shuffle=False):
+        np.random.seed(1)
+        values = np.random.rand(40, 3, 4) * 100
+        mask = np.random.rand(*values.shape) < 0.3
+        mask[:, 0, 0] = True
+        values = np.ma.array(values, mask=mask)
+        group_index = np.repeat(np.arange(5), [5, 10, 0, 15, 10])
+        if shuffle:
+            group_index[3] = -1
+            np.random.shuffle(group_index)
+        dgroups = [group_index == ii for ii in range(5)]
+        return values, group_index, dgroups
+
+    def test_init(self):
+        values, group_index, _ = self.get_values_and_groups()
+        gv = GroupedValues(values, group_index, 5)
+        self.assertEqual(gv.group_sizes.tolist(), [5, 10, 0, 15, 10])
+        self.assertEqual(gv.offsets.tolist(), [0, 5, 15, 15, 30])
+        # Ordered groups do not require a copy.
+        self.assertTrue(np.may_share_memory(gv.data, values.data))
+
+    def test_reductions(self):
+        for shuffle in [False, True]:
+            values, group_index, dgroups = self.get_values_and_groups(shuffle=shuffle)
+            gv = GroupedValues(values, group_index, 5)
+            for name in ['mean', 'max', 'min', 'sum', 'std', 'median']:
+                actual = getattr(gv, name)()
+                self.assertEqual(actual.shape, (5, 3, 4))
+                for idx, dgroup in enumerate(dgroups):
+                    if not dgroup.any():
+                        self.assertTrue(actual.mask[idx].all())
+                        continue
+                    desired = getattr(np.ma, name)(values[dgroup], axis=0)
+                    self.assertNumpyAll(actual.mask[idx], np.ma.getmaskarray(desired))
+                    self.assertNumpyAllClose(actual[idx].compressed(), desired.compressed())
+
+    def test_count(self):
+        values, group_index, dgroups = self.get_values_and_groups(shuffle=True)
+        gv = GroupedValues(values, group_index, 5)
+        actual = gv.count(where=gv.data > 50)
+        for idx, dgroup in enumerate(dgroups[0:2]):
+            desired = np.ma.sum(values[dgroup] > 50, axis=0)
+            self.assertEqual(actual[idx].tolist(), desired.tolist())
+
+    def test_sample_size(self):
+        values, group_index, dgroups = self.get_values_and_groups()
+        gv = GroupedValues(values, group_index, 5)
+        actual = gv.sample_size()
+        sub = values[dgroups[1]]
+        self.assertEqual(actual.data[1].tolist(), np.invert(sub.mask).sum(axis=0).tolist())
+        self.assertNumpyAll(actual.mask[1], sub.mask[0])
+
+
+class TestRunLengths(TestBase):
+    def get_condition(self):
+        np.random.seed(1)
+        values = np.ma.array(np.random.rand(30, 3, 4), mask=np.random.rand(30, 3, 4) < 0.1)
+        values.mask[:, 0, 0] = True
+        return values > 0.4
+
+    def get_runs(self, vec):
+        ret = []
+        for key, group in itertools.groupby(vec):
+            if key:
+                ret.append(len(list(group)))
+        return ret
+
+    def test_init(self):
+        condition = np.array([1, 1, 0, 1, 0, 0, 1, 1, 1], dtype=bool).reshape(-1, 1, 1)
+        rl = RunLengths(condition)
+        self.assertEqual(rl.lengths.tolist(), [2, 1, 3])
+        self.assertEqual(rl.start.tolist(), [0, 3, 6])
+        self.assertEqual(rl.cell_index.tolist(), [0, 0, 0])
+
+        # Test masked values interrupt a run.
+        condition = np.ma.array(condition, mask=[0, 0, 0, 0, 0, 0, 0, 1, 0])
+        rl = RunLengths(condition)
+        self.assertEqual(rl.lengths.tolist(), [2, 1, 1, 1])
+
+        # Test an empty time dimension.
+        rl = RunLengths(np.zeros((0, 2, 3), dtype=bool))
+        self.assertEqual(rl.lengths.shape, (0,))
+        self.assertEqual(rl.max().tolist(), np.zeros((2, 3)).tolist())
+
+    def test_histogram(self):
+        condition = self.get_condition()
+        rl = RunLengths(condition)
+        cell_index, length, count = rl.histogram()
+        self.assertNotIn(0, cell_index)
+        filled = np.ma.filled(condition, False)
+        for idx, (row, col) in enumerate(itertools.product(range(3), range(4))):
+            actual_length, actual_count = np.unique(self.get_runs(filled[:, row, col]), return_counts=True)
+            select = cell_index == idx
+            self.assertEqual(length[select].tolist(), actual_length.tolist())
+            self.assertEqual(count[select].tolist(), actual_count.tolist())
+
+    def test_reductions(self):
+        condition = self.get_condition()
+        rl = RunLengths(condition)
+        filled = np.ma.filled(condition, False)
+        for name in ['count', 'max', 'mean', 'median', 'min', 'std', 'sum']:
+            actual = getattr(rl, name)()
+            self.assertEqual(actual.shape, (3, 4))
+            for row, col in itertools.product(range(3), range(4)):
+                runs = self.get_runs(filled[:, row, col])
+                if name == 'count':
+                    desired = len(runs)
+                elif len(runs) == 0:
+                    desired = 0
+                else:
+                    desired = getattr(np, name)(runs)
+                self.assertAlmostEqual(actual[row, col], desired)
+
+
+class Test(TestBase):
+    def test_get_group_index(self):
+        actual = get_group_index([slice(None)], 3)
+        self.assertEqual(actual.tolist(), [0, 0, 0])
+
+        dgroups = [np.array([True, False, False]), np.array([False, False, True])]
+        actual = get_group_index(dgroups, 3)
+        self.assertEqual(actual.tolist(), [0, -1, 1])
+
+        # Overlapping groups cannot be represented by an integer index.
+        dgroups = [np.array([True, True, False]), np.array([False, True, True])]
+        self.assertIsNone(get_group_index(dgroups, 3))
+
+    def test_get_nanpercentile(self):
+        np.random.seed(1)
+        arr = np.random.rand(20, 3, 4)
+        arr[np.random.rand(*arr.shape) < 0.3] = np.nan
+        arr[:, 0, 0] = np.nan
+        for percentile in [0, 25, 50, 90, 100]:
+            actual = get_nanpercentile(arr, percentile)
+            self.assertTrue(np.isnan(actual[0, 0]))
+            desired = [np.percentile(arr[:, ii, jj][np.invert(np.isnan(arr[:, ii, jj]))], percentile)
+                       for ii, jj in itertools.product(range(3), range(4)) if (ii, jj) != (0, 0)]
+            self.assertNumpyAllClose(actual.flatten()[1:], np.array(desired))
+
+        actual = get_nanpercentile(arr, 50, axis=1)
+        self.assertEqual(actual.shape, (20, 4))
@@ -49,6 +49,13 @@ class TestDuration(AbstractCalcBase):
         ret = duration.calculate(values, 4, operation='gte', summary='mean')
         self.assertNumpyAll(np.ma.array([4., 2., 1.5, 1.5], dtype=ret.dtype), ret.flatten())
 
+        # Test the standard deviation of a single duration is the duration
+        values = np.array([1, 5, 5, 5, 5, 5, 1, 5, 1, 5, 1, 5, 1, 1, 5, 5, 1, 5, 1, 1, 1, 1, 1, 1], dtype=float)
+        values = values.reshape(4, 6, 1).swapaxes(0, 1).reshape(6, 2, 2)
+        values = np.ma.array(values, mask=False)
+        ret = duration.calculate(values, 4, operation='gte', summary='std')
+        self.assertNumpyAll(np.ma.array([5., 1., 0.5, 0.], dtype=ret.dtype), ret.flatten())
+
     @attr('data')
     def test_system_standard_operations(self):
         ret = self.run_standard_operations(
@@ -77,3 +84,15 @@ class TestFrequencyDuration(AbstractCalcBase):
         self.assertEqual(ret.flatten()[0].dtype.names, ('duration', 'count'))
         self.assertNumpyAll(np.array([2, 3, 5]), ret.flatten()[0]['duration'])
         self.assertNumpyAll(np.array([2, 1, 1]), ret.flatten()[0]['count'])
+
+        # Test isolated occurrences are each counted.
+        values = np.array([3, 1, 3, 1, 3], dtype=float)
+        values = self.get_reshaped(values)
+        ret = fduration.calculate(values, threshold=2, operation='gt')
+        self.assertNumpyAll(np.array([1]), ret.flatten()[0]['duration'])
+        self.assertNumpyAll(np.array([3]), ret.flatten()[0]['count'])
+
+        # Test no occurrence.
+        ret = fduration.calculate(values, threshold=5, operation='gt')
+        self.assertNumpyAll(np.array([0]), ret.flatten()[0]['duration'])
+        self.assertNumpyAll(np.array([1]), ret.flatten()[0]['count'])
@@ -1,9 +1,13 @@
+import logging
+import time
+
 import numpy as np
 
 import ocgis
-from ocgis.calc.library.index.freeze_thaw import FreezeThaw, freezethaw1d
+from ocgis.calc.library.index.freeze_thaw import FreezeThaw, freezethaw1d, freezethaw3d
 from ocgis.exc import UnitsValidationError
-from ocgis.test.base import AbstractTestField
+from ocgis.test.base import AbstractTestField, attr
+from ocgis.util.logging_ocgis import ocgis_lh
 
 
 class TestFreezeThawCycles(AbstractTestField):
@@ -48,6 +52,29 @@ class TestFreezeThawCycles(AbstractTestField):
         x = np.array([3, 4, 4, 4, 4, 4, 4, 4])
         self.assertEquals(freezethaw1d(x, 2), 0)
 
+    def get_daily_tas(self, nyears=2, shape=(20, 30), seed=1):
+        # Synthetic daily temperature (C) with a seasonal cycle varying with latitude and daily noise.
+        np.random.seed(seed)
+        day = np.arange(365 * nyears)
+        mean = np.linspace(-10, 15, shape[0]).reshape(1, -1, 1)
+        seasonal = -15 * np.cos(2 * np.pi * day / 365.).reshape(-1, 1, 1)
+        ret = mean + seasonal + np.random.normal(scale=4, size=(day.shape[0],) + shape)
+        return np.ma.array(ret, mask=False)
+
+    @attr('benchmark')
+    def test_benchmark_freezethaw3d(self):
+        tas = self.get_daily_tas(nyears=10, shape=(50, 100))
+
+        t1 = time.time()
+        desired = np.apply_along_axis(freezethaw1d, 0, tas, threshold=15)
+        t2 = time.time()
+        actual = freezethaw3d(tas, 15)
+        t3 = time.time()
+
+        ocgis_lh(msg='freezethaw1d: {0:.3f}s, freezethaw3d: {1:.3f}s'.format(t2 - t1, t3 - t2), level=logging.DEBUG)
+        np.testing.assert_array_equal(actual, desired)
+        self.assertLess(t3 - t2, t2 - t1)
+
     def test_execute(self):
         # Just a smoke test for the class.
         field = self.get_field(with_value=True, month_count=23, name='tas', units='K')
@@ -101,3 +128,20 @@ class TestFreezeThawCycles(AbstractTestField):
     def test_missing(self):
         x = np.ma.masked_values([0, -1, 1, -1, 2, -2, 0], 2)
         self.assertEquals(freezethaw1d(x, 1), 2)
+
+    def test_freezethaw3d(self):
+        # Test against the one-dimensional implementation.
+        tas = self.get_daily_tas(shape=(4, 5))
+        tas.mask[:, 0, 0] = True
+        tas.mask[np.random.rand(*tas.shape) < 0.1] = True
+        for threshold in [1, 15, 50]:
+            desired = np.apply_along_axis(freezethaw1d, 0, tas, threshold=threshold)
+            actual = freezethaw3d(tas, threshold)
+            np.testing.assert_array_equal(actual, desired)
+        self.assertTrue(np.isnan(actual[0, 0]))
+
+        x = np.array([3, 4, 5, 2, 3, -3, 4, 5, -5, -6, -3, 0, -1, 4, 5, 2, -3, -5, 6])
+        self.assertEqual(freezethaw3d(x.reshape(-1, 1, 1), 2)[0, 0], 6)
+
+        x = np.ma.masked_values([0, -1, 1, -1, 2, -2, 0], 2)
+        self.assertEqual(freezethaw3d(x.reshape(-1, 1), 1)[0], 2)
@@ -1,7 +1,12 @@
+import itertools
+from datetime import datetime
+
 import numpy as np
+from mock import mock
 
 import ocgis
-from ocgis.calc.library.statistics import Mean, FrequencyPercentile, MovingWindow, DailyPercentile
+from ocgis.calc.library.statistics import Mean, FrequencyPercentile, MovingWindow, DailyPercentile, \
+    DailyPercentileBasis
 from ocgis.collection.field import Field
 from ocgis.constants import OutputFormatName
 from ocgis.exc import DefinitionValidationError
@@ -51,6 +56,39 @@ class TestDailyPercentile(AbstractTestField):
 
         self.assertAlmostEqual(vc['daily_perc'].get_value().mean(), 0.76756388346354165)
 
+    def test_get_daily_percentile(self):
+        field = self.get_field(with_value=True, month_count=2)
+        field = field.get_field_slice({'realization': 0, 'level': 0})
+        dp = DailyPercentile(field=field, parms={'percentile': 90, 'window_width': 5})
+        arr = field['tmax'].get_value()[0, :, 0, :, :]
+        dt_arr = field.temporal.value_datetime
+
+        actual = dp.get_daily_percentile(arr, dt_arr, 90, 5)
+        self.assertIsInstance(actual, DailyPercentileBasis)
+        self.assertEqual(actual.value.shape, (60,) + arr.shape[1:])
+        self.assertEqual(len(actual), 60)
+        self.assertEqual(actual.keys()[0], (1, 1))
+        # Compare to the window constructed for each calendar day.
+        for month, day in [(1, 1), (1, 31), (2, 15), (2, 29)]:
+            mask = dp.get_mask_dt_arr(dt_arr, month, day, dt_arr[0].hour, 5, False)
+            desired = np.percentile(arr[np.invert(mask)], 90, axis=0)
+            self.assertNumpyAllClose(actual[month, day], desired)
+
+        # Test with date parts.
+        actual_parts = dp.get_daily_percentile(arr, field.temporal.get_date_parts(), 90, 5)
+        self.assertNumpyAll(actual_parts.value, actual.value)
+
+    def test_get_window_index(self):
+        dates = [datetime(1999, 12, 30), datetime(1999, 12, 31), datetime(2000, 1, 1), datetime(2000, 1, 2),
+                 datetime(2001, 2, 28), datetime(2001, 3, 1)]
+        date_parts = np.array([[d.year, d.month, d.day, d.hour, d.minute, d.second] for d in dates])
+        calendar_days, step_index, calendar_day_index = DailyPercentile.get_window_index(date_parts, 3)
+        self.assertEqual(calendar_days.tolist(), [[1, 1], [1, 2], [2, 28], [3, 1], [12, 30], [12, 31]])
+        actual = {tuple(calendar_days[idx]): step_index[calendar_day_index == idx].tolist() for idx in range(6)}
+        desired = {(1, 1): [1, 2, 3], (1, 2): [2, 3], (2, 28): [4, 5], (3, 1): [4, 5], (12, 30): [0, 1],
+                   (12, 31): [0, 1, 2]}
+        self.assertDictEqual(actual, desired)
+
     @attr('data')
     def test_get_daily_percentile_from_request_dataset(self):
         rd = self.test_data.get_rd('cancm4_tas')
@@ -161,6 +199,28 @@ class TestMovingWindow(AbstractTestField):
             self.assertEqual(to_test[idx][0], desired[idx][0])
             self.assertEqual(to_test[idx][1].tolist(), desired[idx][1])
 
+    def test_iter_window_values(self):
+        np.random.seed(1)
+        values = np.ma.array(np.random.rand(20, 2, 3), mask=np.random.rand(20, 2, 3) < 0.2)
+        k = 5
+        for mode, chunk_elements in itertools.product(['same', 'valid'], [1, 35, 2 ** 24]):
+            with mock.patch('ocgis.constants.CALC_MAX_CHUNK_ELEMENTS', chunk_elements):
+                actual = list(MovingWindow._iter_window_values_(values, k, mode=mode))
+            origins = [origin_idx for origin, _ in actual for origin_idx in range(origin.start, origin.stop)]
+            if mode == 'same':
+                self.assertEqual(origins, list(range(20)))
+            else:
+                self.assertEqual(origins, list(range(2, 18)))
+            if chunk_elements == 35:
+                # Interior windows are returned in chunks of one window.
+                self.assertEqual(len(actual), len(origins))
+
+            for origin, values_windows in actual:
+                self.assertEqual(values_windows.ndim, 4)
+                for idx, origin_idx in enumerate(range(origin.start, origin.stop)):
+                    desired = values[max(origin_idx - 2, 0):origin_idx + 3]
+                    self.assertNumpyAll(values_windows[idx], desired)
+
     def test_iter_kernel_values_asserts(self):
         """Test assert statements."""
 
@@ -119,6 +119,11 @@ class TestEnvironment(TestBase):
         env.reset()
         self.assertFalse(env.USE_SPATIAL_INDEX)
 
+        # Test a spatial index backend may be selected.
+        os.environ['OCGIS_USE_SPATIAL_INDEX'] = 'STRtree'
+        env.reset()
+        self.assertEqual(env.USE_SPATIAL_INDEX, constants.SpatialIndexBackend.STRTREE)
+
     def test_netcdf_file_format(self):
         try:
             self.assertEqual(env.NETCDF_FILE_FORMAT, constants.NETCDF_DEFAULT_DATA_MODEL)
@@ -674,6 +674,20 @@ class TestOcgOperations(TestBase):
         field = ret.get_element()
         self.assertEqual(field.data_variables[0].shape, (365, 20, 144))
 
+    def test_keyword_sparse_aggregate(self):
+        field = create_exact_field(create_gridxy_global(resolution=10.0), 'foo')
+        geom = [-20, -20, 20, 20]
+        ops = OcgOperations(dataset=field, geom=geom, aggregate=True, spatial_operation='clip', sparse_aggregate=True)
+        self.assertTrue(ops.sparse_aggregate)
+
+        calc = [{'func': 'mean', 'name': 'mean'}]
+        for kwds in [{'aggregate': False}, {'spatial_operation': 'intersects'},
+                     {'calc': calc, 'calc_grouping': ['month'], 'calc_raw': True}]:
+            kwargs = dict(dataset=field, geom=geom, aggregate=True, spatial_operation='clip', sparse_aggregate=True)
+            kwargs.update(kwds)
+            with self.assertRaises(DefinitionValidationError):
+                OcgOperations(**kwargs)
+
     @attr('data')
     def test_keyword_spatial_reorder(self):
         rd = self.test_data.get_rd('cancm4_tas')
@@ -3,19 +3,24 @@ from copy import deepcopy
 
 import numpy as np
 import ocgis
+from mock import mock
 from ocgis import SpatialCollection, Variable
 from ocgis import env
 from ocgis.collection.field import Field
 from ocgis.constants import TagName, DimensionMapKey
+from ocgis.exc import ExtentError
 from ocgis.conv.numpy_ import NumpyConverter
 from ocgis.ops.core import OcgOperations
 from ocgis.ops.engine import OperationsEngine
 from ocgis.spatial.grid import Grid
-from ocgis.test.base import attr, AbstractTestInterface, get_geometry_dictionaries
+from ocgis.spatial.spatial_subset import SpatialSubsetOperation
+from ocgis.test.base import attr, AbstractTestInterface, get_geometry_dictionaries, create_gridxy_global, \
+    create_exact_field
 from ocgis.util.itester import itr_products_keywords
 from ocgis.util.logging_ocgis import ProgressOcgOperations
 from ocgis.variable.crs import Spherical, WGS84, CoordinateReferenceSystem
 from shapely import wkt
+from shapely.geometry import box
 
 
 class TestOperationsEngine(AbstractTestInterface):
@@ -110,6 +115,72 @@ class TestOperationsEngine(AbstractTestInterface):
             self.assertAlmostEqual(field.grid.get_value_stacked().mean(),
                                    expected[container.geom.ugid.get_value()[0]])
 
+    def test_system_process_geometries_cache(self):
+        """Test selection geometries are prepared once for multiple datasets."""
+
+        a = 'POLYGON((-105.2 40.2,-104.4 40.2,-104.3 39.6,-102.4 39.6,-102.1 37.5,-105.2 37.5,-105.2 40.2))'
+        b = 'POLYGON((-104.2 39.0,-103.7 39.4,-102.7 39.3,-102.4 37.6,-104.1 37.6,-104.2 39.0))'
+        geom = [{'geom': wkt.loads(xx), 'properties': {'UGID': ugid}, 'crs': WGS84()}
+                for ugid, xx in enumerate([a, b])]
+
+        fields = []
+        for name in ['first', 'second']:
+            x = Variable('x', [-105.0, -104.0, -103.0, -102.0], dimensions='lon')
+            y = Variable('y', [37.0, 38.0, 39.0, 40.0], dimensions='lat')
+            fields.append(Field(grid=Grid(x, y), crs=Spherical(), name=name))
+
+        original_create = SpatialSubsetOperation._create_prepared_geometry_
+        original_buffer = OperationsEngine._get_buffered_subset_geometry_if_point_
+        with mock.patch.object(SpatialSubsetOperation, '_create_prepared_geometry_', autospec=True,
+                               side_effect=original_create) as m_create:
+            with mock.patch.object(OperationsEngine, '_get_buffered_subset_geometry_if_point_', autospec=True,
+                                   side_effect=original_buffer) as m_buffer:
+                ret = OcgOperations(dataset=fields, geom=geom).execute()
+        self.assertEqual(m_create.call_count, 2)
+        self.assertEqual(m_buffer.call_count, 2)
+
+        for ugid in [0, 1]:
+            actual = [ret.get_element(container_ugid=ugid, field_name=name).grid.get_value_stacked()
+                      for name in ['first', 'second']]
+            desired = OcgOperations(dataset=deepcopy(fields[0]), geom=[geom[ugid]]).execute()
+            desired = desired.get_element(container_ugid=ugid).grid.get_value_stacked()
+            for a in actual:
+                self.assertNumpyAll(a, desired)
+
+    def test_system_process_geometries_sparse(self):
+        """Test spatial averages computed with sparse overlap weights match the standard aggregation."""
+
+        geom = [{'geom': box(*bounds), 'properties': {'UGID': ugid}, 'crs': Spherical()}
+                for ugid, bounds in enumerate([(-20, -20, 15, 15), (100, 50, 105, 55), (-175, 60, 175, 85)])]
+        # The grid and selection geometries share a coordinate system so no transformation is required.
+        grid = create_gridxy_global(resolution=10.0, crs=Spherical())
+        field = create_exact_field(grid, 'foo', ntime=3)
+        field['foo'].get_value()[1, 8, 17] = 1e6
+        field['foo'].set_mask(field['foo'].get_value() == 1e6)
+
+        desired = OcgOperations(dataset=deepcopy(field), geom=geom, aggregate=True, spatial_operation='clip').execute()
+        with mock.patch.object(OperationsEngine, '_process_geometries_') as m:
+            actual = OcgOperations(dataset=field, geom=geom, aggregate=True, spatial_operation='clip',
+                                   sparse_aggregate=True).execute()
+        m.assert_not_called()
+
+        for ugid in [0, 1, 2]:
+            actual_field = actual.get_element(container_ugid=ugid)
+            desired_field = desired.get_element(container_ugid=ugid)
+            self.assertEqual(actual_field['foo'].dimension_names, desired_field['foo'].dimension_names)
+            self.assertNumpyAllClose(actual_field['foo'].get_value(), desired_field['foo'].get_value())
+            self.assertEqual(actual_field.geom.ugid.get_value()[0], ugid)
+            self.assertTrue(actual_field.geom.get_value()[0].equals(geom[ugid]['geom']))
+
+        # Test selection geometries outside the spatial domain.
+        geom = [{'geom': box(500, 500, 501, 501), 'properties': {'UGID': 5}, 'crs': Spherical()}]
+        with self.assertRaises(ExtentError):
+            OcgOperations(dataset=field, geom=geom, aggregate=True, spatial_operation='clip',
+                          sparse_aggregate=True).execute()
+        ret = OcgOperations(dataset=field, geom=geom, aggregate=True, spatial_operation='clip', sparse_aggregate=True,
+                            allow_empty=True).execute()
+        self.assertTrue(ret.get_element(container_ugid=5).is_empty)
+
     @attr('data', 'esmf')
     def test_system_regridding_bounding_box_wrapped(self):
         """Test subsetting with a wrapped bounding box with the target as a 0-360 global grid."""
@@ -2,22 +2,38 @@ import os
 import shutil
 
 import fiona
+import numpy as np
 import ocgis
 from mock import mock
 from ocgis import env
 from ocgis.base import get_variable_names
 from ocgis.collection.field import Field
 from ocgis.environment import ogr
-from ocgis.spatial.geom_cabinet import GeomCabinet, GeomCabinetIterator, get_uid_from_properties
+from ocgis.spatial.geom_cabinet import GeomCabinet, GeomCabinetIterator, get_uid_from_properties, \
+    get_spatial_index_path, get_geometry_cache, GeometryCache
 from ocgis.test.base import TestBase
 from ocgis.test.base import attr
 from ocgis.variable.crs import WGS84
+from shapely.geometry import box
 from shapely.geometry.multipolygon import MultiPolygon
 from shapely.geometry.polygon import Polygon
 
 Layer = ogr.Layer
 
 
+class TestGeometryCache(TestBase):
+    def test_get_key(self):
+        path = self.get_temporary_file_path('foo.shp')
+        select_uid = np.arange(2000)
+        key = GeometryCache.get_key(path, select_uid=select_uid)
+        self.assertEqual(key, GeometryCache.get_key(path, select_uid=select_uid.tolist()))
+
+        # Test all elements of large arrays are part of the key.
+        select_uid = select_uid.copy()
+        select_uid[500] = -1
+        self.assertNotEqual(key, GeometryCache.get_key(path, select_uid=select_uid))
+
+
 class Test(TestBase):
     def test_get_uid_from_properties(self):
         properties = {env.DEFAULT_GEOM_UID: 1, 'name': 'food', 'ID': 3}
@@ -135,6 +151,9 @@ class TestGeomCabinetIterator(TestBase):
         sci = GeomCabinetIterator(key='state_boundaries', slc=[4, 10, 20])
         self.assertEqual(len(sci), 3)
 
+        sci = GeomCabinetIterator(key='state_boundaries', bbox=[-90.4, 41.7, -82.4, 48.2])
+        self.assertEqual(len(sci), len(list(sci)))
+
     def test_iteration_by_path(self):
         # test that a shapefile may be retrieved by passing a full path to the file
         path = GeomCabinet().get_shp_path('state_boundaries')
@@ -176,6 +195,24 @@ class TestGeomCabinet(TestBase):
         finally:
             ocgis.env.reset()
 
+    def get_shapefile_path_copy(self):
+        path = GeomCabinet().get_shp_path('state_boundaries')
+        for filename in os.listdir(os.path.dirname(path)):
+            shutil.copy2(os.path.join(os.path.dirname(path), filename), self.current_dir_output)
+        return os.path.join(self.current_dir_output, os.path.basename(path))
+
+    def test_create_spatial_index(self):
+        path = self.get_shapefile_path_copy()
+        sc = GeomCabinet()
+        actual = sc.create_spatial_index(path=path)
+        self.assertEqual(actual, get_spatial_index_path(path))
+        self.assertTrue(os.path.exists(actual))
+
+        # Test an existing spatial index is not recreated.
+        with mock.patch('ocgis.spatial.geom_cabinet.ogr.Open') as m_open:
+            sc.create_spatial_index(path=path)
+            m_open.assert_not_called()
+
     def test_get_features_object(self):
         # Test with a shapefile not having the default unique geometry identifier
         path = self.get_shapefile_path_with_no_ugid()
@@ -334,6 +371,63 @@ class TestGeomCabinet(TestBase):
         self.assertEqual(len(records), 2)
         self.assertEqual([r['properties']['ID'] for r in records], geom_select_uid)
 
+    def test_iter_geoms_bbox(self):
+        path = self.get_shapefile_path_copy()
+        bbox = [-90.4, 41.7, -82.4, 48.2]
+        subset = box(*bbox)
+        records = list(GeomCabinet().iter_geoms(path=path))
+        intersects = set([r['properties']['UGID'] for r in records if r['geom'].intersects(subset)])
+        envelope_intersects = set([r['properties']['UGID'] for r in records if r['geom'].envelope.intersects(subset)])
+
+        for spatial_index in [False, True]:
+            sci = GeomCabinetIterator(path=path, bbox=bbox, spatial_index=spatial_index)
+            actual = set([r['properties']['UGID'] for r in sci])
+            self.assertTrue(intersects.issubset(actual))
+            self.assertTrue(actual.issubset(envelope_intersects))
+            self.assertLess(len(actual), len(records))
+            self.assertEqual(os.path.exists(get_spatial_index_path(path)), spatial_index)
+
+        # Test with other select statements.
+        sci = GeomCabinetIterator(path=path, bbox=bbox, select_sql_where="STATE_NAME in ('Michigan', 'Texas')")
+        self.assertEqual([r['properties']['STATE_NAME'] for r in sci], ['Michigan'])
+
+        # Test slice is not allowed with a bounding box.
+        with self.assertRaises(ValueError):
+            list(GeomCabinetIterator(path=path, bbox=bbox, slc=slice(0, 3)))
+
+    def test_iter_geoms_cache(self):
+        sc = GeomCabinet()
+        self.addCleanup(sc.invalidate_cache)
+        self.assertIsNone(get_geometry_cache())
+        env.GEOMCABINET_CACHE_MAX_SIZE = 10 ** 8
+        cache = get_geometry_cache()
+
+        desired = list(sc.iter_geoms('state_boundaries', select_uid=[13, 15]))
+        self.assertEqual(len(cache), 1)
+        with mock.patch.object(GeomCabinet, '_iter_records_') as m_iter_records:
+            for _ in range(2):
+                actual = list(sc.iter_geoms('state_boundaries', select_uid=[13, 15]))
+                m_iter_records.assert_not_called()
+                self.assertEqual([a['properties'] for a in actual], [d['properties'] for d in desired])
+                self.assertIs(actual[0]['geom'], desired[0]['geom'])
+                # Test cached properties are not modified by consumers.
+                actual[0]['properties']['STATE_NAME'] = 'foo'
+
+            fields = list(sc.iter_geoms('state_boundaries', select_uid=[13, 15], as_field=True))
+            self.assertEqual(fields[1].geom.ugid.get_value()[0], 15)
+
+        # Test different selections are cached separately.
+        self.assertEqual(len(list(sc.iter_geoms('state_boundaries', select_uid=[13]))), 1)
+        self.assertEqual(len(cache), 2)
+
+        # Test the least recently used records are removed when the size limit is exceeded.
+        env.GEOMCABINET_CACHE_MAX_SIZE = cache.size - 1
+        self.assertEqual(len(get_geometry_cache()), 1)
+
+        sc.invalidate_cache(key='state_boundaries')
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.size, 0)
+
     def test_iter_geoms_select_sql_where(self):
         sc = GeomCabinet()
         sql = "STATE_NAME = 'New Hampshire'"
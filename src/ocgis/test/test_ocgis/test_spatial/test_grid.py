@@ -21,7 +21,8 @@ from ocgis.driver.nc_ugrid import DriverNetcdfUGRID
 from ocgis.exc import EmptySubsetError, BoundsAlreadyAvailableError
 from ocgis.spatial.base import create_spatial_mask_variable
 from ocgis.spatial.geomc import AbstractGeometryCoordinates, PointGC, PolygonGC
-from ocgis.spatial.grid import Grid, expand_grid, GridGeometryProcessor, GridUnstruct, arr_intersects_bounds
+from ocgis.spatial.grid import Grid, expand_grid, GridGeometryProcessor, GridUnstruct, arr_intersects_bounds, \
+    get_geometry_array, get_scanline_intersects_mask, get_hint_mask_from_geometry_bounds, GridBlockIndex
 from ocgis.test.base import attr, AbstractTestInterface, create_gridxy_global, TestBase
 from ocgis.test.test_ocgis.test_spatial.test_geomc import FixturePointGC, FixturePolygonGC
 from ocgis.util.helpers import make_poly, iter_array
@@ -51,6 +52,114 @@ class Test(AbstractTestInterface):
         for variable in [vx, vy]:
             self.assertEqual(grid.parent[variable.name].ndim, 2)
 
+    def test_get_geometry_array(self):
+        keywords = {'with_xy_bounds': [False, True], 'with_2d_variables': [False, True], 'use_bounds': [False, True]}
+
+        for k in self.iter_product_keywords(keywords, as_namedtuple=False):
+            use_bounds = k.pop('use_bounds')
+            grid = self.get_gridxy(**k)
+            hint_mask = np.zeros(grid.shape, dtype=bool)
+            hint_mask[1, 2] = True
+
+            actual = get_geometry_array(grid, np.zeros(grid.shape, dtype=object), hint_mask=hint_mask,
+                                        use_bounds=use_bounds)
+            self.assertEqual(actual[1, 2], 0)
+
+            # Test bulk construction matches per-element construction.
+            with mock.patch.multiple('ocgis.spatial.grid', get_box_array=None, get_point_array=None,
+                                     get_polygon_array=None):
+                desired = get_geometry_array(grid, np.zeros(grid.shape, dtype=object), hint_mask=hint_mask,
+                                             use_bounds=use_bounds)
+            for a, d in zip(actual.flat, desired.flat):
+                if d == 0:
+                    self.assertEqual(a, 0)
+                else:
+                    self.assertEqual(a.geom_type, d.geom_type)
+                    self.assertEqual(a.wkt, d.wkt)
+
+    def test_get_hint_mask_from_geometry_bounds(self):
+        # Rotated curvilinear coordinates.
+        col, row = np.meshgrid(np.arange(50.), np.arange(30.))
+        x = Variable('x', value=col * 0.8 - row * 0.6, dimensions=['y', 'x'])
+        y = Variable('y', value=col * 0.6 + row * 0.8, dimensions=['y', 'x'])
+        grid = Grid(x, y)
+        bboxes = [(4, 6, 9.5, 12), (-100, -100, 100, 100), (1000, 1000, 1001, 1001), (3.2, 0.6, 3.2, 0.6)]
+
+        for block_shape, bbox in itertools.product([(1, 1), (7, 9), (64, 64)], bboxes):
+            block_index = GridBlockIndex(grid, block_shape=block_shape)
+            for invert in [False, True]:
+                actual = get_hint_mask_from_geometry_bounds(grid, bbox, invert=invert, block_index=block_index)
+                desired = get_hint_mask_from_geometry_bounds(grid, bbox, invert=invert)
+                self.assertNumpyAll(actual, desired)
+
+        # Test the block index must match the grid shape.
+        sub = grid[0:10, 0:10]
+        with self.assertRaises(ValueError):
+            get_hint_mask_from_geometry_bounds(sub, bboxes[0], block_index=GridBlockIndex(grid))
+
+    def test_get_scanline_intersects_mask(self):
+        x = Variable('x', value=np.arange(0.5, 10.), dimensions='x')
+        y = Variable('y', value=np.arange(9.5, 0., -1.), dimensions='y')
+        grid = Grid(x, y)
+        grid.set_extrapolated_bounds('x_bounds', 'y_bounds', 'bounds')
+
+        point = Point(5, 5)
+        subset_geoms = [box(2, 3, 7, 8), box(2.5, 3.5, 7.5, 8.5), point.buffer(3),
+                        point.buffer(3.3).difference(point.buffer(1.2)), MultiPolygon([box(0, 0, 2, 2), box(6, 6, 9, 9)]),
+                        Polygon([(0, 0), (10, 10), (0, 10)]), box(-5, -5, 20, 20)]
+        hint_mask = np.zeros(grid.shape, dtype=bool)
+        hint_mask[4:6, :] = True
+
+        # Test against intersects computed with cell geometries.
+        for subset_geom, keep_touches, mask in itertools.product(subset_geoms, [False, True], [None, hint_mask]):
+            actual = get_scanline_intersects_mask(grid, subset_geom, hint_mask=mask, keep_touches=keep_touches)
+            desired = np.ones(grid.shape, dtype=bool)
+            gp = GridGeometryProcessor(grid, subset_geom, mask, keep_touches=keep_touches)
+            for idx, intersects_logical, _ in gp.iter_intersects():
+                desired[idx] = not intersects_logical
+            self.assertNumpyAll(actual, desired)
+
+
+class TestGridBlockIndex(AbstractTestInterface):
+    def test_init(self):
+        grid = self.get_gridxy()
+        with self.assertRaises(ValueError):
+            GridBlockIndex(grid)
+
+        grid = self.get_gridxy(with_2d_variables=True)
+        block_index = GridBlockIndex(grid, block_shape=(3, 2))
+        self.assertEqual(block_index.shape, grid.shape)
+        self.assertEqual(block_index._x_min.shape, (2, 2))
+
+    def test_iter_windows(self):
+        grid = self.get_gridxy(with_2d_variables=True)
+        block_index = GridBlockIndex(grid, block_shape=(2, 2))
+        x = grid.x.get_value()
+        y = grid.y.get_value()
+
+        bbox = (x.min(), y.min(), x.min(), y.min())
+        actual = list(block_index.iter_windows(bbox))
+        self.assertEqual(len(actual), 1)
+        self.assertTrue(np.any(np.logical_and(x[actual[0]] == bbox[0], y[actual[0]] == bbox[1])))
+
+        bbox = (x.min(), y.min(), x.max(), y.max())
+        actual = list(block_index.iter_windows(bbox))
+        self.assertEqual(len(actual), block_index.get_blocks(bbox).size)
+        self.assertEqual(sum(x[w].size for w in actual), x.size)
+
+        self.assertEqual(list(block_index.iter_windows((1e6, 1e6, 1e6 + 1, 1e6 + 1))), [])
+
+    def test_system_get_intersects(self):
+        grid = self.get_gridxy(with_2d_variables=True, with_xy_bounds=True)
+        block_index = GridBlockIndex(grid)
+        subset_geom = box(101.5, 40.5, 102.5, 42.)
+        for geom in [subset_geom, MultiPolygon([subset_geom, box(100., 39., 101.2, 40.2)])]:
+            actual = grid.get_intersects(geom, block_index=block_index)
+            desired = grid.get_intersects(geom)
+            self.assertEqual(actual.shape, desired.shape)
+            self.assertNumpyAll(actual.x.get_value(), desired.x.get_value())
+            self.assertNumpyAll(actual.y.get_value(), desired.y.get_value())
+
 
 class TestGridGeometryProcessor(AbstractTestInterface):
     def test(self):
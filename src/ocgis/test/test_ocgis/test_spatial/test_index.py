@@ -1,14 +1,21 @@
 import itertools
+import os
+import time
 
 import numpy as np
-from ocgis import env
+from mock import mock
+from ocgis import env, GeometryVariable, RequestDataset
+from ocgis.constants import SpatialIndexBackend
 from ocgis.test.base import TestBase, attr
+from ocgis.variable.crs import Spherical
 from shapely import wkt
+from shapely.affinity import translate
 from shapely.geometry.geo import mapping
 from shapely.geometry.point import Point
 
 if env.USE_SPATIAL_INDEX:
-    from ocgis.spatial.index import SpatialIndex
+    from ocgis.spatial.index import SpatialIndex, SpatialIndexCache, get_spatial_index_backend, \
+        get_spatial_index_cache
 
 
 @attr('rtree')
@@ -29,9 +36,60 @@ class TestSpatialIndex(TestBase):
             ret[ii] = Point(ix, iy)
         return ret
 
+    @property
+    def backends(self):
+        from ocgis.spatial import index
+        ret = [SpatialIndexBackend.RTREE]
+        if index.STRtree is not None:
+            ret.append(SpatialIndexBackend.STRTREE)
+        return ret
+
     def test_constructor(self):
         SpatialIndex()
 
+        # Test bulk loading.
+        points = self.geom_michigan_point_grid
+        geoms = np.array([points[ii] for ii in range(len(points))], dtype=object)
+        for backend in self.backends:
+            si = SpatialIndex(geometries=geoms, backend=backend)
+            self.assertEqual(si.backend, backend)
+            self.assertEqual(si.query(self.geom_michigan).tolist(), [12, 13, 14, 15, 16, 17, 22, 23, 24, 25, 26, 27, 32,
+                                                                     33, 34, 35, 36, 37, 42, 43, 44, 45, 46, 47, 52, 53,
+                                                                     54, 55, 56, 57, 62, 63, 64, 65, 66, 67, 72, 73, 74,
+                                                                     75, 76, 77, 82, 83, 84, 85, 86, 87])
+            empty = SpatialIndex(geometries=np.array([], dtype=object), backend=backend)
+            self.assertEqual(empty.query(self.geom_michigan).tolist(), [])
+
+        with self.assertRaises(ValueError):
+            SpatialIndex(backend='foo')
+
+    def test_get_intersects(self):
+        points = self.geom_michigan_point_grid
+        touch_geom = Point(*mapping(self.geom_michigan)['coordinates'][0][0][3])
+        points[len(points)] = touch_geom
+        geoms = np.array([points[ii] for ii in range(len(points))], dtype=object)
+        desired = [22, 23, 24, 32, 33, 34, 35, 36, 42, 43, 44, 46, 56, 66, 67, 76]
+
+        for backend, keep_touches in itertools.product(self.backends, [True, False]):
+            si = SpatialIndex(geometries=geoms, backend=backend)
+            actual = si.get_intersects(self.geom_michigan, geoms, keep_touches=keep_touches)
+            self.assertIsInstance(actual, np.ndarray)
+            if keep_touches:
+                self.assertEqual(actual.tolist(), desired + [100])
+            else:
+                self.assertEqual(actual.tolist(), desired)
+
+    def test_get_spatial_index_backend(self):
+        from ocgis.spatial import index
+
+        self.assertEqual(get_spatial_index_backend(SpatialIndexBackend.RTREE), SpatialIndexBackend.RTREE)
+        if index.STRtree is None:
+            self.assertEqual(get_spatial_index_backend(True), SpatialIndexBackend.RTREE)
+        else:
+            self.assertEqual(get_spatial_index_backend(True), SpatialIndexBackend.STRTREE)
+        with self.assertRaises(ValueError):
+            get_spatial_index_backend('foo')
+
     def test_add_polygon(self):
         si = SpatialIndex()
         si.add(1, self.geom_michigan)
@@ -96,3 +154,121 @@ class TestSpatialIndex(TestBase):
         si.add(ids, geoms)
         intersects_ids = list(si.iter_intersects(polygon, points))
         self.assertEqual(intersects_ids, [67])
+
+
+@attr('rtree')
+class TestSpatialIndexCache(TestBase):
+    def get_geometry_variable(self):
+        path = self.get_temporary_file_path('points.shp')
+        if not os.path.exists(path):
+            points = [Point(x, y) for x, y in itertools.product(range(10), range(10))]
+            GeometryVariable(name='geom', value=points, dimensions='ngeom').write_vector(path)
+        return RequestDataset(path).get().geom
+
+    def test_evict(self):
+        cache = SpatialIndexCache(self.get_temporary_file_path('cache'))
+        now = time.time()
+        for ctr, key in enumerate(['a', 'b', 'c-tmp']):
+            for extension in ['dat', 'idx']:
+                path = os.path.join(cache.directory, '{}.{}'.format(key, extension))
+                with open(path, 'w') as f:
+                    f.write('x' * 10)
+                os.utime(path, (now - ctr * 100, now - ctr * 100))
+
+        # Test the least recently used entry is removed when the size is exceeded. Entries being written are skipped.
+        cache.max_size = 30
+        cache.evict()
+        self.assertEqual(sorted(os.listdir(cache.directory)), ['a.dat', 'a.idx', 'c-tmp.dat', 'c-tmp.idx'])
+
+        # Test old entries are removed.
+        cache.max_size = None
+        cache.max_age = 50
+        cache.evict()
+        self.assertEqual(sorted(os.listdir(cache.directory)), ['a.dat', 'a.idx'])
+
+    def test_get_key(self):
+        cache = SpatialIndexCache(self.get_temporary_file_path('cache'))
+        gvar = self.get_geometry_variable()
+        mask = np.zeros(gvar.shape, dtype=bool)
+
+        key = cache.get_key(gvar, mask=mask)
+        self.assertEqual(key, cache.get_key(self.get_geometry_variable(), mask=mask))
+        self.assertNotEqual(key, cache.get_key(gvar[5:], mask=mask[5:]))
+        mask[0] = True
+        self.assertNotEqual(key, cache.get_key(gvar, mask=mask))
+
+        # Test the wrapped state is part of the key.
+        gvar.crs = Spherical()
+        key = cache.get_key(gvar, mask=mask)
+        value = gvar.get_value()
+        for idx, geom in enumerate(value):
+            value[idx] = translate(geom, xoff=-5)
+        self.assertNotEqual(key, cache.get_key(gvar, mask=mask))
+
+        # Test variables not read from files do not have a key.
+        self.assertIsNone(cache.get_key(GeometryVariable(name='geom', value=[Point(1, 2)], dimensions='ngeom')))
+
+    def test_get_spatial_index(self):
+        cache = SpatialIndexCache(self.get_temporary_file_path('cache'))
+        gvar = self.get_geometry_variable()
+        geoms = gvar.get_value()
+        subset = Point(4.5, 4.5).buffer(2)
+        desired = SpatialIndex(geometries=geoms).get_intersects(subset, geoms)
+
+        with mock.patch.object(SpatialIndexCache, 'evict') as m_evict:
+            for _ in range(2):
+                si = cache.get_spatial_index(gvar, geoms)
+                self.assertEqual(si.backend, SpatialIndexBackend.RTREE)
+                self.assertNumpyAll(si.get_intersects(subset, geoms), desired)
+            # Test the index is only created once.
+            m_evict.assert_called_once()
+        self.assertEqual(len(os.listdir(cache.directory)), 2)
+
+        # Test an entry is rebuilt if the geometries are modified in memory without changing the key.
+        gvar = self.get_geometry_variable()
+        translated = gvar.get_value()
+        for idx, geom in enumerate(translated):
+            translated[idx] = translate(geom, xoff=100)
+        si = cache.get_spatial_index(gvar, translated)
+        self.assertEqual(si.get_intersects(subset, translated).size, 0)
+        self.assertNumpyAll(si.get_intersects(translate(subset, xoff=100), translated), desired)
+        self.assertEqual(len(os.listdir(cache.directory)), 2)
+
+        # Test a spatial index is created in memory for variables not read from files.
+        gvar = GeometryVariable(name='geom', value=geoms, dimensions='ngeom')
+        si = cache.get_spatial_index(gvar, geoms)
+        self.assertNumpyAll(si.get_intersects(subset, geoms), desired)
+        self.assertEqual(len(os.listdir(cache.directory)), 2)
+
+    def test_get_spatial_index_cache(self):
+        self.assertIsNone(get_spatial_index_cache(SpatialIndexBackend.RTREE))
+        env.DIR_SPATIAL_INDEX_CACHE = self.get_temporary_file_path('cache')
+        env.SPATIAL_INDEX_CACHE_MAX_SIZE = 100
+        for use_spatial_index in [True, SpatialIndexBackend.RTREE]:
+            actual = get_spatial_index_cache(use_spatial_index)
+            self.assertEqual(actual.directory, env.DIR_SPATIAL_INDEX_CACHE)
+            self.assertEqual(actual.max_size, 100)
+        for use_spatial_index in [False, SpatialIndexBackend.STRTREE]:
+            self.assertIsNone(get_spatial_index_cache(use_spatial_index))
+
+    def test_system_get_intersects(self):
+        """Test geometry variable intersects operations use the spatial index cache."""
+
+        gvar = self.get_geometry_variable()
+        subset = Point(4.5, 4.5).buffer(2)
+        desired = gvar.get_intersects(subset, use_spatial_index=False).get_mask()
+
+        env.DIR_SPATIAL_INDEX_CACHE = self.get_temporary_file_path('cache')
+        with mock.patch.object(SpatialIndexCache, 'get_spatial_index',
+                               wraps=SpatialIndexCache(env.DIR_SPATIAL_INDEX_CACHE).get_spatial_index) as m:
+            for _ in range(2):
+                actual = self.get_geometry_variable().get_intersects(subset, use_spatial_index=True)
+                self.assertNumpyAll(actual.get_mask(), desired)
+            self.assertEqual(m.call_count, 2)
+        self.assertEqual(len(os.listdir(env.DIR_SPATIAL_INDEX_CACHE)), 2)
+
+        # Test variables not read from files are not indexed.
+        gvar = GeometryVariable(name='geom', value=gvar.get_value(), dimensions='ngeom')
+        actual = gvar.get_intersects(subset, use_spatial_index=True)
+        self.assertNumpyAll(actual.get_mask(), desired)
+        self.assertEqual(len(os.listdir(env.DIR_SPATIAL_INDEX_CACHE)), 2)
@@ -7,7 +7,7 @@ from ocgis import env
 from ocgis.collection.field import Field
 from ocgis.constants import WrappedState, DimensionMapKey, KeywordArgument
 from ocgis.exc import EmptySubsetError
-from ocgis.spatial.spatial_subset import SpatialSubsetOperation
+from ocgis.spatial.spatial_subset import SpatialSubsetOperation, PreparedGeometryCache
 from ocgis.test.base import TestBase, attr, get_geometry_dictionaries
 from ocgis.test.strings import GERMANY_WKT, NEBRASKA_WKT
 from ocgis.util.helpers import make_poly
@@ -16,6 +16,36 @@ from ocgis.variable.crs import CFRotatedPole, WGS84, CFSpherical
 from ocgis.variable.geom import GeometryVariable
 from ocgis.vmachine.mpi import MPI_COMM, MPI_RANK
 from shapely import wkt
+from shapely.geometry import box
+
+
+class TestPreparedGeometryCache(TestBase):
+    def test_get(self):
+        cache = PreparedGeometryCache()
+        created = []
+
+        def create():
+            created.append(True)
+            return len(created)
+
+        geom = GeometryVariable(value=box(0, 0, 1, 1), dimensions='one', crs=WGS84(), ugid=1)
+        self.assertEqual(cache.get(geom, ('foo', WGS84()), create), 1)
+        same = GeometryVariable(value=box(0, 0, 1, 1), dimensions='one', crs=WGS84(), ugid=1)
+        self.assertEqual(cache.get(same, ('foo', WGS84()), create), 1)
+        self.assertEqual(len(cache), 1)
+
+        # Test entries are not shared across preparation states, source coordinate systems, or geometries.
+        self.assertEqual(cache.get(geom, ('foo', CFSpherical()), create), 2)
+        other = GeometryVariable(value=box(0, 0, 1, 1), dimensions='one', crs=CFSpherical(), ugid=1)
+        self.assertEqual(cache.get(other, ('foo', WGS84()), create), 3)
+        other = GeometryVariable(value=box(0, 0, 2, 2), dimensions='one', crs=WGS84(), ugid=1)
+        self.assertEqual(cache.get(other, ('foo', WGS84()), create), 4)
+        self.assertEqual(len(cache), 4)
+
+        # Test geometries without unique identifiers are not cached.
+        geom = GeometryVariable(value=box(0, 0, 1, 1), dimensions='one', crs=WGS84())
+        self.assertEqual(cache.get(geom, ('foo', WGS84()), create), 5)
+        self.assertEqual(len(cache), 4)
 
 
 class TestSpatialSubsetOperation(TestBase):
@@ -0,0 +1,108 @@
+import os
+
+import numpy as np
+from mock import mock
+from ocgis import env, GeometryVariable
+from ocgis.spatial.weights import OverlapWeights, get_overlap_weights
+from ocgis.test.base import AbstractTestInterface
+from shapely.geometry import box, Point
+
+
+class TestOverlapWeights(AbstractTestInterface):
+    def get_overlap_weights(self):
+        grid = self.get_gridxy_global(resolution=10.0)
+        geometries = [box(-20, -20, 15, 15), box(100, 50, 105, 55), box(500, 500, 501, 501)]
+        return grid, geometries, OverlapWeights.from_geometries(grid.get_abstraction_geometry(), geometries,
+                                                                ugids=[10, 20, 30])
+
+    def test_apply(self):
+        grid, geometries, weights = self.get_overlap_weights()
+        value = np.random.rand(*([4] + list(grid.shape)))
+        value = np.ma.array(value, mask=np.zeros(value.shape, dtype=bool))
+        value.mask[1, :, :] = True
+        value.mask[2, 8, 17] = True
+
+        actual = weights.apply(value)
+        self.assertEqual(actual.shape, (4, 3))
+        # Time steps with all values masked and selection geometries without cells are masked.
+        self.assertTrue(actual.mask[1].all())
+        self.assertTrue(actual.mask[:, 2].all())
+
+        # Test against a spatial average weighted by the clipped cell areas.
+        cells = grid.get_abstraction_geometry().get_value()
+        for ii, geom in enumerate(geometries[0:2]):
+            areas = np.array([c.intersection(geom).area for c in cells.flat]).reshape(cells.shape)
+            for time_idx in [0, 2, 3]:
+                desired = np.ma.average(value[time_idx], weights=areas)
+                self.assertAlmostEqual(actual[time_idx, ii], desired)
+
+        with self.assertRaises(ValueError):
+            weights.apply(value[:, 0:2, :])
+
+    def test_from_geometries(self):
+        _, _, weights = self.get_overlap_weights()
+        self.assertEqual(weights.shape, (18 * 36, 3))
+        self.assertNumpyAll(weights.ugids, np.array([10, 20, 30]))
+        # Cells only touching the selection geometries are excluded.
+        self.assertEqual(np.sum(weights.columns == 0), 16)
+        self.assertAlmostEqual(weights.values[weights.columns == 0].sum(), 35 * 35)
+        self.assertAlmostEqual(weights.values[weights.columns == 1].sum(), 25)
+        self.assertEqual(np.sum(weights.columns == 2), 0)
+
+        # Test point cells are counted and masked cells are excluded.
+        value = [Point(1, 1), Point(2, 2), Point(3, 3)]
+        cells = GeometryVariable(value=value, mask=[False, True, False], dimensions='ngeom')
+        weights = OverlapWeights.from_geometries(cells, [box(0, 0, 5, 5)])
+        self.assertNumpyAll(weights.rows, np.array([0, 2], dtype=np.int64))
+        self.assertNumpyAll(weights.values, np.array([1.0, 1.0]))
+        self.assertNumpyAll(weights.ugids, np.array([1]))
+
+    def test_write(self):
+        _, _, weights = self.get_overlap_weights()
+        weights.key = 'foo'
+        path = self.get_temporary_file_path('weights.npz')
+        weights.write(path)
+        actual = OverlapWeights.read(path)
+        for attr in ['rows', 'columns', 'values', 'ugids']:
+            self.assertNumpyAll(getattr(actual, attr), getattr(weights, attr))
+        self.assertEqual(actual.spatial_shape, weights.spatial_shape)
+        self.assertEqual(actual.key, 'foo')
+
+
+class Test(AbstractTestInterface):
+    def test_get_overlap_weights(self):
+        grid = self.get_gridxy_global(resolution=10.0)
+        geometries = [box(-20, -20, 15, 15)]
+        path = self.get_temporary_file_path('weights.npz')
+
+        with mock.patch.object(OverlapWeights, 'from_geometries', wraps=OverlapWeights.from_geometries) as m:
+            actual = get_overlap_weights(grid, geometries, path=path)
+            self.assertTrue(os.path.exists(path))
+            # Test weights are read from the sidecar file if the key matches.
+            desired = get_overlap_weights(grid, geometries, path=path)
+            self.assertEqual(m.call_count, 1)
+            self.assertEqual(actual.key, desired.key)
+            self.assertNumpyAll(actual.values, desired.values)
+
+            # Test a different selection geometry replaces the sidecar file.
+            get_overlap_weights(grid, [box(0, 0, 15, 15)], path=path)
+            self.assertEqual(m.call_count, 2)
+
+            # Test the process-level cache.
+            env.OVERLAP_WEIGHTS_CACHE_MAX_SIZE = 1e6
+            try:
+                actual = get_overlap_weights(grid, geometries)
+                self.assertIs(get_overlap_weights(grid, geometries), actual)
+                self.assertEqual(m.call_count, 3)
+
+                # Test the sidecar file is written for cached weights.
+                path = self.get_temporary_file_path('cached.npz')
+                self.assertIs(get_overlap_weights(grid, geometries, path=path), actual)
+                self.assertEqual(OverlapWeights.read(path).key, actual.key)
+                get_overlap_weights(grid, [box(0, 0, 15, 15)], path=path)
+                self.assertIs(get_overlap_weights(grid, geometries, path=path), actual)
+                self.assertEqual(OverlapWeights.read(path).key, actual.key)
+                self.assertEqual(m.call_count, 4)
+            finally:
+                from ocgis.spatial import weights
+                weights._overlap_weights_cache.clear()
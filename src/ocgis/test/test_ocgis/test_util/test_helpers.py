@@ -577,6 +577,14 @@ class Test2(TestBase):
         upper = dt(2002, 1, 1)
         self.assertTrue(get_is_date_between(lower, upper, month=12))
 
+    def test_get_is_date_part_between(self):
+        part_lower = np.array([1, 12, 3, 6])
+        part_upper = np.array([2, 1, 3, 9])
+        actual = get_is_date_part_between(part_lower, part_upper, 12)
+        self.assertEqual(actual.tolist(), [False, True, False, False])
+        actual = get_is_date_part_between(part_lower, part_upper, 3)
+        self.assertEqual(actual.tolist(), [False, False, True, False])
+
     def test_get_formatted_slice(self):
         slc = (np.array([0, 2]),)
         actual = get_formatted_slice(slc, 1)
@@ -0,0 +1,67 @@
+import threading
+
+from ocgis.test.base import TestBase
+from ocgis.util.lru import LRUCache
+
+
+class TestLRUCache(TestBase):
+    def test_get(self):
+        cache = LRUCache()
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('a', 5), 5)
+        cache.put('a', None)
+        self.assertIsNone(cache.get('a', 5))
+
+    def test_get_or_create(self):
+        cache = LRUCache(max_size=2)
+        first = cache.get_or_create('a', object)
+        self.assertIs(cache.get_or_create('a', object), first)
+        self.assertEqual(len(cache), 1)
+
+        # Test values are not created while holding the cache lock.
+        b_created = threading.Event()
+
+        def create_a():
+            return b_created.wait(5)
+
+        def create_b():
+            b_created.set()
+            return True
+
+        cache.clear()
+        thread = threading.Thread(target=lambda: cache.get_or_create('a', create_a))
+        thread.start()
+        cache.get_or_create('b', create_b)
+        thread.join()
+        self.assertTrue(cache.get('a'))
+
+    def test_pop(self):
+        cache = LRUCache()
+        cache.put('a', 1, size=3)
+        self.assertEqual(cache.pop('a'), 1)
+        self.assertIsNone(cache.pop('a'))
+        self.assertEqual(cache.size, 0)
+
+    def test_put(self):
+        cache = LRUCache(max_size=10)
+        cache.put('a', 1, size=6)
+        cache.put('b', 2, size=4)
+        self.assertEqual(cache.keys(), ['a', 'b'])
+
+        # Test the least recently used entry is removed when the maximum size is exceeded.
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3, size=2)
+        self.assertEqual(cache.keys(), ['a', 'c'])
+        self.assertEqual(cache.size, 8)
+
+        # Test values larger than the maximum size are not cached.
+        cache.put('d', 4, size=11)
+        self.assertIsNone(cache.get('d'))
+
+        # Test replacing an entry updates the size.
+        cache.put('c', 5, size=1)
+        self.assertEqual(cache.size, 7)
+
+        cache.set_max_size(0)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.size, 0)
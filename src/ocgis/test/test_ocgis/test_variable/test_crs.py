@@ -5,11 +5,12 @@ from unittest import SkipTest
 
 import netCDF4 as nc
 import numpy as np
+from mock import mock
 from shapely.geometry import Point, MultiPoint
 from shapely.geometry.multipolygon import MultiPolygon
 
 import ocgis
-from ocgis import constants, vm
+from ocgis import constants, vm, env
 from ocgis.collection.field import Field
 from ocgis.constants import WrapAction, WrappedState, ConversionFactor, OcgisUnits, CFName
 from ocgis.driver.request.core import RequestDataset
@@ -22,7 +23,7 @@ from ocgis.util.itester import itr_products_keywords
 from ocgis.variable.base import Variable
 from ocgis.variable.crs import CoordinateReferenceSystem, CFAlbersEqualArea, CFLambertConformal, \
     CFRotatedPole, WGS84, Spherical, CFSpherical, Tripole, Cartesian, AbstractProj4CRS, create_crs, \
-    CFPolarStereographic
+    CFPolarStereographic, get_transformer, get_transformed_coordinates, get_spatial_reference, CRSCache
 from ocgis.variable.geom import GeometryVariable
 from ocgis.vmachine.mpi import OcgDist, MPI_RANK, variable_scatter
 
@@ -37,6 +38,69 @@ class Test(TestBase):
         actual = create_crs(value)
         self.assertIsInstance(actual, WGS84)
 
+    def test_get_spatial_reference(self):
+        actual = get_spatial_reference({'proj': 'longlat', 'a': 6370997, 'b': 6370997, 'no_defs': True})
+        desired = get_spatial_reference('+b=6370997 +proj=longlat +no_defs +a=6370997')
+        self.assertIs(actual, desired)
+        self.assertTrue(actual.IsGeographic())
+
+        # Test spatial references are not shared if the cache is disabled.
+        env.CRS_CACHE_MAX_SIZE = 0
+        self.assertIsNot(get_spatial_reference(Spherical().value), get_spatial_reference(Spherical().value))
+
+    def test_get_transformer(self):
+        to_crs = CoordinateReferenceSystem(epsg=2136)
+        actual = get_transformer(WGS84(), to_crs)
+        self.assertIs(get_transformer(WGS84(), to_crs), actual)
+        self.assertIsNot(get_transformer(to_crs, WGS84()), actual)
+
+    def test_get_transformed_coordinates(self):
+        to_crs = CoordinateReferenceSystem(epsg=2136)
+        x = np.array([-1.0, 1.0, 2.5])
+        y = np.array([5.0, 6.0, 10.0])
+        actual = get_transformed_coordinates(WGS84(), to_crs, x, y)
+
+        # Test against the OGR transformation used when a transformer is not available.
+        with mock.patch('ocgis.variable.crs.get_transformer', return_value=None):
+            desired = get_transformed_coordinates(WGS84(), to_crs, x, y)
+        for a, d in zip(actual, desired):
+            self.assertNumpyAllClose(a, d)
+        self.assertNumpyAll(x, np.array([-1.0, 1.0, 2.5]))
+
+
+class TestCRSCache(TestBase):
+    def test_get_or_create(self):
+        cache = CRSCache(max_size=2)
+        create = mock.Mock(side_effect=lambda: object())
+        first = cache.get_or_create('a', create)
+        cache.get_or_create('b', create)
+        self.assertIs(cache.get_or_create('a', create), first)
+        cache.get_or_create('c', create)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(create.call_count, 3)
+
+        # Test the least recently used entry is removed.
+        cache.get_or_create('b', create)
+        self.assertEqual(create.call_count, 4)
+
+        # Test None values are cached.
+        self.assertIsNone(cache.get_or_create('d', lambda: None))
+        self.assertIsNone(cache.get_or_create('d', create))
+        self.assertEqual(create.call_count, 4)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+        # Test the maximum number of entries is read from the environment.
+        cache = CRSCache()
+        env.CRS_CACHE_MAX_SIZE = 0
+        cache.get_or_create('a', create)
+        self.assertEqual(len(cache), 0)
+        env.CRS_CACHE_MAX_SIZE = 1
+        cache.get_or_create('a', create)
+        cache.get_or_create('b', create)
+        self.assertEqual(len(cache), 1)
+
 
 class TestCoordinateReferenceSystem(TestBase):
     def test_init(self):
@@ -25,7 +25,7 @@ from ocgis.variable.base import Variable, VariableCollection
 from ocgis.variable.crs import WGS84, Spherical, Cartesian
 from ocgis.variable.dimension import Dimension
 from ocgis.variable.geom import GeometryVariable, GeometryProcessor, get_split_polygon_by_node_threshold, \
-    GeometrySplitter, do_remove_self_intersects_multi
+    GeometrySplitter, do_remove_self_intersects_multi, get_clipped_geometries
 from ocgis.vmachine.mpi import OcgDist, MPI_RANK, variable_scatter, MPI_SIZE, variable_gather, MPI_COMM
 
 
@@ -63,6 +63,29 @@ class TestGeom(TestBase, FixtureSelfIntersectingPolygon):
     def test_do_remove_self_intersects_first(self):
         self.run_do_remove_self_intersects(self.fixture_self_intersecting_polygon_coords_first, debug=False)
 
+    def test_get_clipped_geometries(self):
+        geometries = np.empty((10, 8), dtype=object)
+        for x, y in itertools.product(range(10), range(8)):
+            geometries[x, y] = box(x, y, x + 1, y + 1)
+        subset_geometry = Point(5, 4).buffer(3)
+
+        actual = get_clipped_geometries(subset_geometry, geometries)
+        self.assertEqual(actual.shape, geometries.shape)
+        for a, g in zip(actual.flat, geometries.flat):
+            desired = g.intersection(subset_geometry)
+            self.assertTrue(a.equals(desired) or (a.is_empty and desired.is_empty))
+            self.assertAlmostEqual(a.area, desired.area)
+            # Geometries inside the subset geometry are not clipped.
+            if subset_geometry.contains(g):
+                self.assertIs(a, g)
+
+        # Test the per-element path returns the same geometries.
+        with mock.patch.multiple('ocgis.variable.geom', get_contains_properly_array=None):
+            desired = get_clipped_geometries(subset_geometry, geometries)
+        for a, d in zip(actual.flat, desired.flat):
+            self.assertAlmostEqual(a.area, d.area)
+            self.assertTrue(a.symmetric_difference(d).area < 1e-12)
+
 
 class TestGeometryProcessor(AbstractTestInterface):
     def test_iter_intersection(self):
@@ -685,6 +708,35 @@ class TestGeometryVariable(AbstractTestInterface, FixturePolygonWithHole, Fixtur
                 res = pa2.get_mask_from_intersects(b, use_spatial_index=k.use_spatial_index)
                 self.assertNumpyAll(res, value.mask)
 
+    def test_get_mask_from_intersects_bulk(self):
+        """Test bulk predicate evaluation matches evaluation per element."""
+
+        from ocgis.variable import geom
+
+        if geom.get_intersects_array is None:
+            raise SkipTest('Bulk predicates require Shapely 2.0 or later.')
+
+        value = [box(x, y, x + 1, y + 1) for x, y in itertools.product(range(10), range(8))]
+        pa = GeometryVariable(value=value, dimensions='ngeom')
+        original_mask = np.zeros(pa.shape, dtype=bool)
+        original_mask[::7] = True
+        # Neighboring boxes touch the subset geometry.
+        subset = box(2, 2, 5, 5)
+
+        for keep_touches, mask in itertools.product([True, False], [None, original_mask]):
+            actual = pa.get_mask_from_intersects(subset, use_spatial_index=False, keep_touches=keep_touches,
+                                                 original_mask=mask)
+            with mock.patch.multiple(geom, get_intersects_array=None, get_touches_array=None, prepare_geometry=None):
+                desired = pa.get_mask_from_intersects(subset, use_spatial_index=False, keep_touches=keep_touches,
+                                                      original_mask=mask)
+            self.assertNumpyAll(actual, desired)
+            self.assertFalse(actual.all())
+
+            # Test the bulk path is used when a spatial index is allowed but no backend is named.
+            actual = pa.get_mask_from_intersects(subset, use_spatial_index=True, keep_touches=keep_touches,
+                                                 original_mask=mask)
+            self.assertNumpyAll(actual, desired)
+
     def test_get_nearest(self):
         target1 = Point(0.5, 0.75)
         target2 = box(0.5, 0.75, 0.55, 0.755)
@@ -801,6 +853,28 @@ class TestGeometryVariable(AbstractTestInterface, FixturePolygonWithHole, Fixtur
 
         self.assertEqual(unioned.parent[to_weight.name].get_value()[0], 7.5)
 
+    def test_get_unioned_spatial_average_masked(self):
+        # Test with a two-dimensional geometry variable, a mask, and iteration dimensions not ordered first.
+        value = np.empty((3, 2), dtype=object)
+        for ii, jj in itertools.product(range(3), range(2)):
+            value[ii, jj] = box(jj, ii, jj + 1 + ii, ii + 1)
+        mask = np.zeros(value.shape, dtype=bool)
+        mask[1, 0] = True
+        pa = GeometryVariable(name='geoms', value=value, mask=mask, dimensions=['y', 'x'])
+        data = np.arange(4 * 3 * 2, dtype=float).reshape(2, 4, 3)
+        to_weight = Variable(name='to_weight', value=data, dimensions=['x', 'time', 'y'])
+        pa.parent.add_variable(to_weight)
+
+        unioned = pa.get_unioned(spatial_average='to_weight')
+
+        self.assertAlmostEqual(unioned.get_value()[0].area, 8.0)
+        actual = unioned.parent[to_weight.name]
+        self.assertEqual(actual.dimension_names, ('time', 'ocgis_geom_union'))
+        weights = pa.weights
+        for time_idx in range(4):
+            desired = np.ma.average(np.ma.array(data[:, time_idx, :].transpose(), mask=mask), weights=weights)
+            self.assertAlmostEqual(actual.get_value()[time_idx, 0], desired)
+
     @attr('mpi')
     def test_get_unioned_spatial_average_parallel(self):
         if MPI_SIZE != 8:
@@ -914,6 +988,18 @@ class TestGeometryVariable(AbstractTestInterface, FixturePolygonWithHole, Fixtur
         np.testing.assert_almost_equal(pa.get_value()[0], v0, decimal=3)
         np.testing.assert_almost_equal(pa.get_value()[1], v1, decimal=3)
 
+        # Test bulk transformations match the OGR transformations.
+        value = [Point(-1, 5), box(-1, 5, 2, 10), Point(1, 2, 3)]
+        for geoms in [value[0:2], value]:
+            actual = GeometryVariable(value=geoms, mask=[False, True, False][0:len(geoms)], crs=from_crs,
+                                      dimensions='gg')
+            actual.update_crs(to_crs)
+            desired = GeometryVariable(value=geoms, crs=from_crs, dimensions='gg')
+            with mock.patch('ocgis.variable.geom.get_transformer', return_value=None):
+                desired.update_crs(to_crs)
+            for a, d in zip(actual.get_value(), desired.get_value()):
+                self.assertTrue(a.equals_exact(d, 1e-3))
+
     def test_update_crs_to_cartesian(self):
         """Test a spherical to cartesian CRS update."""
 
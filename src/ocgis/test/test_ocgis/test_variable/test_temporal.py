@@ -19,7 +19,7 @@ from ocgis.util.units import get_units_object, get_are_units_equal, get_are_unit
 from ocgis.variable.temporal import get_datetime_conversion_state, get_datetime_from_months_time_units, \
     get_datetime_from_template_time_units, get_difference_in_months, get_is_interannual, get_num_from_months_time_units, \
     get_origin_datetime_from_months_units, get_sorted_seasons, TemporalVariable, iter_boolean_groups_from_time_regions, \
-    TemporalGroupVariable, get_time_regions, get_datetime_or_netcdftime
+    TemporalGroupVariable, get_time_regions, get_datetime_or_netcdftime, get_date_parts_from_numtime
 from ocgis.variable.temporal import get_datetime_or_netcdftime as dt
 
 try:
@@ -39,6 +39,35 @@ class AbstractTestTemporal(AbstractTestInterface):
 
 
 class Test(AbstractTestTemporal):
+    def test_get_date_parts_from_numtime(self):
+        np.random.seed(1)
+        hourly = np.arange(0, 3 * 366 * 24) / 24.
+        random = np.random.rand(1000) * 60000 - 1000
+        calendars = ['standard', 'proleptic_gregorian', 'noleap', '365_day', 'all_leap', '366_day', '360_day']
+        for calendar in calendars:
+            for units in ['days since 1850-01-01', 'hours since 1979-02-28 06:30:00']:
+                for value in [hourly, random, np.arange(-50, 50)]:
+                    if units.startswith('hours'):
+                        value = value * 24
+                    actual = get_date_parts_from_numtime(value, units, calendar)
+                    desired = [[d.year, d.month, d.day, d.hour, d.minute, d.second] for d in
+                               num2date(value, units, calendar=calendar)]
+                    self.assertEqual(actual.tolist(), desired)
+
+        # Test the shape is maintained.
+        actual = get_date_parts_from_numtime(np.array([[0.5, 1.5], [1.5, 2.5]]), 'days since 2000-01-01', 'noleap')
+        self.assertEqual(actual.shape, (2, 2, 6))
+        self.assertEqual(actual[1, 1].tolist(), [2000, 1, 3, 12, 0, 0])
+
+        # Test unsupported units and calendars.
+        self.assertIsNone(get_date_parts_from_numtime(hourly, 'months since 2000-01', 'standard'))
+        self.assertIsNone(get_date_parts_from_numtime(hourly, 'days since 2000-01-01', 'julian'))
+        # Dates before the Gregorian transition use the Julian calendar.
+        self.assertIsNone(get_date_parts_from_numtime(hourly, 'days since 1500-01-01', 'standard'))
+        self.assertIsNone(get_date_parts_from_numtime([-1e6], 'days since 1850-01-01', 'gregorian'))
+        actual = get_date_parts_from_numtime([0.], 'days since 1500-01-01', 'proleptic_gregorian')
+        self.assertEqual(actual.tolist(), [[1500, 1, 1, 0, 0, 0]])
+
     def test_get_datetime_conversion_state(self):
         archetypes = [45.5, datetime.datetime(2000, 1, 1), netcdftime.datetime(2000, 4, 5)]
         for archetype in archetypes:
@@ -446,6 +475,27 @@ class TestTemporalVariable(AbstractTestTemporal):
                     datetime.datetime(2013, 10, 16, 0, 0)]]
         self.assertEqual(to_test, correct)
 
+    def test_get_date_parts(self):
+        value_datetime = np.array([dt(2000, 1, 15, 12), dt(2000, 2, 29, 6, 30, 15)])
+        value = date2num(value_datetime, 'hours since 1970-01-01', calendar='standard')
+        desired = [[2000, 1, 15, 12, 0, 0], [2000, 2, 29, 6, 30, 15]]
+        for v, units in [(value, 'hours since 1970-01-01'), (value_datetime, None)]:
+            tv = self.init_temporal_variable(value=v, units=units)
+            self.assertEqual(tv.get_date_parts().tolist(), desired)
+            if units is None:
+                # Datetime values fall back to the datetime objects.
+                self.assertIsNotNone(tv._value_datetime)
+            else:
+                # Numeric time values are not converted to datetime objects.
+                self.assertIsNone(tv._value_datetime)
+
+        tv = self.init_temporal_variable(value=[1., 2.], units='days since 1500-01-01')
+        self.assertEqual(tv.get_date_parts()[:, 0:3].tolist(), [[1500, 1, 2], [1500, 1, 3]])
+
+        tv = self.init_temporal_variable(value=value, format_time=False)
+        with self.assertRaises(CannotFormatTimeError):
+            tv.get_date_parts()
+
     def test_get_datetime(self):
         td = self.init_temporal_variable(value=[5, 6])
         dts = np.array([dt(2000, 1, 15, 12), dt(2000, 2, 15, 12)])
@@ -534,6 +584,29 @@ class TestTemporalVariable(AbstractTestTemporal):
                 desired = [[693232.5, 694326.5]]
             self.assertNumpyAllClose(np.array(actual), np.array(desired))
 
+    def test_get_grouping_group_index(self):
+        td = self.get_temporalvariable()
+        for grouping in [['month'], ['month', 'year'], ['day', 'month', 'year'], 'all']:
+            tgd = td.get_grouping(grouping)
+            self.assertEqual(tgd.group_index.shape, td.shape)
+            self.assertEqual(len(tgd.dgroups), tgd.shape[0])
+            for idx, dgroup in enumerate(tgd.dgroups):
+                self.assertNumpyAll(td.get_value()[tgd.group_index == idx], td.get_value()[dgroup])
+
+        # Time is ordered by month and year.
+        tgd = td.get_grouping(['month', 'year'])
+        self.assertEqual(tgd.group_offsets.shape[0], tgd.shape[0] + 1)
+        self.assertEqual(tgd.group_offsets[0:3].tolist(), [0, 31, 59])
+        # Time steps are not ordered by month across years.
+        tgd = td.get_grouping(['month'])
+        self.assertIsNone(tgd.group_offsets)
+        self.assertEqual(tgd.group_index[0:3].tolist(), [0, 0, 0])
+
+        # Seasonal groups are derived from the boolean group arrays.
+        tgd = td.get_grouping([[12, 1, 2], [6, 7, 8]])
+        self.assertEqual(tgd.group_index[0], 0)
+        self.assertEqual(tgd.group_index[100], -1)
+
     def test_get_grouping_other(self):
         tdim = self.get_temporalvariable()
         grouping = [[12, 1, 2], [3, 4, 5], [6, 7, 8], [9, 10, 11], 'year']
@@ -941,6 +1014,22 @@ class TestTemporalVariable(AbstractTestTemporal):
 
         self.assertEqual(ret.extent, (datetime.datetime(2003, 9, 20), datetime.datetime(2003, 10, 31)))
 
+    def test_get_time_region_numtime(self):
+        # Test date parts are computed numerically for a non-standard calendar with bounds.
+        value = np.arange(15, 365 * 3, 30) + 0.5
+        bounds = np.hstack((value.reshape(-1, 1) - 15, value.reshape(-1, 1) + 15))
+        bounds = TemporalVariable(value=bounds, name='time_bnds', dimensions=['time', 'bounds'])
+        td = TemporalVariable(value=value, bounds=bounds, units='days since 2000-01-01', calendar='360_day',
+                              dimensions='time')
+
+        ret, indices = td.get_time_region({'month': [2], 'year': [2001]}, return_indices=True)
+        self.assertEqual(indices.tolist(), [13])
+        self.assertIsNone(td._value_datetime)
+        self.assertEqual(ret.value_datetime[0], td.get_datetime(np.array([405.5]))[0])
+
+        ret = td.get_time_region({'month': [12, 1]})
+        self.assertEqual([d.month for d in ret.value_datetime], [1, 12, 1, 12, 1, 12])
+
     def test_get_to_conform_value(self):
         td = self.init_temporal_variable(value=[datetime.datetime(2000, 1, 1)])
         self.assertNumpyAllClose(td._get_to_conform_value_(), np.ma.array([730121.]))
@@ -1113,6 +1202,24 @@ class TestTemporalVariable(AbstractTestTemporal):
 
 
 class TestTemporalGroupVariable(AbstractTestInterface):
+    def test_group_index(self):
+        dgroups = [np.array([True, True, False, False]), np.array([False, False, True, True])]
+        tgv = TemporalGroupVariable(value=[1, 3], dimensions='time', dgroups=dgroups)
+        self.assertEqual(tgv.group_index.tolist(), [0, 0, 1, 1])
+        self.assertEqual(tgv.group_offsets.tolist(), [0, 2, 4])
+
+        # Boolean groups are derived from the group index.
+        tgv = TemporalGroupVariable(value=[1, 3], dimensions='time', group_index=np.array([1, 0, 1, -1]))
+        self.assertEqual(len(tgv.dgroups), 2)
+        self.assertEqual(tgv.dgroups[0].tolist(), [False, True, False, False])
+        self.assertEqual(tgv.dgroups[-1].tolist(), [True, False, True, False])
+        self.assertIsNone(tgv.group_offsets)
+
+        # Overlapping groups have no group index.
+        dgroups = [np.array([True, True, False]), np.array([False, True, True])]
+        tgv = TemporalGroupVariable(value=[1, 2], dimensions='time', dgroups=dgroups)
+        self.assertIsNone(tgv.group_index)
+
     def get_tgv(self):
         rd = self.get_request_dataset()
         bounds = TemporalVariable(name='time_bnds', request_dataset=rd)
@@ -510,14 +510,27 @@ def get_is_date_between(lower, upper, month=None, year=None):
         to_test = year
 
     part_lower, part_upper = getattr(lower, attr), getattr(upper, attr)
-    if part_lower != part_upper:
-        if part_lower > part_upper:
-            # in the case of a year overlap, increment the upper into another year by adding 12 months
-            part_upper += 12
-        ret = np.logical_and(to_test >= part_lower, to_test < part_upper)
-    else:
-        ret = np.logical_and(to_test >= part_lower, to_test <= part_upper)
+    return get_is_date_part_between(part_lower, part_upper, to_test)
+
+
+def get_is_date_part_between(part_lower, part_upper, to_test):
+    """
+    :param part_lower: The lower boundary date part (i.e. month). May be an integer array.
+    :type part_lower: int | :class:`numpy.ndarray`
+    :param part_upper: The upper boundary date part. Must have the same shape as ``part_lower``.
+    :type part_upper: int | :class:`numpy.ndarray`
+    :param int to_test: The date part value to check.
+    :returns: ``True`` where the check value occurs in the interval.
+    :rtype: bool | :class:`numpy.ndarray`
+    """
 
+    # In the case of a year overlap, increment the upper into another year by adding 12 months.
+    part_upper_overlap = np.where(part_lower > part_upper, part_upper + 12, part_upper)
+    ret = np.where(part_lower != part_upper,
+                   np.logical_and(to_test >= part_lower, to_test < part_upper_overlap),
+                   np.logical_and(to_test >= part_lower, to_test <= part_upper))
+    if ret.ndim == 0:
+        ret = ret.item()
     return ret
 
 
@@ -0,0 +1,123 @@
+import threading
+from collections import OrderedDict
+
+from ocgis.base import AbstractOcgisObject
+
+_MISSING = object()
+
+
+class LRUCache(AbstractOcgisObject):
+    """
+    Thread-safe least recently used cache bounded by the total size of its entries.
+
+    :param int max_size: The maximum total size of the entries. If ``None``, the size is not limited.
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self.size = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """Remove all cache entries."""
+
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def get(self, key, default=None):
+        """
+        :param key: The entry key.
+        :param default: The value to return if the key is not in the cache.
+        :returns: The cached value or ``default`` if the key is not in the cache.
+        """
+
+        with self._lock:
+            try:
+                entry = self._entries.pop(key)
+            except KeyError:
+                ret = default
+            else:
+                # Move the entry to the most recently used position.
+                self._entries[key] = entry
+                ret = entry[0]
+        return ret
+
+    def get_or_create(self, key, create, size=1):
+        """
+        Get a cached value, creating and adding it if the key is not in the cache. The value is created without holding
+        the cache lock so values for different keys are created concurrently.
+
+        :param key: The entry key.
+        :param create: A callable with no arguments returning the value to cache.
+        :param int size: The size of a created value.
+        :returns: The cached or created value.
+        """
+
+        ret = self.get(key, _MISSING)
+        if ret is _MISSING:
+            ret = create()
+            self.put(key, ret, size=size)
+        return ret
+
+    def keys(self):
+        """
+        :returns: The entry keys ordered from least to most recently used.
+        :rtype: list
+        """
+
+        with self._lock:
+            return list(self._entries.keys())
+
+    def pop(self, key, default=None):
+        """
+        :param key: The key of the entry to remove.
+        :param default: The value to return if the key is not in the cache.
+        :returns: The removed value or ``default`` if the key is not in the cache.
+        """
+
+        with self._lock:
+            try:
+                ret, size = self._entries.pop(key)
+            except KeyError:
+                ret = default
+            else:
+                self.size -= size
+        return ret
+
+    def put(self, key, value, size=1):
+        """
+        Add a value to the cache removing the least recently used entries if the maximum size is exceeded. Values larger
+        than the maximum size are not cached.
+
+        :param key: The entry key.
+        :param value: The value to cache.
+        :param int size: The size of the value.
+        """
+
+        if self.max_size is not None and size > self.max_size:
+            return
+
+        with self._lock:
+            self.pop(key)
+            self._entries[key] = (value, size)
+            self.size += size
+            self._evict_()
+
+    def set_max_size(self, max_size):
+        """
+        :param int max_size: The new maximum size. Least recently used entries are removed if it is exceeded.
+        """
+
+        with self._lock:
+            self.max_size = max_size
+            self._evict_()
+
+    def _evict_(self):
+        while self.max_size is not None and self.size > self.max_size:
+            self.size -= self._entries.popitem(last=False)[1][1]
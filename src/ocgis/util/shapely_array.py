@@ -0,0 +1,12 @@
+# Vectorized geometry functions available with Shapely 2.0 or later. Shapely < 2.0 does not support vectorized
+# operations. The names are then None and geometries are constructed, evaluated, and transformed per element.
+try:
+    from shapely import STRtree, area as get_area_array, bounds as get_bounds_array, box as get_box_array, \
+        contains_properly as get_contains_properly_array, has_z as get_has_z_array, \
+        intersection as get_intersection_array, intersects as get_intersects_array, points as get_point_array, \
+        polygons as get_polygon_array, prepare as prepare_geometry, total_bounds as get_total_bounds_array, \
+        touches as get_touches_array, transform as get_transformed_array, union_all as get_union_all
+except ImportError:
+    STRtree = get_area_array = get_bounds_array = get_box_array = get_contains_properly_array = get_has_z_array = \
+        get_intersection_array = get_intersects_array = get_point_array = get_polygon_array = prepare_geometry = \
+        get_total_bounds_array = get_touches_array = get_transformed_array = get_union_all = None
@@ -14,11 +14,20 @@ from ocgis import constants
 from ocgis.base import AbstractInterfaceObject, raise_if_empty, AbstractOcgisObject
 from ocgis.constants import MPIWriteMode, WrappedState, WrapAction, KeywordArgument, CFName, OcgisUnits, \
     ConversionFactor, DimensionMapKey, DMK, OcgisConvention
-from ocgis.environment import osr
+from ocgis.environment import osr, env
 from ocgis.exc import ProjectionCoordinateNotFound, ProjectionDoesNotMatch, CRSNotEquivalenError, \
     WrappedStateEvalTargetMissing, CRSDepthNotImplemented
 from ocgis.spatial.wrap import GeometryWrapper, CoordinateArrayWrapper
 from ocgis.util.helpers import iter_array, get_iter
+from ocgis.util.lru import LRUCache
+
+try:
+    from pyproj import Transformer
+    from pyproj.exceptions import CRSError, ProjError
+except ImportError:
+    # Transformer objects are not available for pyproj < 2.1. Coordinates are transformed with the legacy interface.
+    from pyproj import Proj, transform
+    Transformer = None
 
 SpatialReference = osr.SpatialReference
 
@@ -491,9 +500,7 @@ class CoordinateReferenceSystem(AbstractProj4CRS, AbstractInterfaceObject):
             if proj4 is not None:
                 value = from_string(proj4)
             elif epsg is not None:
-                sr = SpatialReference()
-                sr.ImportFromEPSG(epsg)
-                value = from_string(sr.ExportToProj4())
+                value = deepcopy(_crs_cache.get_or_create(('epsg', epsg), lambda: _get_value_from_epsg_(epsg)))
             else:
                 msg = 'A value dictionary, PROJ.4 string, or EPSG code is required.'
                 raise ValueError(msg)
@@ -509,9 +516,12 @@ class CoordinateReferenceSystem(AbstractProj4CRS, AbstractInterfaceObject):
                     except AttributeError:
                         continue
 
-        sr = SpatialReference()
-        sr.ImportFromProj4(to_string(value))
-        self.value = from_string(sr.ExportToProj4())
+        # Normalize the coordinate system's value using its spatial reference.
+        key = ('value', get_crs_key(value))
+        def _create_():
+            return from_string(get_spatial_reference(value).ExportToProj4())
+
+        self.value = deepcopy(_crs_cache.get_or_create(key, _create_))
 
         try:
             assert self.value != {}
@@ -521,7 +531,8 @@ class CoordinateReferenceSystem(AbstractProj4CRS, AbstractInterfaceObject):
 
     def __eq__(self, other):
         try:
-            if self.sr.IsSame(other.sr) == 1:
+            key = ('is_same', get_crs_key(self.value), get_crs_key(other.value))
+            if _crs_cache.get_or_create(key, lambda: self.sr.IsSame(other.sr) == 1):
                 ret = True
             else:
                 # Try a value comparison.
@@ -578,14 +589,17 @@ class CoordinateReferenceSystem(AbstractProj4CRS, AbstractInterfaceObject):
         if self._epsg == 4326:
             ret = WGS84().proj4
         else:
-            ret = self.sr.ExportToProj4()
+            ret = _crs_cache.get_or_create(('proj4', get_crs_key(self.value)), lambda: self.sr.ExportToProj4())
         return ret
 
     @property
     def sr(self):
-        sr = SpatialReference()
-        sr.ImportFromProj4(to_string(self.value))
-        return sr
+        """
+        :return: The spatial reference for the coordinate system. It is shared by equivalent coordinate systems and
+         should not be modified.
+        :rtype: :class:`osgeo.osr.SpatialReference`
+        """
+        return get_spatial_reference(self.value)
 
     @property
     def shape(self):
@@ -1177,6 +1191,34 @@ class CFRotatedPole(CFCoordinateReferenceSystem):
         return variable
 
 
+class CRSCache(LRUCache):
+    """
+    Thread-safe least recently used cache of objects parsed or created from coordinate system definitions such as
+    spatial references, normalized PROJ.4 values, equivalence checks, and coordinate transformers. Entry keys contain
+    normalized PROJ.4 strings (see :func:`~ocgis.variable.crs.get_crs_key`). Cached objects are shared and should not be
+    modified.
+
+    :param int max_size: The maximum number of entries. If ``None``, use :attr:`ocgis.env.CRS_CACHE_MAX_SIZE`. Nothing
+     is cached if the maximum number of entries is zero.
+    """
+
+    def __init__(self, max_size=None):
+        super(CRSCache, self).__init__(max_size=max_size)
+        self._use_env_max_size = max_size is None
+
+    def get_or_create(self, key, create, size=1):
+        """
+        See :meth:`ocgis.util.lru.LRUCache.get_or_create`. Objects are created without holding the cache lock so
+        coordinate systems and transformers for different keys are created concurrently.
+        """
+
+        if self._use_env_max_size and self.max_size != env.CRS_CACHE_MAX_SIZE:
+            self.set_max_size(env.CRS_CACHE_MAX_SIZE)
+        if not self.max_size:
+            return create()
+        return super(CRSCache, self).get_or_create(key, create, size=size)
+
+
 def create_crs(value, **kwargs):
     """
     Create a coordinate system object from a dictionary definition. This will create a spherical coordinate system
@@ -1205,6 +1247,66 @@ def create_crs(value, **kwargs):
     return ret
 
 
+def get_transformer(from_crs, to_crs):
+    """
+    Get a coordinate transformer between two coordinate systems. A transformer is created once for each pair of
+    coordinate systems and reused for later transformations (see :class:`~ocgis.variable.crs.CRSCache`). Transformers
+    always use ``(x, y)`` coordinate order.
+
+    :param from_crs: The source coordinate system.
+    :type from_crs: :class:`~ocgis.variable.crs.CoordinateReferenceSystem`
+    :param to_crs: The destination coordinate system.
+    :type to_crs: :class:`~ocgis.variable.crs.CoordinateReferenceSystem`
+    :return: ``None`` if transformers are not available or the coordinate systems are not supported by ``pyproj``.
+    :rtype: :class:`pyproj.Transformer` | ``None``
+    """
+
+    if Transformer is None:
+        return None
+
+    def _create_():
+        try:
+            ret = Transformer.from_crs(from_proj4, to_proj4, always_xy=True)
+        except (CRSError, ProjError):
+            ret = None
+        return ret
+
+    from_proj4 = from_crs.proj4
+    to_proj4 = to_crs.proj4
+    return _crs_cache.get_or_create(('transformer', get_crs_key(from_proj4), get_crs_key(to_proj4)), _create_)
+
+
+def get_transformed_coordinates(from_crs, to_crs, x, y):
+    """
+    Transform coordinate arrays between two coordinate systems. A cached ``pyproj`` transformer is used if available
+    (see :func:`~ocgis.variable.crs.get_transformer`). Otherwise, the coordinates are transformed using OGR.
+
+    :param from_crs: The source coordinate system.
+    :type from_crs: :class:`~ocgis.variable.crs.CoordinateReferenceSystem`
+    :param to_crs: The destination coordinate system.
+    :type to_crs: :class:`~ocgis.variable.crs.CoordinateReferenceSystem`
+    :param x: Vector of x-coordinates.
+    :type x: :class:`numpy.ndarray`
+    :param y: Vector of y-coordinates.
+    :type y: :class:`numpy.ndarray`
+    :return: A tuple with the transformed x-coordinates as the first element and y-coordinates as the second.
+    :rtype: tuple
+    """
+
+    transformer = get_transformer(from_crs, to_crs)
+    if transformer is not None:
+        ret = transformer.transform(x, y)
+    elif Transformer is None:
+        ret = transform(Proj(from_crs.proj4), Proj(to_crs.proj4), x, y)
+    else:
+        from ocgis.spatial.grid import update_crs_with_geometry_collection
+        x = np.array(x, dtype=float)
+        y = np.array(y, dtype=float)
+        update_crs_with_geometry_collection(from_crs.sr, to_crs.sr, y, x)
+        ret = (x, y)
+    return ret
+
+
 def get_lonlat_rotated_pole_transform(lon, lat, transform, inverse=False, is_vectorized=False):
     """
     Transform longitude and latitude coordinates to/from their rotated pole representation.
@@ -1269,3 +1371,46 @@ def get_lonlat_rotated_pole_transform(lon, lat, transform, inverse=False, is_vec
     rlat = rlon_rlat[:, 1]
 
     return rlon, rlat
+
+
+def get_crs_key(value):
+    """
+    Normalize a coordinate system definition for use as a cache key.
+
+    :param value: A PROJ.4 string or dictionary.
+    :type value: str | dict
+    :return: The PROJ.4 string with its parameters sorted.
+    :rtype: str
+    """
+
+    if isinstance(value, dict):
+        value = to_string(value)
+    return ' '.join(sorted(value.split()))
+
+
+def get_spatial_reference(value):
+    """
+    Get a spatial reference for a coordinate system definition. Spatial references are parsed once for each
+    definition and shared (see :class:`~ocgis.variable.crs.CRSCache`). They should not be modified.
+
+    :param value: A PROJ.4 string or dictionary.
+    :type value: str | dict
+    :rtype: :class:`osgeo.osr.SpatialReference`
+    """
+
+    def _create_():
+        ret = SpatialReference()
+        ret.ImportFromProj4(to_string(value) if isinstance(value, dict) else value)
+        return ret
+
+    return _crs_cache.get_or_create(('sr', get_crs_key(value)), _create_)
+
+
+def _get_value_from_epsg_(epsg):
+    sr = SpatialReference()
+    sr.ImportFromEPSG(epsg)
+    return from_string(sr.ExportToProj4())
+
+
+# Process-level cache of parsed coordinate systems and coordinate transformers.
+_crs_cache = CRSCache()
@@ -1,9 +1,8 @@
 import logging
 from collections import deque
-from copy import deepcopy
-from itertools import product
 
 import numpy as np
+import six
 from numpy.core.multiarray import ndarray
 from shapely import wkb
 from shapely.geometry import Point, Polygon, MultiPolygon, mapping, MultiPoint, box
@@ -18,16 +17,19 @@ from ocgis import env
 from ocgis.base import AbstractOcgisObject
 from ocgis.base import get_dimension_names, get_variable_names, raise_if_empty
 from ocgis.constants import KeywordArgument, HeaderName, VariableName, DimensionName, ConversionTarget, DriverKey, \
-    WrappedState, AttributeName, WrapAction
+    WrappedState, AttributeName, WrapAction, SpatialIndexBackend
 from ocgis.environment import ogr
 from ocgis.exc import EmptySubsetError, RequestableFeature, NoInteriorsError, SelfIntersectsRemovalError
 from ocgis.spatial.base import AbstractSpatialVariable, create_split_polygons
 from ocgis.util.addict import Dict
-from ocgis.util.helpers import iter_array, get_trimmed_array_by_mask, get_swap_chain, find_index, \
+from ocgis.util.helpers import iter_array, get_trimmed_array_by_mask, find_index, \
     iter_exploded_geometries, get_iter
 from ocgis.util.logging_ocgis import ocgis_lh
-from ocgis.variable.base import get_dimension_lengths, ObjectType
-from ocgis.variable.crs import Cartesian
+from ocgis.util.shapely_array import get_intersects_array, get_touches_array, prepare_geometry, \
+    get_contains_properly_array, get_intersection_array, get_area_array, get_bounds_array, get_union_all, \
+    get_transformed_array, get_has_z_array
+from ocgis.variable.base import ObjectType
+from ocgis.variable.crs import Cartesian, get_transformer
 from ocgis.variable.dimension import create_distributed_dimension, Dimension
 from ocgis.variable.iterator import Iterator
 
@@ -242,8 +244,12 @@ class GeometryVariable(AbstractSpatialVariable):
                 mask = mask.copy()
 
             fill = np.ma.array(fill, mask=mask)
-            for slc, geom in iter_array(r_value, return_value=True):
-                fill.data[slc] = geom.area
+            if get_area_array is None:
+                for slc, geom in iter_array(r_value, return_value=True):
+                    fill.data[slc] = geom.area
+            else:
+                select = np.invert(np.ma.getmaskarray(r_value))
+                fill.data[select] = get_area_array(r_value.data[select])
         return fill
 
     @property
@@ -756,11 +762,12 @@ class GeometryVariable(AbstractSpatialVariable):
                 obj = ret
 
         if not obj.is_empty:
+            # Clipped geometries are new objects. Only the array holding the geometries needs to be copied.
             if not inplace:
-                obj.set_value(deepcopy(obj.get_value()))
+                obj.set_value(obj.get_value().copy())
             obj_value = obj.get_masked_value()
-            for idx, geom in iter_array(obj_value, return_value=True):
-                obj_value.data[idx] = geom.intersection(subset_geometry)
+            select = np.invert(np.ma.getmaskarray(obj_value))
+            obj_value.data[select] = get_clipped_geometries(subset_geometry, obj_value.data[select])
         return ret
 
     def get_iter(self, *args, **kwargs):
@@ -781,7 +788,11 @@ class GeometryVariable(AbstractSpatialVariable):
         """
         :param geometry_or_bounds: A Shapely geometry or bounds tuple used for the masking.
         :type geometry_or_bounds: :class:`shapely.geometry.base.BaseGeometry` | :class:`tuple`
-        :param bool use_spatial_index: If ``True``, use a spatial index for the operation.
+        :param use_spatial_index: If ``True``, use a spatial index for the operation if predicates may not be
+         evaluated in bulk (Shapely < 2.0) or a persisted index may be reused (see
+         :attr:`ocgis.env.DIR_SPATIAL_INDEX_CACHE`). If a spatial index backend name, always use a spatial index. See
+         :attr:`ocgis.env.USE_SPATIAL_INDEX`.
+        :type use_spatial_index: bool | str
         :param bool keep_touches: If ``True``, keep geometries that only touch.
         :param original_mask: A hint mask for the spatial operation. ``True`` values will be skipped.
         :type original_mask: :class:`numpy.ndarray`
@@ -835,26 +846,23 @@ class GeometryVariable(AbstractSpatialVariable):
 
         return lines
 
-    def get_spatial_index(self, target=None):
+    def get_spatial_index(self, target=None, backend=SpatialIndexBackend.RTREE):
         """
         :param target: If this is a boolean array, use this as the add target. Otherwise, use the compressed masked
          values.
         :type target: :class:`numpy.ndarray`
+        :param str backend: The index implementation. See :class:`~ocgis.constants.SpatialIndexBackend`.
         :return: spatial index for the geometry variable
-        :rtype: :class:`rtree.index.Index`
+        :rtype: :class:`~ocgis.spatial.index.SpatialIndex`
         """
 
         # "rtree" is an optional dependency.
         from ocgis.spatial.index import SpatialIndex
-        # Fill the spatial index with unmasked values only.
-        si = SpatialIndex()
         # Use compressed masked values if target is not available.
         if target is None:
             target = self.get_masked_value().compressed()
-        # Add the geometries to the index.
-        r_add = si.add
-        for idx, geom in iter_array(target, return_value=True):
-            r_add(idx[0], geom)
+        # Bulk load the spatial index with unmasked values only.
+        si = SpatialIndex(geometries=target, backend=backend)
 
         return si
 
@@ -914,41 +922,47 @@ class GeometryVariable(AbstractSpatialVariable):
         ret.set_dimensions(new_dimensions)
         ret.allocate_value()
 
-        # Destination indices in the return variable are filled with non-masked, unioned geometries.
-        for dst_indices in product(*[list(range(dl)) for dl in get_dimension_lengths(new_dimensions)]):
-            dst_slc = {new_dimensions[ii].name: dst_indices[ii] for ii in range(len(new_dimensions))}
-
-            # Select the geometries to union skipping any masked geometries.
-            to_union = deque()
-            for indices in product(*[list(range(dl)) for dl in dimension_lengths]):
-                dslc = {dimension_names[ii]: indices[ii] for ii in range(len(dimension_names))}
-                sub = self[dslc]
-                sub_mask = sub.get_mask()
-                if sub_mask is None:
-                    to_union.append(sub.get_value().flatten()[0])
-                else:
-                    if not sub_mask.flatten()[0]:
-                        to_union.append(sub.get_value().flatten()[0])
+        # Arrange the geometries and their mask so each row holds the geometries unioned into one destination element.
+        # Destination elements are ordered like the return variable with the union dimension (length one) last.
+        union_axes = [self.dimension_names.index(dn) for dn in dimension_names]
+        keep_axes = [ii for ii in range(self.ndim) if ii not in union_axes]
+        union_size = int(np.prod(dimension_lengths))
+        to_union_value = self.get_value().transpose(keep_axes + union_axes).reshape(-1, union_size)
+        to_union_mask = self.get_mask()
+        if to_union_mask is None:
+            to_union_mask = np.zeros(to_union_value.shape, dtype=bool)
+        else:
+            to_union_mask = to_union_mask.transpose(keep_axes + union_axes).reshape(-1, union_size)
+        ret_value = ret.get_value().reshape(-1)
+
+        # Destination elements are filled with non-masked, unioned geometries.
+        for dst_index in range(to_union_value.shape[0]):
+            to_union = to_union_value[dst_index][np.invert(to_union_mask[dst_index])]
 
             # Execute the union operation.
-            processed_to_union = deque()
-            for geom in to_union:
-                if isinstance(geom, MultiPolygon) or isinstance(geom, MultiPoint):
-                    for element in geom:
-                        processed_to_union.append(element)
-                else:
-                    processed_to_union.append(geom)
-            unioned = cascaded_union(processed_to_union)
+            if get_union_all is None:
+                processed_to_union = deque()
+                for geom in to_union:
+                    if isinstance(geom, MultiPolygon) or isinstance(geom, MultiPoint):
+                        for element in geom:
+                            processed_to_union.append(element)
+                    else:
+                        processed_to_union.append(geom)
+                unioned = cascaded_union(processed_to_union)
+            else:
+                unioned = get_union_all(to_union)
 
             # Pull unioned geometries and union again for the final unioned geometry.
             if vm.size > 1:
                 unioned_gathered = vm.gather(unioned)
                 if vm.rank == root:
-                    unioned = cascaded_union(unioned_gathered)
+                    if get_union_all is None:
+                        unioned = cascaded_union(unioned_gathered)
+                    else:
+                        unioned = get_union_all(unioned_gathered)
 
             # Fill the return geometry variable value with the unioned geometry.
-            to_fill = ret[dst_slc].get_value()
-            to_fill[0] = unioned
+            ret_value[dst_index] = unioned
 
         # Spatial average shared dimensions.
         if spatial_average is not None:
@@ -984,30 +998,20 @@ class GeometryVariable(AbstractSpatialVariable):
                     target.set_dimensions(new_dimensions)
                     target.allocate_value()
 
-                    # Swap weight axes to make sure they align with the target variable.
-                    swap_chain = get_swap_chain(dimension_names, names_to_slice_all)
-                    if len(swap_chain) > 0:
-                        weights = weights.copy()
-                    for sc in swap_chain:
-                        weights = weights.swapaxes(*sc)
-
-                    # The main weighting loop. Can get quite intensive with many, large iteration dimensions.
-                    len_names_to_itr = len(names_to_itr)
-                    slice_none = slice(None)
-                    squeeze_out = [ii for ii, dim in enumerate(var_to_weight.dimensions) if dim.name in names_to_itr]
-                    should_squeeze = True if len(squeeze_out) > 0 else False
-                    np_squeeze = np.squeeze
-                    np_atleast_1d = np.atleast_1d
-                    np_ma_average = np.ma.average
-                    for nonweighted_indices in product(*[list(range(ri)) for ri in range_to_itr]):
-                        w_slc = {names_to_itr[ii]: nonweighted_indices[ii] for ii in range(len_names_to_itr)}
-                        for nsa in names_to_slice_all:
-                            w_slc[nsa] = slice_none
-                        data_to_weight = var_to_weight[w_slc].get_masked_value()
-                        if should_squeeze:
-                            data_to_weight = np_squeeze(data_to_weight, axis=tuple(squeeze_out))
-                        weighted_value = np_atleast_1d(np_ma_average(data_to_weight, weights=weights))
-                        target[w_slc].get_value()[:] = weighted_value
+                    # Average all iteration elements at once. The squeezed axes are flattened in the weights' order.
+                    var_dimension_names = get_dimension_names(var_to_weight.dimensions)
+                    itr_axes = [var_dimension_names.index(dn) for dn in names_to_itr]
+                    weight_axes = [var_dimension_names.index(dn) for dn in self.dimension_names if
+                                   dn in names_to_slice_all]
+                    data_to_weight = var_to_weight.get_masked_value().transpose(itr_axes + weight_axes)
+                    data_to_weight = data_to_weight.reshape(int(np.prod(range_to_itr)), -1)
+                    weighted_value = np.ma.average(data_to_weight, axis=1, weights=weights.reshape(-1))
+
+                    # Iteration dimensions keep their order on the target variable.
+                    weighted_value = weighted_value.reshape(range_to_itr + [1])
+                    target.get_value()[:] = weighted_value.filled()
+                    if np.ma.is_masked(weighted_value):
+                        target.set_mask(np.ma.getmaskarray(weighted_value))
                 else:
                     target_to_weight = var_to_weight.get_masked_value()
                     # Sort to minimize floating point sum errors.
@@ -1153,31 +1157,35 @@ class GeometryVariable(AbstractSpatialVariable):
         elif from_crs != to_crs:
             # Be sure and project masked geometries to maintain underlying geometries.
             r_value = self.get_value().reshape(-1)
-            r_loads = wkb.loads
-            r_create = ogr.CreateGeometryFromWkb
-            to_sr = to_crs.sr
-            from_sr = from_crs.sr
 
             the_mask = self.get_mask()
             if the_mask is not None:
                 the_mask = the_mask.flatten()
 
-            for idx, geom in enumerate(r_value.flat):
-                try:
-                    # Get the well known binary representation of the geometry object.
-                    geom_wkb = geom.wkb
-                except AttributeError:
-                    # The geometry may be masked in which case it has no binary whatever. Confirm the geometry is
-                    # masked or raise an exception.
-                    if the_mask is None or not the_mask[idx]:
-                        raise
-                    else:
-                        continue
+            # Transform the geometry coordinates in bulk if possible. OGR is used for anything else.
+            transformer = get_transformer(from_crs, to_crs)
+            if transformer is None or not _update_crs_with_transformer_(transformer, r_value, the_mask):
+                r_loads = wkb.loads
+                r_create = ogr.CreateGeometryFromWkb
+                to_sr = to_crs.sr
+                from_sr = from_crs.sr
+
+                for idx, geom in enumerate(r_value.flat):
+                    try:
+                        # Get the well known binary representation of the geometry object.
+                        geom_wkb = geom.wkb
+                    except AttributeError:
+                        # The geometry may be masked in which case it has no binary whatever. Confirm the geometry is
+                        # masked or raise an exception.
+                        if the_mask is None or not the_mask[idx]:
+                            raise
+                        else:
+                            continue
 
-                ogr_geom = r_create(geom_wkb)
-                ogr_geom.AssignSpatialReference(from_sr)
-                ogr_geom.TransformTo(to_sr)
-                r_value[idx] = r_loads(ogr_geom.ExportToWkb())
+                    ogr_geom = r_create(geom_wkb)
+                    ogr_geom.AssignSpatialReference(from_sr)
+                    ogr_geom.TransformTo(to_sr)
+                    r_value[idx] = r_loads(ogr_geom.ExportToWkb())
         # Even if coordinate systems are measured equivalent, for consistency the new crs is the destination CRS.
         self.crs = to_crs
 
@@ -1230,6 +1238,43 @@ class GeometryVariable(AbstractSpatialVariable):
         return self.get_value().flatten()[0].bounds
 
 
+def get_clipped_geometries(subset_geometry, geometries):
+    """
+    Intersect geometries with a subset geometry. Geometries are classified in bulk as outside (disjoint bounding
+    boxes), inside (properly contained by the prepared subset geometry), or crossing the subset geometry's boundary.
+    Inside geometries are returned unchanged. Only the remaining geometries are intersected.
+
+    :param subset_geometry: The clipping geometry.
+    :type subset_geometry: :class:`shapely.geometry.base.BaseGeometry`
+    :param geometries: An object array of Shapely geometries.
+    :type geometries: :class:`numpy.ndarray`
+    :returns: An object array with the same shape as ``geometries`` containing the clipped geometries.
+    :rtype: :class:`numpy.ndarray`
+    """
+
+    ret = np.empty(geometries.shape, dtype=object)
+    flat_geometries = geometries.reshape(-1)
+    flat_ret = ret.reshape(-1)
+
+    if get_contains_properly_array is None:
+        for idx, geom in enumerate(flat_geometries):
+            flat_ret[idx] = geom.intersection(subset_geometry)
+    else:
+        minx, miny, maxx, maxy = subset_geometry.bounds
+        bounds = get_bounds_array(flat_geometries)
+        inside = np.logical_and(bounds[:, 0] <= maxx, bounds[:, 2] >= minx)
+        inside = np.logical_and(inside, np.logical_and(bounds[:, 1] <= maxy, bounds[:, 3] >= miny))
+        if inside.any():
+            prepare_geometry(subset_geometry)
+            inside[inside] = get_contains_properly_array(subset_geometry, flat_geometries[inside])
+        flat_ret[inside] = flat_geometries[inside]
+        clip = np.invert(inside)
+        # Disjoint geometries are intersected to create empty geometries. These return immediately.
+        flat_ret[clip] = get_intersection_array(flat_geometries[clip], subset_geometry)
+
+    return ret
+
+
 def get_masking_slice(intersects_mask_value, target, apply_slice=True):
     """
     Collective!
@@ -1414,11 +1459,31 @@ def geometryvariable_get_mask_from_intersects(gvar, geometry, use_spatial_index=
     # area for intersects operations. Useful for speeding up grid subsetting operations.
     geometry_target = np.ma.array(gvar.get_value(), mask=original_mask).compressed()
 
+    # A single geometry is evaluated faster in bulk than by building a spatial index. Indexes are used if bulk
+    # predicates are not available, a backend is explicitly requested, or a persisted index may be reused for a
+    # geometry variable read from files.
+    si = None
     if use_spatial_index:
-        si = gvar.get_spatial_index(target=geometry_target)
+        from ocgis.spatial.index import get_spatial_index_backend, get_spatial_index_cache
+        cache = get_spatial_index_cache(use_spatial_index)
+        key = None if cache is None else cache.get_key(gvar, mask=original_mask)
+        if key is not None:
+            si = cache.get_spatial_index(gvar, geometry_target, mask=original_mask, key=key)
+        elif get_intersects_array is None or isinstance(use_spatial_index, six.string_types):
+            si = gvar.get_spatial_index(target=geometry_target, backend=get_spatial_index_backend(use_spatial_index))
+
+    if si is not None:
         # Return the indices of the geometries intersecting the target geometry, and update the mask accordingly.
-        for idx in si.iter_intersects(geometry, geometry_target, keep_touches=keep_touches):
-            ref_fill_mask[global_index[idx]] = False
+        indices = si.get_intersects(geometry, geometry_target, keep_touches=keep_touches)
+        ref_fill_mask[global_index[indices]] = False
+    elif get_intersects_array is not None:
+        # Evaluate the predicates for all geometries in bulk. Preparing the geometry provides the bounding box
+        # rejection of a spatial index.
+        prepare_geometry(geometry)
+        select = get_intersects_array(geometry, geometry_target)
+        if not keep_touches and select.any():
+            select[select] = np.invert(get_touches_array(geometry, geometry_target[select]))
+        ref_fill_mask[global_index[select]] = False
     else:
         # Prepare the polygon for faster spatial operations.
         prepared = prep(geometry)
@@ -1488,3 +1553,44 @@ def do_remove_self_intersects_multi(poly):
     else:
         newpoly = do_remove_self_intersects(poly)
     return newpoly
+
+
+def _update_crs_with_transformer_(transformer, value, mask):
+    """
+    Transform geometry coordinates in place using a coordinate transformer. Only two-dimensional geometries are
+    transformed. Without vectorized geometry operations (Shapely < 2.0), only point geometries are transformed.
+
+    :param transformer: The coordinate transformer.
+    :type transformer: :class:`pyproj.Transformer`
+    :param value: Flat object array of geometries. Masked elements that are not geometries are skipped.
+    :type value: :class:`numpy.ndarray`
+    :param mask: Flat mask for ``value`` or ``None``.
+    :type mask: :class:`numpy.ndarray`
+    :return: ``True`` if the geometries were transformed. If ``False``, ``value`` is not modified.
+    :rtype: bool
+    """
+
+    select = np.array([isinstance(geom, BaseGeometry) for geom in value], dtype=bool)
+    if not select.all() and (mask is None or not mask[np.invert(select)].all()):
+        return False
+    to_transform = value[select]
+
+    if get_transformed_array is None:
+        if not all([isinstance(geom, Point) and not geom.has_z for geom in to_transform]):
+            return False
+        x, y = transformer.transform(np.array([geom.x for geom in to_transform], dtype=float),
+                                     np.array([geom.y for geom in to_transform], dtype=float))
+        transformed = np.empty(to_transform.shape[0], dtype=object)
+        for idx in range(transformed.shape[0]):
+            transformed[idx] = Point(x[idx], y[idx])
+    else:
+        if get_has_z_array(to_transform).any():
+            return False
+
+        def _transform_(coords):
+            return np.column_stack(transformer.transform(coords[:, 0], coords[:, 1]))
+
+        transformed = get_transformed_array(to_transform, _transform_)
+
+    value[select] = transformed
+    return True
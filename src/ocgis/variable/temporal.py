@@ -9,11 +9,31 @@ import numpy as np
 import six
 from ocgis import constants, env, Dimension
 from ocgis import netcdftime
+from ocgis.calc.kernels import get_group_index
 from ocgis.constants import HeaderName, KeywordArgument
 from ocgis.exc import EmptySubsetError, IncompleteSeasonError, CannotFormatTimeError, ResolutionError
-from ocgis.util.helpers import get_is_date_between, iter_array, get_none_or_slice
+from ocgis.util.helpers import get_is_date_part_between, iter_array, get_none_or_slice
 from ocgis.variable.base import SourcedVariable, get_attribute_property, set_attribute_property
 
+# Calendars supported by numeric date part computations mapped to the number of days in a year. Gregorian calendars are
+# mapped to "None".
+_NUMTIME_CALENDARS = {'standard': None, 'gregorian': None, 'proleptic_gregorian': None, 'noleap': 365,
+                      '365_day': 365, 'all_leap': 366, '366_day': 366, '360_day': 360}
+# Number of microseconds in a time unit.
+_NUMTIME_MICROSECONDS = {}
+for _names, _factor in [(('days', 'day', 'd'), 86400000000),
+                        (('hours', 'hour', 'hrs', 'hr', 'h'), 3600000000),
+                        (('minutes', 'minute', 'mins', 'min'), 60000000),
+                        (('seconds', 'second', 'secs', 'sec', 's'), 1000000),
+                        (('milliseconds', 'millisecond', 'msecs', 'msec', 'ms'), 1000),
+                        (('microseconds', 'microsecond', 'usecs', 'usec', 'us'), 1)]:
+    for _name in _names:
+        _NUMTIME_MICROSECONDS[_name] = _factor
+_DAY_MICROSECONDS = 86400000000
+_GREGORIAN_TRANSITION = (1582, 10, 15)
+_CUMULATIVE_MONTH_DAYS = {365: np.cumsum([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30]),
+                          366: np.cumsum([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30])}
+
 
 class TemporalVariable(SourcedVariable):
     """
@@ -198,6 +218,31 @@ class TemporalVariable(SourcedVariable):
             lower, upper = tuple(self.get_numtime([lower, upper]))
         return super(TemporalVariable, self).get_between(lower, upper, return_indices=return_indices)
 
+    def get_date_parts(self):
+        """
+        Date parts are computed directly from numeric time values when the units and calendar are supported by
+        :func:`~ocgis.variable.temporal.get_date_parts_from_numtime`. Otherwise, they are extracted from
+        :attr:`~ocgis.TemporalVariable.value_datetime`.
+
+        :returns: An integer array with shape ``self.shape + (6,)``. The trailing dimension contains the date parts in
+         :attr:`~ocgis.TemporalVariable._date_parts` order.
+        :rtype: :class:`numpy.ndarray`
+        """
+
+        if not self.format_time:
+            raise CannotFormatTimeError('get_date_parts')
+
+        value = self.get_value()
+        ret = None
+        if value.size > 0 and get_datetime_conversion_state(value.flatten()[0]) and not self._has_months_units:
+            ret = get_date_parts_from_numtime(value, self.units, self.calendar)
+        if ret is None:
+            value_datetime = self.value_datetime
+            ret = np.empty(value_datetime.shape + (len(self._date_parts),), dtype=int)
+            for idx, dt in iter_array(value_datetime, return_value=True, use_mask=False):
+                ret[idx] = [dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second]
+        return ret
+
     def get_datetime(self, arr):
         """
         :param arr: An array of floats to convert ``datetime``-like objects.
@@ -263,9 +308,15 @@ class TemporalVariable(SourcedVariable):
         new_bounds = TemporalVariable(value=new_bounds, name=new_name, dimensions=new_dimensions)
         new_attrs = deepcopy(self.attrs)
         # new_attrs['climatology'] = new_bounds.name
+        # All time steps are members of the single group when the grouping is 'all'.
+        if grouping == 'all':
+            group_index = np.zeros(self.shape[0], dtype=int)
+        else:
+            group_index = None
+
         tgv = TemporalGroupVariable(grouping=grouping, date_parts=date_parts, bounds=new_bounds, dgroups=dgroups,
-                                    value=repr_dt, units=self.units, calendar=self.calendar, name=self.name,
-                                    attrs=new_attrs, dimensions=new_dimensions[0])
+                                    group_index=group_index, value=repr_dt, units=self.units, calendar=self.calendar,
+                                    name=self.name, attrs=new_attrs, dimensions=new_dimensions[0])
         tgv.attrs.pop(TemporalVariable._bounds_attribute_name, None)
 
         return tgv
@@ -390,15 +441,14 @@ class TemporalVariable(SourcedVariable):
 
         assert isinstance(time_region, dict)
 
-        # return the values to use for the temporal region subsetting.
-        value = self.value_datetime
+        # return the date parts to use for the temporal region subsetting. bounds are given preference.
         if self.has_bounds:
-            bounds = self.bounds.value_datetime
+            parts = self.bounds.get_date_parts()
         else:
-            bounds = None
+            parts = self.get_date_parts()
 
         # switch to indicate if bounds or centroid datetimes are to be used.
-        use_bounds = False if bounds is None else True
+        use_bounds = self.has_bounds
 
         # remove any none values in the time_region dictionary. this will save
         # time in iteration.
@@ -406,32 +456,19 @@ class TemporalVariable(SourcedVariable):
         time_region = {k: v for k, v in time_region.items() if v is not None}
         assert len(time_region) > 0
 
-        # this is the boolean selection array.
-        select = np.zeros(self.shape[0], dtype=bool)
-
-        # for each row, determine if the date criterion are met updating the
-        # select matrix accordingly.
-        row_check = np.zeros(len(time_region), dtype=bool)
+        # this is the boolean selection array. each time_region element must be satisfied.
+        select = np.ones(self.shape[0], dtype=bool)
 
-        for idx_row in range(select.shape[0]):
-            # do the comparison for each time_region element.
+        for k, v in time_region.items():
+            idx_part = self._date_parts.index(k)
             if use_bounds:
-                row = bounds[idx_row, :]
+                fill = np.zeros(self.shape[0], dtype=bool)
+                for element in v:
+                    fill = np.logical_or(fill, get_is_date_part_between(parts[:, 0, idx_part], parts[:, 1, idx_part],
+                                                                        element))
             else:
-                row = value[idx_row]
-            for ii, (k, v) in enumerate(time_region.items()):
-                if use_bounds:
-                    to_include = []
-                    for element in v:
-                        kwds = {k: element}
-                        to_include.append(get_is_date_between(row[0], row[1], **kwds))
-                    fill = any(to_include)
-                else:
-                    part = getattr(row, k)
-                    fill = True if part in v else False
-                row_check[ii] = fill
-            if row_check.all():
-                select[idx_row] = True
+                fill = np.isin(parts[:, idx_part], v)
+            select = np.logical_and(select, fill)
 
         if not select.any():
             raise EmptySubsetError(origin='temporal')
@@ -449,7 +486,6 @@ class TemporalVariable(SourcedVariable):
         Applied when the grouping is 'all'.
         """
 
-        value = self.value_datetime
         lower, upper = self.extent_datetime
 
         # new bounds are simply the minimum and maximum values chosen either from
@@ -460,7 +496,11 @@ class TemporalVariable(SourcedVariable):
         # the group should be set to select all data.
         dgroups = [slice(None)]
         # the representative datetime is the center of the value array.
-        repr_dt = np.array([value[int((self.shape[0] / 2) - 1)]])
+        # only the center value is converted to a datetime object.
+        repr_dt = self.get_value()[int((self.shape[0] / 2) - 1)]
+        if get_datetime_conversion_state(repr_dt):
+            repr_dt = self.get_datetime(np.array([repr_dt]))[0]
+        repr_dt = np.array([repr_dt])
 
         return new_bounds, date_parts, repr_dt, dgroups
 
@@ -469,68 +509,35 @@ class TemporalVariable(SourcedVariable):
         Applied to groups other than 'all'.
         """
 
-        # map date parts to index positions in date part storage array and flip
-        # they key-value pairs
-        group_map = dict(list(zip(list(range(0, len(self._date_parts))), self._date_parts, )))
+        # map date parts to index positions in date part storage array
         group_map_rev = dict(list(zip(self._date_parts, list(range(0, len(self._date_parts))), )))
 
-        # this array will hold the value data constructed differently depending
-        # on if temporal bounds are present
-        value = np.empty((self.get_value().shape[0], 3), dtype=object)
+        # extract the date parts. these are computed numerically for supported calendars avoiding the creation of
+        # datetime objects.
+        parts = self.get_date_parts()
 
-        # reference the value and bounds datetime object arrays
-        value_datetime = self.value_datetime
+        # the lower and upper values used to compute the group bounds. bounds are given preference. numeric values are
+        # only converted to datetime objects following the group reduction.
         if self.has_bounds:
-            value_datetime_bounds = self.bounds.value_datetime
-        else:
-            value_datetime_bounds = None
-
-        # populate the value array depending on the presence of bounds
-        if value_datetime_bounds is None:
-            value[:, :] = value_datetime.reshape(-1, 1)
-        # bounds are currently not used for the grouping mechanism
+            bounds_source = self.bounds
+            lower, upper = bounds_source.get_value()[:, 0], bounds_source.get_value()[:, 1]
         else:
-            value[:, 0] = value_datetime_bounds[:, 0]
-            value[:, 1] = value_datetime
-            value[:, 2] = value_datetime_bounds[:, 1]
-
-        def _get_attrs_(dt):
-            return ([dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second])
-
-        # extract the date parts
-        parts = np.empty((len(self.get_value()), len(self._date_parts)), dtype=int)
-        for row in range(parts.shape[0]):
-            parts[row, :] = _get_attrs_(value[row, 1])
+            bounds_source = self
+            lower = upper = self.get_value()
+        is_numeric_bounds = get_datetime_conversion_state(lower[0])
 
         # grouping is different for date part combinations v. seasonal
         # aggregation.
         if all([isinstance(ii, six.string_types) for ii in grouping]):
-            unique = deque()
-            for idx in range(parts.shape[1]):
-                if group_map[idx] in grouping:
-                    fill = np.unique(parts[:, idx])
-                else:
-                    fill = [None]
-                unique.append(fill)
-
-            select = deque()
-            idx2_seq = list(range(len(self._date_parts)))
-            for idx in itertools.product(*[list(range(len(u))) for u in unique]):
-                select.append([unique[idx2][idx[idx2]] for idx2 in idx2_seq])
-            select = np.array(select)
-            dgroups = deque()
+            # Date part columns participating in the grouping in date part order. Unique rows are then sorted in the
+            # same order as a product of the unique date part values.
+            idx_cmp = sorted([group_map_rev[group] for group in grouping])
+            unique_parts, group_index = np.unique(parts[:, idx_cmp], axis=0, return_inverse=True)
+            group_index = group_index.reshape(-1)
 
-            idx_cmp = [group_map_rev[group] for group in grouping]
-
-            keep_select = []
-            for idx in range(select.shape[0]):
-                match = select[idx, idx_cmp] == parts[:, idx_cmp]
-                dgrp = match.all(axis=1)
-                if dgrp.any():
-                    keep_select.append(idx)
-                    dgroups.append(dgrp)
-            select = select[keep_select, :]
-            assert (len(dgroups) == select.shape[0])
+            select = np.empty((unique_parts.shape[0], len(self._date_parts)), dtype=object)
+            select[:, idx_cmp] = unique_parts
+            dgroups = GroupIndexSequence(group_index, select.shape[0])
 
             dtype = [(dp, object) for dp in self._date_parts]
         # this is for seasonal aggregations
@@ -557,14 +564,9 @@ class TemporalVariable(SourcedVariable):
             grouping = get_sorted_seasons(grouping, method='min')
 
             for year, season in itertools.product(years, grouping):
-                subgroup = np.zeros(value.shape[0], dtype=bool)
-                for idx in range(value.shape[0]):
-                    if has_year:
-                        if parts[idx, 1] in season and year == parts[idx, 0]:
-                            subgroup[idx] = True
-                    else:
-                        if parts[idx, 1] in season:
-                            subgroup[idx] = True
+                subgroup = np.isin(parts[:, 1], season)
+                if has_year:
+                    subgroup = np.logical_and(subgroup, parts[:, 0] == year)
                 dgroups.append(subgroup)
                 grouping_season.append([season, year])
             dtype = [('months', object), ('year', int)]
@@ -572,9 +574,8 @@ class TemporalVariable(SourcedVariable):
 
         # init arrays to hold values and bounds for the grouped data
         new_value = np.empty((len(dgroups),), dtype=dtype)
-        new_bounds = np.empty((len(dgroups), 2), dtype=object)
 
-        for idx, dgrp in enumerate(dgroups):
+        for idx in range(len(dgroups)):
             # Tuple conversion is required for structure arrays: http://docs.scipy.org/doc/numpy/user/basics.rec.html#filling-structured-arrays
             try:
                 new_value[idx] = tuple(select[idx])
@@ -586,8 +587,15 @@ class TemporalVariable(SourcedVariable):
                 # and it is a Nonetype
                 except TypeError:
                     new_value[idx]['months'] = grouping[idx][0]
-            sel = value[dgrp][:, (0, 2)]
-            new_bounds[idx, :] = [sel.min(), sel.max()]
+
+        if isinstance(dgroups, GroupIndexSequence):
+            new_bounds = get_group_bounds(lower, upper, dgroups.group_index, len(dgroups))
+        else:
+            new_bounds = np.empty((len(dgroups), 2), dtype=object)
+            for idx, dgrp in enumerate(dgroups):
+                new_bounds[idx, :] = [lower[dgrp].min(), upper[dgrp].max()]
+        if is_numeric_bounds:
+            new_bounds = bounds_source.get_datetime(new_bounds.astype(lower.dtype).flatten()).reshape(-1, 2)
 
         new_bounds = np.atleast_2d(new_bounds).reshape(-1, 2)
         date_parts = np.atleast_1d(new_value)
@@ -752,6 +760,10 @@ class TemporalGroupVariable(TemporalVariable):
     :keyword grouping: (``=None``) See :meth:`~ocgis.TemporalVariable.get_grouping`.
     :keyword dgroups: (``=None``) Sequence of boolean arrays defining each unique temporal group.
     :type dgroups: `sequence` of :class:`numpy.ndarray`
+    :keyword group_index: (``=None``) Integer vector with length equal to the source time dimension containing the group
+     identifier for each time step. Time steps not in a group have a negative identifier. If ``None``, this is derived
+     from ``dgroups`` when requested.
+    :type group_index: :class:`numpy.ndarray`
     :keyword date_parts: (``=None``) Sequence of date part tuples.
     :type date_parts: `sequence` of :class:`tuple`
     """
@@ -759,11 +771,161 @@ class TemporalGroupVariable(TemporalVariable):
 
     def __init__(self, *args, **kwargs):
         self.grouping = kwargs.pop('grouping', None)
-        self.dgroups = kwargs.pop('dgroups', None)
+        self._dgroups = kwargs.pop('dgroups', None)
+        self._group_index = kwargs.pop('group_index', None)
         self.date_parts = kwargs.pop('date_parts', None)
 
+        if self._group_index is None and isinstance(self._dgroups, GroupIndexSequence):
+            self._group_index = self._dgroups.group_index
+
         super(TemporalGroupVariable, self).__init__(*args, **kwargs)
 
+    @property
+    def dgroups(self):
+        """
+        Get or set the sequence of boolean arrays defining each temporal group. If only a group index is available,
+        boolean arrays are derived from the index on access.
+
+        :rtype: `sequence` of :class:`numpy.ndarray`
+        """
+        if self._dgroups is None and self._group_index is not None:
+            self._dgroups = GroupIndexSequence(self._group_index, self.shape[0])
+        return self._dgroups
+
+    @dgroups.setter
+    def dgroups(self, value):
+        self._dgroups = value
+        self._group_index = None
+
+    @property
+    def group_index(self):
+        """
+        Integer group identifier for each time step in the source time dimension. Time steps not in a group have a
+        negative identifier. ``None`` is returned if the groups overlap and cannot be represented by a single index.
+
+        :rtype: :class:`numpy.ndarray` | None
+        """
+        if self._group_index is None and self._dgroups is not None:
+            size = None
+            for dgroup in self._dgroups:
+                if not isinstance(dgroup, slice):
+                    size = len(dgroup)
+                    break
+            if size is not None:
+                self._group_index = get_group_index(self._dgroups, size)
+        return self._group_index
+
+    @property
+    def group_offsets(self):
+        """
+        Start and stop offsets for each group when the source time steps are ordered by group. The offsets for group
+        ``idx`` are ``group_offsets[idx]`` and ``group_offsets[idx + 1]``. ``None`` is returned if the time steps are not
+        ordered by group.
+
+        :rtype: :class:`numpy.ndarray` | None
+        """
+        group_index = self.group_index
+        if group_index is None or group_index.shape[0] == 0 or group_index[0] < 0 or \
+                np.any(np.diff(group_index) < 0):
+            ret = None
+        else:
+            ret = np.zeros(self.shape[0] + 1, dtype=int)
+            ret[1:] = np.cumsum(np.bincount(group_index, minlength=self.shape[0]))
+        return ret
+
+
+class GroupIndexSequence(object):
+    """
+    Sequence of boolean temporal group selection arrays derived on access from an integer group index. Used as a
+    compatibility view for :attr:`~ocgis.variable.temporal.TemporalGroupVariable.dgroups`.
+
+    :param group_index: See :class:`~ocgis.variable.temporal.TemporalGroupVariable`.
+    :type group_index: :class:`numpy.ndarray`
+    :param int ngroups: The number of groups.
+    """
+
+    def __init__(self, group_index, ngroups):
+        self.group_index = group_index
+        self.ngroups = ngroups
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx += self.ngroups
+        if idx < 0 or idx >= self.ngroups:
+            raise IndexError(idx)
+        return self.group_index == idx
+
+    def __iter__(self):
+        for idx in range(self.ngroups):
+            yield self[idx]
+
+    def __len__(self):
+        return self.ngroups
+
+
+def get_date_parts_from_numtime(arr, units, calendar):
+    """
+    Compute date parts directly from numeric time values without creating ``datetime``-like objects. Values are rounded
+    to microseconds in the same manner as :func:`netCDF4.num2date` and seconds are truncated consistent with
+    :meth:`~ocgis.TemporalVariable.get_datetime`.
+
+    :param arr: An array of numeric time values.
+    :type arr: :class:`numpy.ndarray`
+    :param str units: The time units string (i.e. ``'days since 1850-01-01'``).
+    :param str calendar: The calendar name. Supported calendars are ``'standard'``, ``'gregorian'``,
+     ``'proleptic_gregorian'``, ``'noleap'``, ``'365_day'``, ``'all_leap'``, ``'366_day'``, and ``'360_day'``.
+    :returns: An integer array with shape ``arr.shape + (6,)``. The trailing dimension contains the year, month, day,
+     hour, minute, and second for each time value. ``None`` is returned if the units or calendar are not supported by
+     the numeric conversion. For the mixed Julian/Gregorian calendars, this includes any time before the Gregorian
+     transition on 1582-10-15.
+    :rtype: :class:`numpy.ndarray` | None
+    """
+
+    days_in_year = _NUMTIME_CALENDARS.get(str(calendar).lower(), False)
+    units_parts = str(units).split(None, 2)
+    if days_in_year is False or len(units_parts) != 3 or units_parts[1].lower() != 'since':
+        return None
+    factor = _NUMTIME_MICROSECONDS.get(units_parts[0].lower())
+    if factor is None:
+        return None
+
+    # Parse the origin using the same rules as the object conversion. This also accounts for any time zone offset.
+    try:
+        origin = nc.num2date(0, str(units), calendar=calendar)
+    except ValueError:
+        return None
+    is_mixed = str(calendar).lower() in ('standard', 'gregorian')
+    if is_mixed and (origin.year, origin.month, origin.day) < _GREGORIAN_TRANSITION:
+        return None
+
+    arr = np.asarray(arr)
+    if arr.dtype.kind == 'f':
+        # Mirror the microsecond rounding used by "num2date" including the adjustment for values one microsecond from a
+        # whole second.
+        scaled = arr.astype(np.longdouble) * factor
+        microseconds = np.rint(scaled).astype(np.int64)
+        if factor >= 1000000:
+            microseconds = np.where(microseconds % 1000000 == 1, np.floor(scaled).astype(np.int64), microseconds)
+            microseconds = np.where(microseconds % 1000000 == 999999, np.ceil(scaled).astype(np.int64), microseconds)
+    else:
+        microseconds = arr.astype(np.int64) * factor
+    origin_days = _get_days_from_date_(origin.year, origin.month, origin.day, days_in_year)
+    origin_seconds = (origin.hour * 60 + origin.minute) * 60 + origin.second
+    microseconds = microseconds + (origin_seconds * 1000000 + origin.microsecond)
+    days, microseconds = np.divmod(microseconds, _DAY_MICROSECONDS)
+    days += origin_days
+
+    if is_mixed and days.size > 0 and days.min() < _get_days_from_date_(*_GREGORIAN_TRANSITION):
+        return None
+
+    ret = np.empty(arr.shape + (6,), dtype=int)
+    ret[..., 0], ret[..., 1], ret[..., 2] = _get_date_from_days_(days, days_in_year)
+    seconds = microseconds // 1000000
+    ret[..., 3] = seconds // 3600
+    ret[..., 4] = (seconds // 60) % 60
+    ret[..., 5] = seconds % 60
+    return ret
+
 
 def get_datetime_conversion_state(archetype):
     """
@@ -915,6 +1077,31 @@ def get_difference_in_months(origin, target):
     return diff_months
 
 
+def get_group_bounds(lower, upper, group_index, ngroups):
+    """
+    Get the minimum lower and maximum upper bound for each temporal group.
+
+    :param lower: Vector of lower bound values.
+    :type lower: :class:`numpy.ndarray`
+    :param upper: Vector of upper bound values.
+    :type upper: :class:`numpy.ndarray`
+    :param group_index: See :class:`~ocgis.variable.temporal.TemporalGroupVariable`. All groups must be non-empty.
+    :type group_index: :class:`numpy.ndarray`
+    :param int ngroups: The number of groups.
+    :returns: An ``object`` array with dimension ``(ngroups, 2)``.
+    :rtype: :class:`numpy.ndarray`
+    """
+
+    order = np.argsort(group_index, kind='mergesort')
+    order = order[group_index[order] >= 0]
+    offsets = np.zeros(ngroups, dtype=int)
+    offsets[1:] = np.cumsum(np.bincount(group_index[order], minlength=ngroups))[:-1]
+    ret = np.empty((ngroups, 2), dtype=object)
+    ret[:, 0] = np.minimum.reduceat(np.asarray(lower, dtype=object)[order], offsets)
+    ret[:, 1] = np.maximum.reduceat(np.asarray(upper, dtype=object)[order], offsets)
+    return ret
+
+
 def get_is_interannual(sequence):
     """
     Returns ``True`` if an integer sequence representing a season crosses a year boundary.
@@ -1126,3 +1313,46 @@ def iter_boolean_groups_from_time_regions(time_regions, tvar, yield_subset=False
             yld = dgroup
 
         yield yld
+
+
+def _get_date_from_days_(days, days_in_year=None):
+    # Convert day counts to year, month, and day. Gregorian day counts are relative to 1970-01-01 while fixed-length
+    # calendar day counts are relative to the start of year zero.
+    if days_in_year == 360:
+        year, day_of_year = np.divmod(days, 360)
+        month, day = np.divmod(day_of_year, 30)
+        ret = year, month + 1, day + 1
+    elif days_in_year is not None:
+        year, day_of_year = np.divmod(days, days_in_year)
+        cumulative = _CUMULATIVE_MONTH_DAYS[days_in_year]
+        month = np.searchsorted(cumulative, day_of_year, side='right')
+        ret = year, month, day_of_year - cumulative[month - 1] + 1
+    else:
+        # Proleptic Gregorian civil date from days. See: http://howardhinnant.github.io/date_algorithms.html
+        days = days + 719468
+        era = days // 146097
+        day_of_era = days - era * 146097
+        year_of_era = (day_of_era - day_of_era // 1460 + day_of_era // 36524 - day_of_era // 146096) // 365
+        day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 - year_of_era // 100)
+        month_index = (5 * day_of_year + 2) // 153
+        day = day_of_year - (153 * month_index + 2) // 5 + 1
+        month = month_index + np.where(month_index < 10, 3, -9)
+        year = year_of_era + era * 400 + (month <= 2)
+        ret = year, month, day
+    return ret
+
+
+def _get_days_from_date_(year, month, day, days_in_year=None):
+    # Inverse of "_get_date_from_days_" for scalar dates.
+    if days_in_year == 360:
+        ret = year * 360 + (month - 1) * 30 + day - 1
+    elif days_in_year is not None:
+        ret = year * days_in_year + int(_CUMULATIVE_MONTH_DAYS[days_in_year][month - 1]) + day - 1
+    else:
+        year -= month <= 2
+        era = year // 400
+        year_of_era = year - era * 400
+        day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+        day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+        ret = era * 146097 + day_of_era - 719468
+    return ret